@@ -0,0 +1,76 @@
+"""
+Latency of small documents on many concurrent local connections while one
+connection sends a huge document, with iter_documents_async() parsing
+without a budget, with the default budget, and with offloading.
+
+    python3 benchmarks/bench_async.py [huge_size_in_mb] [connections]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+import corpus
+
+SMALL = b'such "tenant" is "t1" , "ids" is so 1 and 2 also 3 many wow\n'
+REQUESTS = 50
+
+CONFIGS = (
+    ("no budget", dict(budget=1 << 40, chunk_size=1 << 40)),
+    ("budget", dict()),
+    ("budget, offload", dict(offload_size=256 * 1024)),
+)
+
+async def serve(options, reader, writer):
+    async for _ in dogeparser.iter_documents_async(reader, **options):
+        writer.write(b"ok\n")
+        await writer.drain()
+    writer.close()
+
+async def small_client(port, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        writer.write(SMALL)
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.001)
+    writer.close()
+
+async def huge_client(port, document):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await asyncio.sleep(0.01) # let the small clients get going
+    writer.write(document)
+    writer.write_eof()
+    await reader.readline()
+    writer.close()
+
+async def run(options, document, connections):
+    server = await asyncio.start_server(lambda r, w: serve(options, r, w), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(huge_client(port, document), *(small_client(port, latencies) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    return elapsed, sorted(latencies)
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    document = corpus.records(int(size_mb * 1024 * 1024)).encode("utf-8") + b"\n"
+
+    print("{} small connections x {} requests, one {:.1f} MB document:".format(connections, REQUESTS, size_mb))
+    for name, options in CONFIGS:
+        elapsed, latencies = asyncio.run(run(options, document, connections))
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[len(latencies) * 99 // 100]
+        print("{:>16}: total {:6.2f} s  p50 {:7.2f} ms  p99 {:7.2f} ms  max {:7.2f} ms".format(
+            name, elapsed, p50 * 1000, p99 * 1000, latencies[-1] * 1000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measure dumps() and iterencode() throughput, with json.dumps as a yardstick.
+
+    python3 benchmarks/bench_dumps.py [size_in_mb]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+from bench_scanner import make_document
+
+def bench(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    obj = dogeparser.loads(make_document(int(size_mb * 1024 * 1024)))
+
+    elapsed, text = bench(lambda: dogeparser.dumps(obj))
+    mb = len(text.encode("utf-8")) / (1024.0 * 1024.0)
+    assert dogeparser.loads(text) == obj
+    print("{:>12}: {:8.3f} s {:8.2f} MB/s".format("dumps", elapsed, mb / elapsed))
+
+    elapsed, chunks = bench(lambda: sum(1 for _ in dogeparser.iterencode(obj)))
+    print("{:>12}: {:8.3f} s {:8.2f} MB/s ({} chunks)".format("iterencode", elapsed, mb / elapsed, chunks))
+
+    elapsed, text = bench(lambda: json.dumps(obj))
+    mb = len(text.encode("utf-8")) / (1024.0 * 1024.0)
+    print("{:>12}: {:8.3f} s {:8.2f} MB/s".format("json.dumps", elapsed, mb / elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare loads() throughput of the state machine and recursive-descent
+engines, on the default scanner.
+
+    python3 benchmarks/bench_engine.py [size_in_mb]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+from bench_scanner import make_document
+
+def bench(document, engine, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dogeparser.loads(document, engine=engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    document = make_document(int(size_mb * 1024 * 1024))
+    mb = len(document.encode("utf-8")) / (1024.0 * 1024.0)
+
+    assert dogeparser.loads(document, engine="state") == dogeparser.loads(document, engine="descent")
+
+    results = {}
+    for engine in ("state", "descent"):
+        results[engine] = bench(document, engine)
+        print("{:>10}: {:8.3f} s {:8.2f} MB/s".format(engine, results[engine], mb / results[engine]))
+
+    print("{:>10}: {:8.2f}x".format("speedup", results["state"] / results["descent"]))
+
+if __name__ == "__main__":
+    main()
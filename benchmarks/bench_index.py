@@ -0,0 +1,49 @@
+"""
+Compare building a StructuralIndex with NumPy and with the pure-Python
+backend, and loadb() with and without an index, on multi-MB documents with
+many escaped strings.
+
+    python3 benchmarks/bench_index.py [size_in_mb]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+import corpus
+
+def bench(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8.0
+    backends = ["python"] if dogeparser.numpy is None else ["python", "numpy"]
+    if dogeparser.numpy is None:
+        print("NumPy is not installed: pure-Python backend only")
+
+    for kind in ("strings", "records"):
+        data = getattr(corpus, kind)(int(size_mb * 1024 * 1024)).encode("utf-8")
+        mb = len(data) / (1024.0 * 1024.0)
+        print("{} ({:.1f} MB):".format(kind, mb))
+
+        for backend in backends:
+            seconds = bench(lambda: dogeparser.StructuralIndex(data, backend))
+            print("{:>24}: {:8.3f} s {:8.2f} MB/s".format("index " + backend, seconds, mb / seconds))
+
+        runs = [("loadb, no index", False)]
+        runs += [("loadb, index " + backend, dogeparser.StructuralIndex(data, backend)) for backend in backends]
+        for name, index in runs:
+            seconds = bench(lambda: dogeparser.loadb(data, index=index))
+            print("{:>24}: {:8.3f} s {:8.2f} MB/s".format(name, seconds, mb / seconds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measure how loads_many() scales with the number of worker processes on
+line-delimited DSON.
+
+    python3 benchmarks/bench_loads_many.py [lines] [max_workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+from bench_scanner import RECORD
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    lines = [RECORD.format(n, oct(n)[2:]) + "\n" for n in range(num_lines)]
+    mb = sum(len(line) for line in lines) / (1024.0 * 1024.0)
+
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        for ordered in (True, False):
+            start = time.perf_counter()
+            errors = sum(1 for _, _, error in dogeparser.loads_many(lines, workers=workers, ordered=ordered) if error)
+            elapsed = time.perf_counter() - start
+            assert 0 == errors
+
+            if baseline is None:
+                baseline = elapsed
+
+            print("workers={:<3} {:>9}: {:8.3f} s {:10.0f} docs/s {:8.2f} MB/s {:6.2f}x".format(
+                workers, "ordered" if ordered else "unordered", elapsed,
+                num_lines / elapsed, mb / elapsed, baseline / elapsed))
+
+            if 1 == workers:
+                # A single worker runs in-process; ordering makes no difference
+                break
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure memory held by the document loads() builds from a large record
+array, with and without a StringCache for repeated string values.
+
+    python3 benchmarks/bench_memory.py [records]
+"""
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+
+FIELDS = ("id", "name", "status", "region", "owner", "tier", "enabled", "score",
+          "created", "updated", "kind", "tags")
+
+def make_document(num_records, seed=42):
+    """ Record array with a dozen fixed keys and low-cardinality values. """
+    rng = random.Random(seed)
+    records = []
+    for n in range(num_records):
+        fields = []
+        for field in FIELDS:
+            if "id" == field or "score" == field:
+                value = oct(n)[2:]
+            elif "enabled" == field:
+                value = rng.choice(("yes", "no"))
+            else:
+                value = '"{}-{}"'.format(field, rng.randrange(20))
+            fields.append('"{}" is {}'.format(field, value))
+        records.append("such " + " , ".join(fields) + " wow")
+
+    return "so " + " and ".join(records) + " many"
+
+def retained(function):
+    """ :return: (result, bytes still allocated after function() returns) """
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def main():
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    document = make_document(num_records)
+    print("document: {:.2f} MB, {} records".format(len(document) / (1024.0 * 1024.0), num_records))
+
+    runs = [("loads", lambda: dogeparser.loads(document))]
+    if hasattr(dogeparser, "StringCache"):
+        cache = dogeparser.StringCache()
+        runs.append(("loads+StringCache", lambda: dogeparser.loads(document, string_cache=cache)))
+
+    for label, function in runs:
+        result, size = retained(function)
+        print("{:>18}: {:8.2f} MB retained {:8.1f} bytes/record".format(label, size / (1024.0 * 1024.0), size / float(num_records)))
+        del result
+
+if __name__ == "__main__":
+    main()
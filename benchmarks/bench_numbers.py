@@ -0,0 +1,48 @@
+"""
+Measure loads() throughput on a numeric-heavy document (arrays of sensor
+readings: integers, fractions and ``very`` exponents).
+
+    python3 benchmarks/bench_numbers.py [size_in_mb]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+
+def make_document(size, seed=10):
+    """ Build a DSON array of arrays of numbers roughly ``size`` characters long. """
+    rng = random.Random(seed)
+    rows = []
+    length = 0
+    while length < size:
+        row = " and ".join(dogeparser.encode_number(rng.choice((
+            rng.randrange(-100000, 100000),
+            rng.uniform(-1000.0, 1000.0),
+            rng.uniform(-1.0, 1.0) * 10.0 ** rng.randrange(-30, 30)
+        ))) for _ in range(16))
+        rows.append("so " + row + " many")
+        length += len(rows[-1]) + 5
+
+    return "so " + " also ".join(rows) + " many"
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    document = make_document(int(size_mb * 1024 * 1024))
+    mb = len(document) / (1024.0 * 1024.0)
+
+    for engine in ("state", "descent"):
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            dogeparser.loads(document, engine=engine)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        print("{:>10}: {:8.3f} s {:8.2f} MB/s".format(engine, best, mb / best))
+
+if __name__ == "__main__":
+    main()
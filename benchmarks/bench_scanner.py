@@ -0,0 +1,55 @@
+"""
+Compare loads() throughput of the reference and regex scanners.
+
+    python3 benchmarks/bench_scanner.py [size_in_mb]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+
+RECORD = ('such "name" is "shibe {}", "age" is {} . "tags" is so "such" and "wow\\u000041" many ! '
+          '"weight" is 43.71very2 ? "good" is yes wow')
+
+def make_document(size):
+    """ Build a DSON array of records roughly ``size`` characters long. """
+    records = []
+    length = 0
+    n = 0
+    while length < size:
+        record = RECORD.format(n, oct(n)[2:])
+        records.append(record)
+        length += len(record) + 5
+        n += 1
+
+    return "so " + " also ".join(records) + " many"
+
+def bench(document, scanner, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dogeparser.loads(document, scanner=scanner)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    document = make_document(int(size_mb * 1024 * 1024))
+    mb = len(document.encode("utf-8")) / (1024.0 * 1024.0)
+
+    assert dogeparser.loads(document, scanner="reference") == dogeparser.loads(document, scanner="regex")
+
+    results = {}
+    for scanner in ("reference", "regex"):
+        results[scanner] = bench(document, scanner)
+        print("{:>10}: {:8.3f} s {:8.2f} MB/s".format(scanner, results[scanner], mb / results[scanner]))
+
+    print("{:>10}: {:8.2f}x".format("speedup", results["reference"] / results["regex"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Seeded synthetic DSON corpus for the benchmarks. The same seed and size
+always produce the same documents, so results can be compared between
+revisions.
+
+    python3 benchmarks/corpus.py [kind] [size_in_mb] > corpus.dson
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import dogeparser
+
+DEFAULT_SEED = 5643
+
+WORDS = ("such", "wow", "many", "very", "doge", "shibe", "inu", "much", "so", "amaze")
+UNICODE_CHARS = "éüñ犬柴ʕ•ᴥ•ʔ🐕"
+
+def _word(rng):
+    return rng.choice(WORDS)
+
+def _number(rng):
+    kind = rng.randrange(3)
+    if 0 == kind:
+        return rng.randrange(-10 ** 6, 10 ** 6)
+    elif 1 == kind:
+        return round(rng.uniform(-1000.0, 1000.0), 3)
+
+    return rng.uniform(-1.0, 1.0) * 10.0 ** rng.randrange(-40, 40)
+
+def _string(rng):
+    """ Text with quotes, control characters and non-ASCII characters to escape. """
+    parts = []
+    for _ in range(rng.randrange(1, 8)):
+        kind = rng.randrange(4)
+        if 0 == kind:
+            parts.append(rng.choice(UNICODE_CHARS))
+        elif 1 == kind:
+            parts.append(rng.choice('"\\\n\t'))
+        else:
+            parts.append(_word(rng))
+
+    return " ".join(parts)
+
+def _record(rng, n):
+    return {
+        "id": n,
+        "name": "{} {}".format(_word(rng), n),
+        "active": rng.choice((True, False)),
+        "owner": rng.choice((None, _word(rng))),
+        "score": round(rng.uniform(0.0, 100.0), 2),
+        "tags": [_word(rng) for _ in range(rng.randrange(4))],
+        "location": {"lat": rng.uniform(-90.0, 90.0), "lon": rng.uniform(-180.0, 180.0)},
+        "region": rng.choice(("north", "south", "east", "west")),
+        "level": rng.randrange(10),
+        "note": _word(rng) + " " + _word(rng),
+    }
+
+def _nested(rng, depth):
+    """ A chain of objects ``depth`` levels deep, with a few siblings per level. """
+    obj = {"leaf": _number(rng)}
+    for level in range(depth):
+        obj = {"level": level, "name": _word(rng), "child": obj, "siblings": [_number(rng), _word(rng)]}
+
+    return obj
+
+def _fill(size, make_item):
+    """ Items from make_item(n) until their DSON adds up to ``size`` characters. """
+    items = []
+    length = 0
+    while length < size:
+        item = make_item(len(items))
+        items.append(item)
+        length += len(item) + 6
+
+    return items
+
+def nested(size, seed=DEFAULT_SEED):
+    """ Array of deeply nested objects (up to 200 levels). """
+    rng = random.Random(seed)
+    items = _fill(size, lambda n: dogeparser.dumps(_nested(rng, rng.randrange(20, 200))))
+    return "so " + " also ".join(items) + " many"
+
+def records(size, seed=DEFAULT_SEED):
+    """ Wide array of flat records, like a table dump. """
+    rng = random.Random(seed)
+    items = _fill(size, lambda n: dogeparser.dumps(_record(rng, n)))
+    return "so " + " and ".join(items) + " many"
+
+def strings(size, seed=DEFAULT_SEED):
+    """ Array of strings, many of them with escapes and ``\\u`` octal code points. """
+    rng = random.Random(seed)
+    items = _fill(size, lambda n: dogeparser.dumps(_string(rng), ensure_ascii=True))
+    return "so " + " and ".join(items) + " many"
+
+def numbers(size, seed=DEFAULT_SEED):
+    """ Array of arrays of integers, fractions and ``very`` exponents, like sensor readings. """
+    rng = random.Random(seed)
+    items = _fill(size, lambda n: dogeparser.dumps([_number(rng) for _ in range(16)]))
+    return "so " + " also ".join(items) + " many"
+
+def lines(size, seed=DEFAULT_SEED):
+    """ Many small documents, one per line. """
+    rng = random.Random(seed)
+    items = _fill(size, lambda n: dogeparser.dumps(_record(rng, n) if rng.randrange(2) else [_word(rng), _number(rng)]))
+    return "\n".join(items) + "\n"
+
+CORPORA = {
+    "nested": nested,
+    "records": records,
+    "strings": strings,
+    "numbers": numbers,
+    "lines": lines,
+}
+
+def main():
+    kind = sys.argv[1] if len(sys.argv) > 1 else "records"
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    sys.stdout.write(CORPORA[kind](int(size_mb * 1024 * 1024)))
+
+if __name__ == "__main__":
+    main()
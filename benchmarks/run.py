@@ -0,0 +1,229 @@
+"""
+Benchmark runner: times loads, loadb, loads with NumericArrays, extract,
+validate, a compile_schema parser, transcode_to_json, read_string,
+read_number and the command-line driver over the synthetic corpus (see
+corpus.py) and reports MB/s, documents/s and peak memory.
+
+    python3 benchmarks/run.py [--size MB] [--only NAME] [--save LABEL] [--compare LABEL]
+
+``--save LABEL`` stores the results in ``benchmarks/baselines/LABEL.json``;
+``--compare LABEL`` prints each result against that baseline and exits with
+status 1 if any benchmark got slower by more than ``--threshold``.
+"""
+import argparse
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+
+import dogeparser
+import corpus
+
+BASELINE_DIR = os.path.join(HERE, "baselines")
+
+def _lexemes(document, pattern):
+    """ The lexemes of document matching pattern, separated by single spaces. """
+    return " ".join(match.group() for match in re.finditer(pattern, document))
+
+def _read_all(document, read):
+    """ Call read(stream) until document is used up; :return: lexemes read. """
+    scanner = dogeparser.get_scanner()
+    stream = dogeparser.StringStream(document)
+    count = 0
+    while not stream.eof():
+        read(stream)
+        scanner.strip_whitespace(stream)
+        count += 1
+
+    return count
+
+def bench_loads(size, kind):
+    document = getattr(corpus, kind)(size)
+
+    def run():
+        dogeparser.loads(document)
+        return 1
+
+    return len(document.encode("utf-8")), run
+
+def bench_loadb(size, kind):
+    document = getattr(corpus, kind)(size).encode("utf-8")
+
+    def run():
+        dogeparser.loadb(document)
+        return 1
+
+    return len(document), run
+
+def bench_numeric_arrays(size):
+    document = corpus.numbers(size)
+    hook = dogeparser.NumericArrays()
+
+    def run():
+        dogeparser.loads(document, array_hook=hook)
+        return 1
+
+    return len(document.encode("utf-8")), run
+
+def bench_loads_lines(size):
+    lines = corpus.lines(size).splitlines()
+
+    def run():
+        for line in lines:
+            dogeparser.loads(line)
+        return len(lines)
+
+    return sum(len(line.encode("utf-8")) + 1 for line in lines), run
+
+def bench_extract_records(size):
+    document = corpus.records(size)
+
+    def run():
+        dogeparser.extract(document, ["[*].name"])
+        return 1
+
+    return len(document.encode("utf-8")), run
+
+def bench_validate(size):
+    document = corpus.records(size).encode("utf-8")
+
+    def run():
+        dogeparser.validate(document)
+        return 1
+
+    return len(document), run
+
+RECORD_SCHEMA = [{"id": int, "name": str, "active": bool, "owner": (str, None), "score": float, "tags": [str],
+                  "location": {"lat": float, "lon": float}, "region": str, "level": int, "note": str}]
+
+def bench_schema(size):
+    document = corpus.records(size)
+    parse = dogeparser.compile_schema(RECORD_SCHEMA)
+
+    def run():
+        parse(document)
+        return 1
+
+    return len(document.encode("utf-8")), run
+
+def bench_transcode(size):
+    document = corpus.records(size).encode("utf-8")
+
+    def run():
+        dogeparser.transcode_to_json(io.BytesIO(document), io.StringIO())
+        return 1
+
+    return len(document), run
+
+def bench_read_string(size):
+    strings = _lexemes(corpus.strings(size), r'"(?:[^"\\]|\\.)*"')
+    scanner = dogeparser.get_scanner()
+    return len(strings.encode("utf-8")), lambda: _read_all(strings, scanner.read_string)
+
+def bench_read_number(size):
+    numbers = _lexemes(corpus.numbers(size), r"-?[0-7][-0-7.veryVERY]*")
+    scanner = dogeparser.get_scanner()
+    return len(numbers), lambda: _read_all(numbers, scanner.read_number)
+
+def bench_cli(size):
+    data = corpus.lines(size).encode("utf-8")
+    command = [sys.executable, os.path.join(HERE, os.pardir, "dogeparser.py")]
+
+    def run():
+        subprocess.run(command, input=data, stdout=subprocess.DEVNULL, check=True)
+        return data.count(b"\n")
+
+    return len(data), run
+
+BENCHMARKS = {
+    "loads-nested": lambda size: bench_loads(size, "nested"),
+    "loads-records": lambda size: bench_loads(size, "records"),
+    "loads-strings": lambda size: bench_loads(size, "strings"),
+    "loads-numbers": lambda size: bench_loads(size, "numbers"),
+    "loads-lines": bench_loads_lines,
+    "numeric-arrays": bench_numeric_arrays,
+    "loadb-records": lambda size: bench_loadb(size, "records"),
+    "extract-records": bench_extract_records,
+    "validate-records": bench_validate,
+    "schema-records": bench_schema,
+    "to-json-records": bench_transcode,
+    "read_string": bench_read_string,
+    "read_number": bench_read_number,
+    "cli-lines": bench_cli,
+}
+
+def measure(function, repeat):
+    """ :return: (best time, documents per call, peak traced memory in bytes) """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        documents = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Tracing slows everything down, so memory gets a run of its own.
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, documents, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the dogeparser benchmarks.")
+    parser.add_argument("--size", type=float, default=1.0, help="corpus size per benchmark, in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of this many runs")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--save", metavar="LABEL", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="LABEL", help="compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown against the baseline reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    size = int(args.size * 1024 * 1024)
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, args.compare + ".json")) as fp:
+            baseline = json.load(fp)["results"]
+
+    results = {}
+    regressions = []
+    for name in args.only or BENCHMARKS:
+        num_bytes, function = BENCHMARKS[name](size)
+        seconds, documents, peak = measure(function, args.repeat)
+        results[name] = {
+            "seconds": seconds,
+            "mb_per_s": num_bytes / (1024.0 * 1024.0) / seconds,
+            "docs_per_s": documents / seconds,
+            "peak_mb": peak / (1024.0 * 1024.0),
+        }
+
+        line = "{:>16}: {:8.2f} MB/s {:12.0f} docs/s {:8.2f} MB peak".format(
+            name, results[name]["mb_per_s"], results[name]["docs_per_s"], results[name]["peak_mb"])
+
+        if baseline is not None and name in baseline:
+            ratio = results[name]["mb_per_s"] / baseline[name]["mb_per_s"]
+            line += " {:6.2f}x".format(ratio)
+            if ratio < 1.0 - args.threshold:
+                line += " REGRESSION"
+                regressions.append(name)
+
+        print(line)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(os.path.join(BASELINE_DIR, args.save + ".json"), "w") as fp:
+            json.dump({"size": size, "python": sys.version.split()[0], "results": results}, fp, indent=2, sort_keys=True)
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -29,8 +29,34 @@ Doge parser for Python 3
 ░░░░░░░░░▒▒▒▒▒▒▒▒▒▒▀▀░░░░░░░░
 
 """
+import asyncio
+import codecs
+import copy
+import hashlib
+import json
+import marshal
+import math
+import mmap as mmap_module
+import os
+import pprint
 import re
-from collections import deque
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache, partial
+from itertools import repeat
+from types import MappingProxyType
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 SO_START              = 0
 SO_NEW_OBJECT         = 1 # A new object is to be created
@@ -73,6 +99,8 @@ NUMBER_LEADING_CHARS = "-1234567890"
 NUMBER_CHARS = "-1234567890.veryVERY"
 
 VALID_TOKEN_CHARS = 'abcdefghijklmnopqrstuvwxyz,.!?'
+LEXEME_CHARS = frozenset(VALID_TOKEN_CHARS + NUMBER_CHARS) # tokens and numbers
+LEXEME_TEXT = "".join(sorted(LEXEME_CHARS)) # the same, for str.rstrip()
 QUOTE = '"'
 RSOLIDUS = '\\'
 
@@ -87,6 +115,62 @@ ESCAPE_CHARS = {
     "\"": "\""
 }
 
+CONSTANTS = {
+    "yes": True,
+    "no": False,
+    "empty": None
+}
+
+## Precompiled lexeme patterns used by RegexScanner. Most of them skip leading
+## whitespace themselves, so a single match consumes a whole lexeme.
+WHITESPACE_RE = re.compile(r"[ \t\v\r\n]*")
+TOKEN_RE = re.compile(r"[ \t\v\r\n]*([a-z,.!?]*)")
+SIMPLE_STRING_RE = re.compile(r'[ \t\v\r\n]*"([^"\\]*)"') # string with no escapes at all
+STRING_RUN_RE = re.compile(r'[^"\\]*')                    # escape-free run inside a string
+OCTAL_CODE_POINT_RE = re.compile(r"[0-7]{1,%d}" % NUM_OCTAL_DIGITS_FOR_CODE_POINT)
+NUMBER_RUN_RE = re.compile(r"[-0-9.veryVERY]*")
+VALUE_RE = re.compile(r'[ \t\v\r\n]*(?:"([^"\\]*)"|([a-z,.!?]+)|([-0-9][-0-9.veryVERY]*))')
+# Skipping over values: everything up to the next nesting token, strings
+# (with escapes) included, and the nesting token itself.
+SKIP_RE = re.compile(r'(?:[^"a-z,.!?]+|"[^"\\]*(?:\\.[^"\\]*)*"|(?!(?:such|so|wow|many)(?![a-z,.!?]))[a-z,.!?]+)*')
+NESTING_RE = re.compile(r"(such|so|wow|many)(?![a-z,.!?])")
+ANY_STRING_RE = re.compile(r'[ \t\v\r\n]*"[^"\\]*(?:\\.[^"\\]*)*"')
+# A quote that is not escaped (after a character that is not a backslash),
+# and anything that is not whitespace
+UNESCAPED_QUOTE_RE = re.compile(r'[^\\](?:\\\\)*"')
+NOT_WHITESPACE_RE = re.compile(r"[^ \t\v\r\n]")
+# String contents whose escapes are all valid, and one escape sequence
+VALID_ESCAPES_RE = re.compile(r'[^\\]*(?:\\(?:[%s]|u[0-7]{%d})[^\\]*)*\Z'
+                              % (re.escape("".join(ESCAPE_CHARS)), NUM_OCTAL_DIGITS_FOR_CODE_POINT))
+ESCAPE_SEQUENCE_RE = re.compile(r"\\(?:u([0-7]{%d})|(.))" % NUM_OCTAL_DIGITS_FOR_CODE_POINT, re.DOTALL)
+# A whole number: sign, integer digits, fraction digits, exponent (with sign)
+NUMBER_RE = re.compile(r"(-?)([0-7]+)(?:\.([0-7]+))?(?:(?i:very)(-?[0-7]+))?\Z")
+# Number text that could still become valid with more digits
+INCOMPLETE_NUMBER_RE = re.compile(r"-?(?:[0-7]+(?:\.[0-7]+)?(?i:v|ve|ver|very)-?|[0-7]+\.)?\Z")
+
+## Patterns for validate(): each matches a lexeme (or a few) only if loads()
+## would accept it, without any groups to extract.
+_TOKEN_END_RE = r"(?![a-z,.!?])"
+_VALID_STRING = r'"[^"\\]*(?:\\(?:[%s]|u[0-7]{%d})[^"\\]*)*"' % (re.escape("".join(ESCAPE_CHARS)), NUM_OCTAL_DIGITS_FOR_CODE_POINT)
+_VALID_FIELD = r'[ \t\v\r\n]*%s[ \t\v\r\n]*is%s' % (_VALID_STRING, _TOKEN_END_RE)
+# A value; the last group matched tells which: 1 scalar, 2 'such', 3 'so', 4 'many'
+VALID_VALUE_RE = re.compile(r'[ \t\v\r\n]*(?:(%s|-?[0-7]+(?:\.[0-7]+)?(?:(?i:very)-?[0-7]+)?(?![-0-9.veryVERY])|(?:%s)%s)|(such)%s|(so)%s|(many)%s)'
+                            % (_VALID_STRING, "|".join(CONSTANTS), _TOKEN_END_RE, _TOKEN_END_RE, _TOKEN_END_RE, _TOKEN_END_RE))
+# After 'such': 'wow' (group 1) or the first field
+VALID_OBJECT_START_RE = re.compile(r"[ \t\v\r\n]*(wow)%s|%s" % (_TOKEN_END_RE, _VALID_FIELD))
+# After an object value: a separator and the next field, or 'wow' (group 1)
+VALID_OBJECT_NEXT_RE = re.compile(r"[ \t\v\r\n]*(?:[,.!?]%s%s|(wow)%s)" % (_TOKEN_END_RE, _VALID_FIELD, _TOKEN_END_RE))
+# After an array element: 'and' or 'also', or 'many' (group 1)
+VALID_ARRAY_NEXT_RE = re.compile(r"[ \t\v\r\n]*(?:(?:and|also)%s|(many)%s)" % (_TOKEN_END_RE, _TOKEN_END_RE))
+
+## Patterns for NumericArrays: an array of numbers only, from after its 'so'
+## to the end of its 'many', the numbers in it, and a sign of floats among them.
+_NUMBER_TEXT = r"-?[0-7][-0-9.veryVERY]*"
+NUMERIC_ARRAY_RE = re.compile(r"(?:[ \t\v\r\n]*%s[ \t\v\r\n]*(?:and|also)%s)*[ \t\v\r\n]*%s[ \t\v\r\n]*many%s"
+                              % (_NUMBER_TEXT, _TOKEN_END_RE, _NUMBER_TEXT, _TOKEN_END_RE))
+NUMBER_TEXT_RE = re.compile(_NUMBER_TEXT)
+FLOAT_MARK_RE = re.compile(r"[.vV]")
+
 class ManyParseException(ValueError):
     """
     Such parsing error, many failure, wow
@@ -102,13 +186,20 @@ class VeryUnexpectedEndException(ManyParseException):
     Error raised when document end was found while expecting more data.
     """
 
+class _TooDeep(Exception):
+    """ Raised inside :class:`DescentParser` to leave a document too deep for it. """
+
 class StringStream(object):
     """
     Helper class for viewing an immutable string for parsing.
+
+    ``offset`` is added to reported positions, for strings that are a window
+    into a larger input.
     """
-    def __init__(self, input_string):
+    def __init__(self, input_string, offset=0):
         self._string = input_string
         self._pos = 0
+        self._offset = offset
 
     def peek(self):
         return self._string[self._pos]
@@ -119,9 +210,10 @@ class StringStream(object):
         return char
 
     def pos(self):
-        return self._pos
+        return self._offset + self._pos
 
     def slice(self, from_pos):
+        from_pos -= self._offset
         if from_pos > self._pos:
             raise ValueError("Slice position cannot exceed current position!")
 
@@ -214,11 +306,7 @@ def octal_frac_to_decimal(octal_frac_string):
     Convert the fractional part of an octal number,
     as a string, to the floating-point equivalent.
     """
-    result = 0.0
-    for place, digit in enumerate(octal_frac_string, start=1):
-        result += int(digit) * (8 ** -place)
-
-    return result
+    return int(octal_frac_string, 8) / (1 << 3 * len(octal_frac_string))
 
 def read_number(stream):
     """
@@ -233,42 +321,132 @@ def read_number(stream):
     while not stream.eof() and stream.peek() in NUMBER_CHARS:
         number_chars.append(stream.consume())
 
-    number = "".join(number_chars).lower()
+    return convert_number(stream, "".join(number_chars))
+
+def octal_to_float(negative, digits, places, exponent):
+    """
+    Correctly rounded float of ``digits`` (octal) times ``8 ** (exponent -
+    places)``, negated if ``negative``; ``inf`` if it is too large. Huge
+    exponents cost no more than small ones.
+    """
+    mantissa = int(digits, 8)
+    shift = 3 * (exponent - places) # power of two
+
+    if shift >= 0 or mantissa.bit_length() <= 53:
+        # float(mantissa) is exact (or shift only scales it): one rounding
+        try:
+            result = math.ldexp(float(mantissa), shift)
+        except OverflowError:
+            result = math.inf
+
+    elif mantissa.bit_length() + shift < -1100:
+        result = 0.0 # far below the smallest subnormal
 
-    if not re.match(r"^-?(0|[1-7][0-7]*)(\.[0-7]+|[0-7]*)((very|VERY)(\+|-)?[0-7]+)?", number):
+    else:
+        result = mantissa / (1 << -shift)
+
+    return -result if negative else result
+
+def convert_number(stream, number, parse_int=None, parse_float=None):
+    """
+    Convert the DSON number text just scanned out of stream to an integer
+    or floating-point value.
+
+    If given, ``parse_int`` (for integers) or ``parse_float`` (for numbers
+    with a fraction or ``very`` exponent) is called with the number text
+    instead.
+    """
+    match = NUMBER_RE.match(number)
+    if match is None:
+        if stream.eof() and INCOMPLETE_NUMBER_RE.match(number):
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning number")
         raise ManyParseException(stream, "Invalid number {!r}".format(number))
 
-    negative = False
-    if '-' == number[0]:
-        negative = True
-        number = number[1:] # strip off negative sign
+    sign, int_part, frac_part, exponent = match.groups()
+
+    # Format is [int]
+    if frac_part is None and exponent is None:
+        if parse_int is not None:
+            return parse_int(number)
+
+        return int(number, 8)
 
-    int_part, dot, frac_part = number.partition(".")
+    if parse_float is not None:
+        return parse_float(number)
 
     # Format is [int . frac very exponent]
-    if "." == dot:
-        int_value = int(int_part, 8)
-        frac_part, _, exponent = frac_part.partition("very")
-        frac_value = octal_frac_to_decimal(frac_part)
+    if frac_part is None:
+        frac_part = ""
 
-        # Format is [int . frac], unless very exponent
-        result = (int_value + frac_value)
+    return octal_to_float(sign, int_part + frac_part, len(frac_part), int(exponent or "0", 8))
 
-    else:
-        # Need to further break out int part
-        int_part, _, exponent = int_part.partition("very")
-        # Format is [int], unless very exponent
-        result = int(int_part, 8)
+def octal_number(number):
+    """
+    Integer or float value of DSON number text, like :func:`convert_number`
+    without a stream; raise :exc:`ValueError` if it is not a valid number.
+    """
+    match = NUMBER_RE.match(number)
+    if match is None:
+        raise ValueError("Invalid number {!r}".format(number))
+
+    sign, int_part, frac_part, exponent = match.groups()
+    if frac_part is None and exponent is None:
+        return int(number, 8)
+
+    frac_part = frac_part or ""
+    return octal_to_float(sign, int_part + frac_part, len(frac_part), int(exponent or "0", 8))
+
+MAX_EXACT_EXPONENT = 8 ** 4
+
+def _exact_number(number):
+    """ Split DSON number text into ``(negative, mantissa, exponent)``, the power of 8. """
+    match = NUMBER_RE.match(number)
+    if match is None:
+        raise ValueError("Invalid number {!r}".format(number))
+
+    sign, int_part, frac_part, exponent = match.groups()
+    frac_part = frac_part or ""
+    exponent = int(exponent or "0", 8)
+    if abs(exponent) > MAX_EXACT_EXPONENT:
+        raise ValueError("Such exponent, too big for an exact number: {!r}".format(number))
 
-    # Calculate exponent, if applicable
-    if exponent:
-        result *= (8.0 ** int(exponent, 8))
+    return bool(sign), int(int_part + frac_part, 8), exponent - len(frac_part)
 
-    # Negate, if applicable
+def octal_to_fraction(number):
+    """
+    Exact :class:`fractions.Fraction` value of DSON number text. Pass it as
+    ``parse_float`` to decode fractions and ``very`` exponents losslessly.
+    """
+    negative, mantissa, exponent = _exact_number(number)
     if negative:
-        result = -result
+        mantissa = -mantissa
 
-    return result
+    if exponent >= 0:
+        return Fraction(mantissa << 3 * exponent)
+
+    return Fraction(mantissa, 1 << -3 * exponent)
+
+def octal_to_decimal(number):
+    """
+    Exact :class:`decimal.Decimal` value of DSON number text; every octal
+    fraction has a finite decimal expansion. Pass it as ``parse_float`` to
+    decode fractions and ``very`` exponents losslessly.
+    """
+    negative, mantissa, exponent = _exact_number(number)
+    if exponent >= 0 or 0 == mantissa:
+        digits, exponent = mantissa << 3 * max(exponent, 0), 0
+
+    else:
+        # m / 8**n == m * 125**n / 1000**n
+        digits, exponent = mantissa * 125 ** -exponent, 3 * exponent
+
+    # Drop trailing zeros of the fraction: 1.4 is Decimal("1.5"), not "1.500"
+    digits = str(digits)
+    zeros = min(len(digits) - len(digits.rstrip("0")), -exponent, len(digits) - 1)
+    if zeros:
+        digits, exponent = digits[:-zeros], exponent + zeros
+
+    return Decimal((int(negative), tuple(map(int, digits)), exponent))
 
 def read_value(stream):
     """
@@ -299,7 +477,7 @@ def read_value(stream):
             # It's a token Bob!
             value_type = SUCH_TOKEN
 
-    elif char in "1234567890":
+    elif char in NUMBER_LEADING_CHARS:
         value = read_number(stream)
         value_type = SUCH_NUMBER
 
@@ -308,214 +486,4175 @@ def read_value(stream):
 
     return value, value_type
 
-def loadb(b, encoding="utf-8"):
-    return loads(b.decode(encoding))
+class ReferenceScanner(object):
+    """
+    Scanner built on the character-at-a-time helpers above. Such slow, but
+    very easy to follow; kept so faster scanners can be compared against it.
+    """
+    strip_whitespace = staticmethod(strip_whitespace)
+    read_token = staticmethod(read_token)
+    read_string = staticmethod(read_string)
+    read_number = staticmethod(read_number)
+    read_value = staticmethod(read_value)
 
-def loads(s):
+class RegexScanner(object):
     """
-    Deserialize a str (unicode) instance containing a DSON document to a Python object.
+    Scanner that consumes whole lexemes per match with precompiled regular
+    expressions instead of calling :meth:`StringStream.consume` per character.
 
-    Raises :exc:`ManyParseException` if the document could not be deserialized.
+    Behaves like :class:`ReferenceScanner`, except that running out of input
+    anywhere inside a string always raises :exc:`VeryUnexpectedEndException`.
+
+    ``parse_int``, ``parse_float`` and ``parse_constant`` are the
+    :class:`DSONDecoder` hooks for numbers and ``yes``/``no``/``empty``.
     """
-    stream = StringStream(s)
+    def __init__(self, parse_int=None, parse_float=None, parse_constant=None):
+        if parse_int is None and parse_float is None:
+            self.convert_number = convert_number
+        else:
+            self.convert_number = partial(convert_number, parse_int=parse_int, parse_float=parse_float)
 
-    cur_obj  = None
-    cur_name = None
+        self.parse_constant = parse_constant or CONSTANTS.__getitem__
 
-    state = SO_START
-    object_stack = deque()
+    def strip_whitespace(self, stream):
+        """ Consume leading whitespace in the stream. """
+        stream._pos = WHITESPACE_RE.match(stream._string, stream._pos).end()
 
-    while SO_END != state:
-        if SO_START == state:
-            cur_name = None
+    def read_token(self, stream):
+        """ Read a token from the stream, discarding leading whitespace. """
+        string = stream._string
+        match = TOKEN_RE.match(string, stream._pos)
+        stream._pos = match.end()
+        token = match.group(1)
 
-            val, val_type = read_value(stream)
-            # single value; go directly to end
-            if SUCH_TOKEN != val_type:
-                state = SO_END
-                cur_obj = val
+        if not token and len(string) == stream._pos:
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for token")
 
-            # Start object
-            elif "such" == val:
-                state = SO_NEW_OBJECT
+        return token
 
-            # Start array
-            elif "so" == val:
-                state = SO_NEW_ARRAY
+    def read_string(self, stream):
+        """ Read a DSON string from the stream, discarding leading whitespace. """
+        string = stream._string
 
-            # Invalid token
-            else:
-                raise ManyParseException(stream, "Expected tokens 'such' or 'so', got {!r}!".format(val))
+        # Fast path: no escapes, the whole string is one match.
+        match = SIMPLE_STRING_RE.match(string, stream._pos)
+        if match is not None:
+            stream._pos = match.end()
+            return match.group(1)
 
-        # Create a new object; if an object/array is outstanding, push it on the stack.
-        elif SO_NEW_OBJECT == state:
-            if cur_obj is not None:
-                object_stack.append((cur_obj, cur_name))
+        pos = WHITESPACE_RE.match(string, stream._pos).end()
+        stream._pos = pos
 
-            cur_obj = {}
+        if len(string) == pos:
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for string")
 
-            strip_whitespace(stream)
+        elif QUOTE != string[pos]:
+            raise ManyParseException(stream, "Expected quote character; got {!r} instead.".format(string[pos]))
 
-            if stream.eof():
-                raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for string or 'wow'")
+        parsed_string = []
+        pos += 1
+        while True:
+            end = STRING_RUN_RE.match(string, pos).end()
+            parsed_string.append(string[pos:end])
 
-            # HACK: Peek ahead; if we have a quote, we expect to read the field name next.
-            # Move to that state.
-            # TODO: this could be better if we break apart SO_OBJECT_FIELD_NAME
-            char = stream.peek()
-            if '"' == char:
-                state = SO_OBJECT_FIELD_NAME
-            # If 'w' is next, we hopefully can read 'wow' as the next token.
-            # This ends the current new object.
-            elif 'w' == char:
-                token = read_token(stream)
-                # 'so wow' is an empty object; we're done here!
-                if "wow" == token:
-                    state = SO_DECREMENT_NEST
+            if len(string) == end:
+                stream._pos = end
+                raise VeryUnexpectedEndException(stream, "End of stream while scanning for end quote in string!")
 
-                else:
-                    raise ManyParseException(stream, "Unexpected token {!r} after 'such'; expected 'wow' or string")
+            elif QUOTE == string[end]:
+                stream._pos = end + 1
+                return "".join(parsed_string)
 
-            else:
-                raise ManyParseException(stream, "Unexpected character {!r} after 'such'; "
-                                                 "expected 'wow' or string".format(char))
+            # Such escape; string[end] is the rsolidus
+            char = string[end + 1:end + 2]
+            stream._pos = pos = end + 2
 
-        # Create a new array; if an object/array is outstanding, push it on the stack.
-        elif SO_NEW_ARRAY == state:
-            if cur_obj is not None:
-                object_stack.append((cur_obj, cur_name))
+            if char in ESCAPE_CHARS:
+                parsed_string.append(ESCAPE_CHARS[char])
 
-            state = SO_ARRAY_VALUE
-            cur_obj = []
+            elif 'u' == char:
+                match = OCTAL_CODE_POINT_RE.match(string, pos)
+                digits = match.group() if match is not None else ""
+                pos += len(digits)
+                stream._pos = pos
 
-        # Retrieve a field name for the current object
-        elif SO_OBJECT_FIELD_NAME == state:
-            # "field_name" is <<value>>
-            cur_name = read_string(stream)
-            token = read_token(stream)
+                if NUM_OCTAL_DIGITS_FOR_CODE_POINT != len(digits):
+                    if len(string) == pos:
+                        raise VeryUnexpectedEndException(stream, "End of stream while scanning Unicode code point!")
+                    raise ManyParseException(stream, "Not enough digits for Unicode code point!")
 
-            if "is" == token:
-                state = SO_OBJECT_FIELD_VALUE
+                parsed_string.append(chr(int(digits, 8)))
+
+            elif not char:
+                raise VeryUnexpectedEndException(stream, "End of stream while scanning escape character!")
 
             else:
-                raise ManyParseException(stream, "Expected 'is' after field name, got token {!r}!".format(token))
+                raise ManyParseException(stream, "Invalid escape character {!r}".format(char))
 
-        elif SO_OBJECT_FIELD_VALUE == state:
-            value, value_type = read_value(stream)
-            if SUCH_TOKEN == value_type:
-                if "such" == value:
-                    state = SO_NEW_OBJECT
+    def read_number(self, stream):
+        """
+        Parse a DSON number out of stream. Return an integer or
+        floating-point value depending on the number read from the stream.
+        """
+        string = stream._string
+        pos = stream._pos
 
-                elif "so" == value:
-                    state = SO_NEW_ARRAY
+        if len(string) == pos:
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning number")
 
-                else:
-                    raise ManyParseException(stream,
-                                             "Expected tokens 'such', 'so' while "
-                                             "reading object value, got {!r}".format(value))
+        end = NUMBER_RUN_RE.match(string, pos).end()
+        stream._pos = end
+        return self.convert_number(stream, string[pos:end])
 
-            else:
-                cur_obj[cur_name] = value
-                state = SO_OBJECT_NEXT
+    def read_value(self, stream):
+        """
+        Scan a value out of stream, returning a tuple ``(value, value_type)``.
+        See :func:`read_value`.
+        """
+        match = VALUE_RE.match(stream._string, stream._pos)
+        if match is not None:
+            stream._pos = match.end()
+            index = match.lastindex
 
-        elif SO_ARRAY_VALUE == state:
-            value, value_type = read_value(stream)
+            if 1 == index:
+                return match.group(1), SUCH_STRING
 
+            elif 2 == index:
+                token = match.group(2)
+                if token in CONSTANTS:
+                    return self.parse_constant(token), SUCH_CONST
 
-            if SUCH_TOKEN == value_type:
-                if "such" == value:
-                    state = SO_NEW_OBJECT
+                # It's a token Bob!
+                return token, SUCH_TOKEN
 
-                elif "so" == value:
-                    state = SO_NEW_ARRAY
+            return self.convert_number(stream, match.group(3)), SUCH_NUMBER
 
-                elif "many" == value:
-                    state = SO_DECREMENT_NEST
+        # No simple lexeme matched: EOF, a string with escapes or garbage.
+        self.strip_whitespace(stream)
 
-                else:
-                    raise ManyParseException(stream,
-                                             "Expected tokens 'such', 'so' while "
-                                             "reading object value, got {!r}".format(value))
-            else:
-                cur_obj.append(value)
+        if stream.eof():
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for a value")
 
-                state = SO_ARRAY_NEXT
+        elif QUOTE == stream.peek():
+            return self.read_string(stream), SUCH_STRING
 
-        # Process the next element in the array.
-        # Looking for: {and <<value>>} or {also <<value>>}
-        elif SO_ARRAY_NEXT == state:
-            token = read_token(stream)
+        raise ManyParseException(stream, "Invalid value start character: {!r}".format(stream.peek()))
 
-            # There are more elements, go back to reading
-            # array values
-            if token in ("and", "also"):
-                state = SO_ARRAY_VALUE
+DEFAULT_STRING_CACHE_SIZE = 4096
+DEFAULT_STRING_CACHE_LENGTH = 64
 
-            # End array; decrement nesting, if needed
-            elif "many" == token:
-                state = SO_DECREMENT_NEST
+class StringCache(object):
+    """
+    Bounded LRU cache that makes repeated str values share one object, across
+    any number of parses. Only strings of up to ``max_length`` characters are
+    cached; long strings rarely repeat.
+    """
+    def __init__(self, max_size=DEFAULT_STRING_CACHE_SIZE, max_length=DEFAULT_STRING_CACHE_LENGTH):
+        self.max_size = max_size
+        self.max_length = max_length
+        self._strings = OrderedDict()
 
-            else:
-                raise ManyParseException(stream, "Expected 'and', 'also', or 'many', got {!r}".format(token))
+    def __call__(self, s):
+        """ :return: The cached str equal to s, or s itself """
+        strings = self._strings
+        cached = strings.get(s)
+        if cached is not None:
+            strings.move_to_end(s)
+            return cached
 
-        # Processing object fields;
-        elif SO_OBJECT_NEXT == state:
-            token = read_token(stream)
-            if token in (",", ".", "!", "?"):
-                state = SO_OBJECT_FIELD_NAME
+        if len(s) <= self.max_length:
+            strings[s] = s
+            if len(strings) > self.max_size:
+                strings.popitem(last=False)
 
-            elif "wow" == token:
-                state = SO_DECREMENT_NEST
+        return s
 
-            else:
-                raise ManyParseException(stream, "Expected [,.!?] or 'wow'; got {!r}".format(token))
-
-        # Decrement object/array nesting:
-        #  (1) pop container object and field name, or array (name=None)
-        #  (2) If array, append child object/array and continue with array
-        #  (3) If object, assign child object/array with saved field name
-        #      and continue with object
-        #  (4) Make the current object the saved object.
-        # If we ran out of objects, this is the end of the line!
-        elif SO_DECREMENT_NEST == state:
+    def __len__(self):
+        return len(self._strings)
+
+    def clear(self):
+        self._strings.clear()
+
+class CachingRegexScanner(RegexScanner):
+    """
+    :class:`RegexScanner` passing every string it reads through a
+    :class:`StringCache`.
+    """
+    def __init__(self, string_cache, parse_int=None, parse_float=None, parse_constant=None):
+        RegexScanner.__init__(self, parse_int, parse_float, parse_constant)
+        self.string_cache = string_cache
+
+    def read_string(self, stream):
+        return self.string_cache(RegexScanner.read_string(self, stream))
+
+    def read_value(self, stream):
+        value, value_type = RegexScanner.read_value(self, stream)
+        if SUCH_STRING == value_type:
+            value = self.string_cache(value)
+
+        return value, value_type
+
+SCANNERS = {
+    "reference": ReferenceScanner(),
+    "regex": RegexScanner()
+}
+
+DEFAULT_SCANNER = "regex"
+
+def get_scanner(scanner=None):
+    """
+    Look up a scanner by name in :data:`SCANNERS`. Scanner objects are
+    returned unchanged; ``None`` selects :data:`DEFAULT_SCANNER`.
+    """
+    if scanner is None:
+        scanner = DEFAULT_SCANNER
+
+    if isinstance(scanner, str):
+        try:
+            return SCANNERS[scanner]
+
+        except KeyError:
+            raise ValueError("Such unknown scanner {!r}".format(scanner))
+
+    return scanner
+
+READERS = ("strip_whitespace", "read_token", "read_string", "read_number", "read_value")
+STATS_READERS = READERS + ("convert_number",)
+
+class ParseStats(object):
+    """
+    Where a :class:`DocumentParser` spends its effort, accumulated over
+    every document parsed with it:
+
+    * ``transitions[state]``: steps run in each ``SO_*`` state (see
+      :meth:`state_counts` for them by name);
+    * ``calls[reader]`` and ``consumed[reader]``: calls of each scanner
+      reader and characters it consumed, leading whitespace included. The
+      readers call each other; ``convert_number`` counts the conversion of
+      every number, whichever reader scanned it;
+    * ``seconds[reader]``: time spent in each reader, if ``timing`` is set;
+    * ``max_depth``: deepest nesting of objects and arrays;
+    * ``documents``: documents parsed.
+
+    Parsers without stats run without any of this bookkeeping.
+    """
+    def __init__(self, timing=False):
+        self.timing = timing
+        self.transitions = [0] * len(_STATE_NAME_MAP)
+        self.calls = dict.fromkeys(STATS_READERS, 0)
+        self.consumed = dict.fromkeys(STATS_READERS, 0)
+        self.seconds = dict.fromkeys(STATS_READERS, 0.0)
+        self.max_depth = 0
+        self.documents = 0
+
+    def state_counts(self):
+        """ :return: Dict of steps run per state name """
+        return dict((get_state_name(state), count) for state, count in enumerate(self.transitions))
+
+    def report(self):
+        """ :return: The statistics as a printable table """
+        lines = ["documents: {}, max depth: {}".format(self.documents, self.max_depth)]
+        for state, count in enumerate(self.transitions):
+            lines.append("{:>20} {:10}".format(get_state_name(state), count))
+
+        for reader in STATS_READERS:
+            line = "{:>20} {:10} calls {:12} chars".format(reader, self.calls[reader], self.consumed[reader])
+            if self.timing:
+                line += " {:10.6f} s".format(self.seconds[reader])
+            lines.append(line)
+
+        return "\n".join(lines)
+
+class InstrumentedScanner(object):
+    """
+    Wraps a scanner, counting calls and consumed characters of each reader
+    (and timing them if ``stats.timing`` is set) in a :class:`ParseStats`.
+    """
+    def __init__(self, scanner, stats):
+        scanner = get_scanner(scanner)
+        self.stats = stats
+
+        # Number conversion happens inside the readers; count it on a copy
+        # of the scanner, the original may be shared.
+        if hasattr(scanner, "convert_number"):
+            scanner = copy.copy(scanner)
+            scanner.convert_number = self._instrument_convert(scanner.convert_number)
+
+        self.scanner = scanner
+        for reader in READERS:
+            setattr(self, reader, self._instrument(reader, getattr(scanner, reader)))
+
+    def _instrument(self, reader, read):
+        calls = self.stats.calls
+        consumed = self.stats.consumed
+        seconds = self.stats.seconds
+        clock = time.perf_counter if self.stats.timing else None
+
+        def instrumented(stream):
+            pos = stream._pos
+            start = clock() if clock is not None else 0.0
             try:
-                obj, cur_name = object_stack.pop()
-                if cur_name:
-                    obj[cur_name] = cur_obj
-                    state = SO_OBJECT_NEXT
-                else:
-                    obj.append(cur_obj)
-                    state = SO_ARRAY_NEXT
+                return read(stream)
 
-                cur_obj = obj
+            finally:
+                if clock is not None:
+                    seconds[reader] += clock() - start
+                calls[reader] += 1
+                consumed[reader] += stream._pos - pos
 
-            except IndexError:
-                state = SO_END
+        return instrumented
 
-    # No more data should remain!
-    strip_whitespace(stream)
-    if not stream.eof():
-        raise ManyParseException(stream, "Extra data after complete DSON document: {!r}".format(stream.remainder()))
+    def _instrument_convert(self, convert):
+        stats = self.stats
+        clock = time.perf_counter if stats.timing else None
+
+        def instrumented(stream, number):
+            start = clock() if clock is not None else 0.0
+            try:
+                return convert(stream, number)
+
+            finally:
+                if clock is not None:
+                    stats.seconds["convert_number"] += clock() - start
+                stats.calls["convert_number"] += 1
+                stats.consumed["convert_number"] += len(number)
+
+        return instrumented
+
+    def __getattr__(self, name):
+        # convert_number, parse_constant, string_cache...
+        return getattr(self.scanner, name)
+
+MAX_MEMO_SIZE = 10000
+
+class _PairsList(list):
+    """
+    List of ``(name, value)`` pairs for ``object_pairs_hook``, filled in by
+    the state machine exactly like a dict.
+    """
+    def __setitem__(self, name, value):
+        self.append((name, value))
+
+class NumericArrays(object):
+    """
+    ``array_hook`` storing arrays of numbers compactly, 8 bytes per element:
+    as ``array("q")`` if they hold integers only, or ``array("d")`` if
+    there are floats among them (the integers are converted too). With
+    ``backend="numpy"`` (the default if NumPy is installed), they become
+    int64 or float64 NumPy arrays instead. Empty arrays, arrays holding
+    anything else and integers too big for 64 bits stay lists.
+
+    The parse engines hand it arrays of numbers straight from the document
+    (see :meth:`read_array`), so their elements are converted in one batch
+    and never stored in a list.
+    """
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = "python" if numpy is None else "numpy"
+
+        if "numpy" == backend and numpy is None:
+            raise ImportError("Such NumericArrays backend needs NumPy")
 
-    return cur_obj
+        elif backend not in ("numpy", "python"):
+            raise ValueError("Such unknown backend {!r}".format(backend))
 
-def main():
-    import sys
-    import pprint
+        self.backend = backend
 
-    line = sys.stdin.readline()
-    while "" != line:
+    def __call__(self, values):
+        """ :return: The compact array of a list of numbers; other lists as they are """
+        if not values:
+            return values
+
+        floats = False
+        for value in values:
+            value_type = type(value)
+            if float is value_type:
+                floats = True
+            elif int is not value_type:
+                return values
+
+        return self.pack(values, floats, len(values)) or values
+
+    def pack(self, numbers, floats, count):
+        """
+        :return: The compact array of ``count`` numbers from an iterable,
+                 or None if they do not fit
+        """
         try:
-            pprint.pprint(loads(line))
+            if "numpy" == self.backend:
+                return numpy.fromiter(numbers, numpy.float64 if floats else numpy.int64, count)
 
-        except ManyParseException as err:
-            print(err)
+            return array("d" if floats else "q", numbers)
 
-        line = sys.stdin.readline()
+        except OverflowError:
+            return None
 
-if __name__ == "__main__":
+    def read_array(self, string, pos, syntax):
+        """
+        :return: ``(array, end)`` for an array of valid numbers in string
+                 from ``pos``, right after its ``so``, to ``end``, right
+                 after its ``many``; None for any other array. ``syntax``
+                 is the :class:`_Syntax` of string.
+        """
+        match = syntax.numeric_array_match(string, pos)
+        if match is None:
+            return None
+
+        end = match.end()
+        texts = syntax.number_findall(string, pos, end)
+        floats = syntax.float_mark_search(string, pos, end) is not None
+        if floats and not isinstance(string, str):
+            texts = [str(text, "ascii") for text in texts]
+
+        def numbers():
+            # int() takes integer texts as they are, str or bytes
+            return map(octal_number, texts) if floats else map(int, texts, repeat(8))
+
+        try:
+            packed = self.pack(numbers(), floats, len(texts))
+            if packed is None:
+                packed = list(numbers()) # too big for 64 bits
+
+        except ValueError:
+            return None # an invalid number, for the engine to report
+
+        return packed, end
+
+class DocumentParser(object):
+    """
+    The ``loads`` state machine, kept resumable: each step only changes the
+    parser state once all of its lexemes have been read, so a step that runs
+    out of input can simply be retried when more data is available.
+
+    ``object_hook``, ``object_pairs_hook`` and ``array_hook`` are the
+    :class:`DSONDecoder` hooks, applied as soon as an object or array is
+    complete. If ``stats`` is a :class:`ParseStats`, the parser records its
+    work there.
+    """
+    def __init__(self, scanner=None, object_hook=None, object_pairs_hook=None, stats=None, array_hook=None):
+        self.scanner = get_scanner(scanner)
+        self.stats = stats
+        if stats is not None:
+            self.scanner = InstrumentedScanner(self.scanner, stats)
+        self.finish_array = array_hook
+
+        # new_object() creates objects (None: a plain dict), finish_object()
+        # is applied to completed ones (None: nothing to do).
+        if object_pairs_hook is not None:
+            self.new_object = _PairsList
+            self.finish_object = object_pairs_hook
+        else:
+            self.new_object = None
+            self.finish_object = object_hook
+
+        self.memo = {}
+        self.reset()
+
+    def reset(self):
+        """ Forget any partially parsed document and start over. """
+        self.state = SO_START
+        self.cur_obj = None
+        self.cur_name = None
+        self.object_stack = deque()
+
+        # Field names stay memoized across documents parsed by the same
+        # parser (iter_load, incremental decoding), within limits.
+        if len(self.memo) > MAX_MEMO_SIZE:
+            self.memo.clear()
+
+    def parse(self, stream):
+        """
+        Run the state machine over stream until a complete document has been
+        read, and return it. Data after the document is left in the stream.
+
+        If the stream runs out first, :exc:`VeryUnexpectedEndException` is
+        raised with the parser state and the stream position rewound to the
+        start of the failing step; call :meth:`parse` again with a stream
+        holding the remaining data plus more input to pick up from there.
+        """
+        # Bind the scanner's readers once; they are called for every lexeme.
+        scanner = self.scanner
+        strip_whitespace = scanner.strip_whitespace
+        read_token = scanner.read_token
+        read_string = scanner.read_string
+        read_value = scanner.read_value
+
+        new_object = self.new_object
+        finish_object = self.finish_object
+        finish_array = self.finish_array
+        memo_setdefault = self.memo.setdefault
+
+        # Arrays of numbers can be read in one go for NumericArrays, unless
+        # numbers are converted by hooks
+        read_numbers = getattr(finish_array, "read_array", None)
+        if getattr(scanner, "convert_number", None) is not convert_number:
+            read_numbers = None
+
+        stats = self.stats
+        transitions = stats.transitions if stats is not None else None
+
+        state = self.state
+        cur_obj = self.cur_obj
+        cur_name = self.cur_name
+        object_stack = self.object_stack
+        step_pos = stream._pos
+
+        try:
+            while SO_END != state:
+                step_pos = stream._pos
+                if transitions is not None:
+                    transitions[state] += 1
+
+                if SO_START == state:
+                    cur_name = None
+
+                    val, val_type = read_value(stream)
+                    # single value; go directly to end
+                    if SUCH_TOKEN != val_type:
+                        state = SO_END
+                        cur_obj = val
+
+                    # Start object
+                    elif "such" == val:
+                        state = SO_NEW_OBJECT
+
+                    # Start array
+                    elif "so" == val:
+                        state = SO_NEW_ARRAY
+
+                    # Invalid token
+                    else:
+                        raise ManyParseException(stream, "Expected tokens 'such' or 'so', got {!r}!".format(val))
+
+                # Create a new object; if an object/array is outstanding, push it on the stack.
+                elif SO_NEW_OBJECT == state:
+                    strip_whitespace(stream)
+
+                    if stream.eof():
+                        raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for string or 'wow'")
+
+                    # HACK: Peek ahead; if we have a quote, we expect to read the field name next.
+                    # Move to that state.
+                    # TODO: this could be better if we break apart SO_OBJECT_FIELD_NAME
+                    char = stream.peek()
+                    if '"' == char:
+                        next_state = SO_OBJECT_FIELD_NAME
+                    # If 'w' is next, we hopefully can read 'wow' as the next token.
+                    # This ends the current new object.
+                    elif 'w' == char:
+                        token = read_token(stream)
+                        # 'so wow' is an empty object; we're done here!
+                        if "wow" == token:
+                            next_state = SO_DECREMENT_NEST
+
+                        else:
+                            raise ManyParseException(stream, "Unexpected token {!r} after 'such'; expected 'wow' or string".format(token))
+
+                    else:
+                        raise ManyParseException(stream, "Unexpected character {!r} after 'such'; "
+                                                         "expected 'wow' or string".format(char))
+
+                    if cur_obj is not None:
+                        object_stack.append((cur_obj, cur_name))
+
+                    cur_obj = {} if new_object is None else new_object()
+                    state = next_state
+
+                    if stats is not None and len(object_stack) >= stats.max_depth:
+                        stats.max_depth = len(object_stack) + 1
+
+                    if SO_DECREMENT_NEST == state and finish_object is not None:
+                        cur_obj = finish_object(cur_obj)
+
+                # Create a new array; if an object/array is outstanding, push it on the stack.
+                elif SO_NEW_ARRAY == state:
+                    if cur_obj is not None:
+                        object_stack.append((cur_obj, cur_name))
+
+                    state = SO_ARRAY_VALUE
+                    cur_obj = []
+                    cur_name = None # array elements have no field name
+
+                    if stats is not None and len(object_stack) >= stats.max_depth:
+                        stats.max_depth = len(object_stack) + 1
+
+                    if read_numbers is not None:
+                        numbers = read_numbers(stream._string, stream._pos, TEXT_SYNTAX)
+                        if numbers is not None:
+                            cur_obj, stream._pos = numbers
+                            state = SO_DECREMENT_NEST
+
+                # Retrieve a field name for the current object
+                elif SO_OBJECT_FIELD_NAME == state:
+                    # "field_name" is <<value>>
+                    name = read_string(stream)
+                    token = read_token(stream)
+
+                    if "is" == token:
+                        # Share one str per distinct field name
+                        cur_name = memo_setdefault(name, name)
+                        state = SO_OBJECT_FIELD_VALUE
+
+                    else:
+                        raise ManyParseException(stream, "Expected 'is' after field name, got token {!r}!".format(token))
+
+                elif SO_OBJECT_FIELD_VALUE == state:
+                    value, value_type = read_value(stream)
+                    if SUCH_TOKEN == value_type:
+                        if "such" == value:
+                            state = SO_NEW_OBJECT
+
+                        elif "so" == value:
+                            state = SO_NEW_ARRAY
+
+                        else:
+                            raise ManyParseException(stream,
+                                                     "Expected tokens 'such', 'so' while "
+                                                     "reading object value, got {!r}".format(value))
+
+                    else:
+                        cur_obj[cur_name] = value
+                        state = SO_OBJECT_NEXT
+
+                elif SO_ARRAY_VALUE == state:
+                    value, value_type = read_value(stream)
+
+                    if SUCH_TOKEN == value_type:
+                        if "such" == value:
+                            state = SO_NEW_OBJECT
+
+                        elif "so" == value:
+                            state = SO_NEW_ARRAY
+
+                        elif "many" == value:
+                            state = SO_DECREMENT_NEST
+
+                            if finish_array is not None:
+                                cur_obj = finish_array(cur_obj)
+
+                        else:
+                            raise ManyParseException(stream,
+                                                     "Expected tokens 'such', 'so' while "
+                                                     "reading object value, got {!r}".format(value))
+                    else:
+                        cur_obj.append(value)
+
+                        state = SO_ARRAY_NEXT
+
+                # Process the next element in the array.
+                # Looking for: {and <<value>>} or {also <<value>>}
+                elif SO_ARRAY_NEXT == state:
+                    token = read_token(stream)
+
+                    # There are more elements, go back to reading
+                    # array values
+                    if token in ("and", "also"):
+                        state = SO_ARRAY_VALUE
+
+                    # End array; decrement nesting, if needed
+                    elif "many" == token:
+                        state = SO_DECREMENT_NEST
+
+                        if finish_array is not None:
+                            cur_obj = finish_array(cur_obj)
+
+                    else:
+                        raise ManyParseException(stream, "Expected 'and', 'also', or 'many', got {!r}".format(token))
+
+                # Processing object fields;
+                elif SO_OBJECT_NEXT == state:
+                    token = read_token(stream)
+                    if token in (",", ".", "!", "?"):
+                        state = SO_OBJECT_FIELD_NAME
+
+                    elif "wow" == token:
+                        state = SO_DECREMENT_NEST
+
+                        if finish_object is not None:
+                            cur_obj = finish_object(cur_obj)
+
+                    else:
+                        raise ManyParseException(stream, "Expected [,.!?] or 'wow'; got {!r}".format(token))
+
+                # Decrement object/array nesting:
+                #  (1) pop container object and field name, or array (name=None)
+                #  (2) If array, append child object/array and continue with array
+                #  (3) If object, assign child object/array with saved field name
+                #      and continue with object
+                #  (4) Make the current object the saved object.
+                # If we ran out of objects, this is the end of the line!
+                elif SO_DECREMENT_NEST == state:
+                    try:
+                        obj, cur_name = object_stack.pop()
+                        if cur_name is not None:
+                            obj[cur_name] = cur_obj
+                            state = SO_OBJECT_NEXT
+                        else:
+                            obj.append(cur_obj)
+                            state = SO_ARRAY_NEXT
+
+                        cur_obj = obj
+
+                    except IndexError:
+                        state = SO_END
+
+        except VeryUnexpectedEndException:
+            self.state = state
+            self.cur_obj = cur_obj
+            self.cur_name = cur_name
+            stream._pos = step_pos
+            raise
+
+        self.state = state
+        self.cur_obj = cur_obj
+        self.cur_name = cur_name
+        if stats is not None:
+            stats.documents += 1
+
+        return cur_obj
+
+DEFAULT_MAX_DEPTH = 500
+OBJECT_SEPARATORS = frozenset((",", ".", "!", "?"))
+
+# Encodings in which every DSON syntax character is its ASCII byte and
+# never part of a multi-byte character, so bytes can be parsed as they are.
+ASCII_COMPATIBLE_ENCODINGS = frozenset(("utf-8", "ascii", "iso8859-1", "cp1252"))
+
+def is_ascii_compatible(encoding):
+    """ :return: True if DSON in ``encoding`` can be scanned without decoding it first """
     try:
-        main()
+        return codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS
 
-    except KeyboardInterrupt:
-        pass
\ No newline at end of file
+    except LookupError:
+        return False
+
+class _Syntax(object):
+    """
+    The patterns and literals :class:`DescentParser` matches, either as str
+    or (``encode`` set) as bytes, where indexing gives ints instead of chars.
+    """
+    def __init__(self, encode=None):
+        literal = (lambda text: text) if encode is None else encode
+        self.char = (lambda text: text) if encode is None else ord
+        self.show = (lambda char: char) if encode is None else chr
+        self.show_token = (lambda token: token) if encode is None else (lambda token: token.decode("ascii"))
+
+        self.value_match = re.compile(literal(VALUE_RE.pattern)).match
+        self.token_match = re.compile(literal(TOKEN_RE.pattern)).match
+        self.string_match = re.compile(literal(SIMPLE_STRING_RE.pattern)).match
+        self.whitespace_match = re.compile(literal(WHITESPACE_RE.pattern)).match
+        self.string_run_match = re.compile(literal(STRING_RUN_RE.pattern)).match
+        self.code_point_match = re.compile(literal(OCTAL_CODE_POINT_RE.pattern)).match
+        self.skip_match = re.compile(literal(SKIP_RE.pattern)).match
+        self.nesting_match = re.compile(literal(NESTING_RE.pattern)).match
+        self.any_string_match = re.compile(literal(ANY_STRING_RE.pattern)).match
+        self.valid_escapes_match = re.compile(literal(VALID_ESCAPES_RE.pattern)).match
+        self.valid_value_match = re.compile(literal(VALID_VALUE_RE.pattern)).match
+        self.valid_object_start_match = re.compile(literal(VALID_OBJECT_START_RE.pattern)).match
+        self.valid_object_next_match = re.compile(literal(VALID_OBJECT_NEXT_RE.pattern)).match
+        self.valid_array_next_match = re.compile(literal(VALID_ARRAY_NEXT_RE.pattern)).match
+        self.numeric_array_match = re.compile(literal(NUMERIC_ARRAY_RE.pattern)).match
+        self.number_findall = re.compile(literal(NUMBER_TEXT_RE.pattern)).findall
+        self.float_mark_search = re.compile(literal(FLOAT_MARK_RE.pattern)).search
+
+        self.escapes = dict((literal(char), value) for char, value in ESCAPE_CHARS.items())
+        self.constants = dict((literal(name), name) for name in CONSTANTS)
+        self.separators = frozenset(map(literal, OBJECT_SEPARATORS))
+        self.keywords = tuple(map(literal, ("such", "so", "many", "wow", "is", "and", "also")))
+
+TEXT_SYNTAX = _Syntax()
+BYTES_SYNTAX = _Syntax(lambda text: text.encode("ascii"))
+
+def _bytes_char(data, pos, encoding):
+    """ :return: The character starting at ``pos`` of bytes ``data``, for error messages. """
+    return str(bytes(data[pos:pos + 4]), encoding, "replace")[:1]
+
+def read_bytes_string(stream, encoding="utf-8"):
+    """
+    Read a DSON string from a stream over bytes in an ASCII-compatible
+    ``encoding``, discarding leading whitespace; only the string's own
+    bytes are decoded.
+    """
+    syntax = BYTES_SYNTAX
+    string = stream._string
+    pos = syntax.whitespace_match(string, stream._pos).end()
+    stream._pos = pos
+
+    if len(string) == pos:
+        raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for string")
+
+    elif ord(QUOTE) != string[pos]:
+        raise ManyParseException(stream, "Expected quote character; got {!r} instead.".format(_bytes_char(string, pos, encoding)))
+
+    parsed_string = []
+    pos += 1
+    while True:
+        end = syntax.string_run_match(string, pos).end()
+        parsed_string.append(str(string[pos:end], encoding))
+
+        if len(string) == end:
+            stream._pos = end
+            raise VeryUnexpectedEndException(stream, "End of stream while scanning for end quote in string!")
+
+        elif ord(QUOTE) == string[end]:
+            stream._pos = end + 1
+            return "".join(parsed_string)
+
+        # Such escape; string[end] is the rsolidus
+        char = bytes(string[end + 1:end + 2])
+        stream._pos = pos = end + 2
+
+        if char in syntax.escapes:
+            parsed_string.append(syntax.escapes[char])
+
+        elif b"u" == char:
+            match = syntax.code_point_match(string, pos)
+            digits = match.group() if match is not None else b""
+            pos += len(digits)
+            stream._pos = pos
+
+            if NUM_OCTAL_DIGITS_FOR_CODE_POINT != len(digits):
+                if len(string) == pos:
+                    raise VeryUnexpectedEndException(stream, "End of stream while scanning Unicode code point!")
+                raise ManyParseException(stream, "Not enough digits for Unicode code point!")
+
+            parsed_string.append(chr(int(digits, 8)))
+
+        elif not char:
+            raise VeryUnexpectedEndException(stream, "End of stream while scanning escape character!")
+
+        else:
+            raise ManyParseException(stream, "Invalid escape character {!r}".format(char.decode("latin-1")))
+
+def _unescape_sequence(match):
+    digits = match.group(1)
+    return chr(int(digits, 8)) if digits is not None else ESCAPE_CHARS[match.group(2)]
+
+def read_sliced_string(stream, encoding="utf-8", index=None):
+    """
+    Like :func:`read_bytes_string`, but the closing quote is looked up first
+    (in ``index``, a :class:`StructuralIndex`, or with one regular
+    expression match), so the string's bytes are sliced, decoded and
+    unescaped in one piece each instead of run by run. Strings that are
+    unterminated or have invalid escapes are left to
+    :func:`read_bytes_string` for its error.
+    """
+    syntax = BYTES_SYNTAX
+    string = stream._string
+    pos = syntax.whitespace_match(string, stream._pos).end()
+
+    if index is not None:
+        end = index.string_end(pos)
+    else:
+        match = syntax.any_string_match(string, pos)
+        end = match.end() - 1 if match is not None else None
+
+    if end is None:
+        return read_bytes_string(stream, encoding)
+
+    body = string[pos + 1:end]
+    if syntax.valid_escapes_match(body) is None:
+        return read_bytes_string(stream, encoding)
+
+    stream._pos = end + 1
+    return ESCAPE_SEQUENCE_RE.sub(_unescape_sequence, str(body, encoding))
+
+class StructuralIndex(object):
+    """
+    Positions of the string delimiters in a bytes-like DSON document, found
+    in one pass over all of it up front (like stage 1 of simdjson) so that
+    parsers can jump straight to the end of a string: see
+    :func:`read_sliced_string`.
+
+    A quote is escaped if it follows an odd run of backslashes; the other
+    quotes open and close strings in turn. With NumPy installed, the
+    backslash runs, escaped characters and quotes are found with vectorized
+    array operations; otherwise (or with ``backend="python"``) with a
+    regular expression.
+
+    ``quotes`` holds the positions of the unescaped quotes and ``escaped``
+    those of the characters escaped by a backslash, in ascending order, as
+    arrays of ``"q"``.
+    """
+    def __init__(self, data, backend=None):
+        if backend is None:
+            backend = "python" if numpy is None else "numpy"
+
+        self.quotes = array("q")
+        self.escaped = array("q")
+        if "numpy" == backend:
+            if numpy is None:
+                raise ImportError("Such StructuralIndex backend needs NumPy")
+
+            quotes, escaped = self._numpy_positions(data)
+            self.quotes.frombytes(quotes.astype(numpy.int64).tobytes())
+            self.escaped.frombytes(escaped.astype(numpy.int64).tobytes())
+
+        elif "python" == backend:
+            for match in re.finditer(br'\\(.)|"', data, re.DOTALL):
+                if match.start(1) < 0:
+                    self.quotes.append(match.start())
+                else:
+                    self.escaped.append(match.start(1))
+
+        else:
+            raise ValueError("Such unknown backend {!r}".format(backend))
+
+        self.backend = backend
+        self._next = 0 # Strings are mostly looked up in order: the next opening quote
+
+    @staticmethod
+    def _numpy_positions(data):
+        chars = numpy.frombuffer(data, dtype=numpy.uint8)
+        backslashes = numpy.flatnonzero(chars == ord(RSOLIDUS))
+
+        # Number each backslash by its place in its run: the 1st, 3rd...
+        # backslash of a run escapes the next character.
+        run_starts = numpy.ones(len(backslashes), dtype=bool)
+        run_starts[1:] = backslashes[1:] != backslashes[:-1] + 1
+        first_of_run = backslashes[run_starts][numpy.cumsum(run_starts) - 1]
+        escaped = backslashes[(backslashes - first_of_run) % 2 == 0] + 1
+        escaped = escaped[escaped < len(chars)]
+
+        quotes = numpy.flatnonzero(chars == ord(QUOTE))
+        return quotes[~numpy.isin(quotes, escaped, assume_unique=True)], escaped
+
+    def __len__(self):
+        """ :return: The number of complete strings """
+        return len(self.quotes) // 2
+
+    def string_end(self, pos):
+        """
+        :return: The position of the quote closing the string opened by the
+                 quote at ``pos``, or None if no string starts at ``pos`` or
+                 it is unterminated
+        """
+        quotes = self.quotes
+        count = len(quotes)
+        i = self._next
+        if i < count and quotes[i] > pos:
+            i = bisect_left(quotes, pos)
+        else:
+            # Step over the strings since the last one looked up
+            while i < count and quotes[i] < pos:
+                i += 2
+
+        if i % 2 or i + 1 >= count or quotes[i] != pos:
+            return None
+
+        self._next = i + 2
+        return quotes[i + 1]
+
+    def in_string(self, pos):
+        """ :return: True if ``pos`` is inside a string, between its quotes """
+        return bisect_left(self.quotes, pos) % 2 == 1
+
+def read_bytes_token(stream):
+    """ Read a token from a stream over bytes, discarding leading whitespace. """
+    string = stream._string
+    match = BYTES_SYNTAX.token_match(string, stream._pos)
+    stream._pos = match.end()
+    token = match.group(1)
+
+    if not token and len(string) == stream._pos:
+        raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for token")
+
+    return token.decode("ascii")
+
+class DescentParser(object):
+    """
+    Recursive-descent alternative to the :class:`DocumentParser` state
+    machine, with the same interface and results. Values are matched inline
+    in the object and array loops, so there is no per-value state dispatch,
+    ``(value, value_type)`` tuple or repeated token comparison, and each
+    nesting level costs one Python frame. Documents nested deeper than
+    ``max_depth`` are rejected with :exc:`ManyParseException`, or with
+    ``deep=True`` parsed by a :class:`DocumentParser` instead (error
+    positions within them are then character offsets from their start).
+
+    Lexemes are matched with the :class:`RegexScanner` expressions
+    directly; the scanner is only used for strings with escapes and for its
+    number and constant hooks. It is not resumable: if the stream runs out,
+    the whole document is parsed again by the next :meth:`parse` call.
+
+    The stream may also be over a bytes-like object (``bytes``,
+    ``bytearray``, a ``memoryview`` of bytes, ``mmap``) in an
+    ASCII-compatible ``encoding``: it is scanned as it is, and only string
+    contents are decoded. Positions are then byte offsets.
+    """
+    def __init__(self, scanner=None, object_hook=None, object_pairs_hook=None,
+                 max_depth=DEFAULT_MAX_DEPTH, encoding="utf-8", array_hook=None, deep=False):
+        self.scanner = get_scanner(scanner)
+        self.max_depth = max_depth
+        self.encoding = encoding
+        self.finish_array = array_hook
+        self.deep = deep
+        self._hooks = (object_hook, object_pairs_hook, array_hook)
+        self._deep_parser = None
+
+        if object_pairs_hook is not None:
+            self.new_object = _PairsList
+            self.finish_object = object_pairs_hook
+        else:
+            self.new_object = None
+            self.finish_object = object_hook
+
+        self.memo = {}
+
+    def reset(self):
+        """ Nothing to forget between documents, except a huge memo. """
+        if len(self.memo) > MAX_MEMO_SIZE:
+            self.memo.clear()
+
+    def parse(self, stream, index=None):
+        """
+        Parse one document out of stream and return it. Data after the
+        document is left in the stream. If the stream runs out first,
+        :exc:`VeryUnexpectedEndException` is raised with the stream rewound
+        to the start of the document.
+
+        For a stream over bytes, ``index`` may be the
+        :class:`StructuralIndex` of its data.
+        """
+        scanner = self.scanner
+        convert = getattr(scanner, "convert_number", convert_number)
+        parse_constant = getattr(scanner, "parse_constant", CONSTANTS.__getitem__)
+        string_cache = getattr(scanner, "string_cache", None)
+        new_object = self.new_object
+        finish_object = self.finish_object
+        finish_array = self.finish_array
+        read_numbers = getattr(finish_array, "read_array", None) if convert is convert_number else None
+        memo_setdefault = self.memo.setdefault
+        max_depth = self.max_depth
+
+        string = stream._string
+        if isinstance(string, str):
+            syntax = TEXT_SYNTAX
+            encoding = None
+            read_string = scanner.read_string
+        else:
+            syntax = BYTES_SYNTAX
+            encoding = self.encoding
+            string_index = index
+
+            def read_string(stream):
+                value = read_sliced_string(stream, encoding, string_index)
+                return value if string_cache is None else string_cache(value)
+
+        value_match = syntax.value_match
+        token_match = syntax.token_match
+        string_match = syntax.string_match
+        whitespace_match = syntax.whitespace_match
+        constants = syntax.constants
+        separators = syntax.separators
+        SUCH, SO, MANY, WOW, IS, AND, ALSO = syntax.keywords
+        QUOTE_CHAR = syntax.char(QUOTE)
+        W_CHAR = syntax.char("w")
+        show_token = syntax.show_token
+
+        start = stream._pos
+        pos = start
+
+        def fail(at, msg, exception=ManyParseException):
+            stream._pos = at
+            raise exception(stream, msg)
+
+        def too_deep():
+            if self.deep:
+                raise _TooDeep()
+            fail(pos, "Such nesting, very deep: more than {} levels".format(max_depth))
+
+        def show_char(at):
+            return string[at] if encoding is None else _bytes_char(string, at, encoding)
+
+        def fail_token(token, msg):
+            if not token and len(string) == pos:
+                fail(pos, "Encountered EOF while scanning for token", VeryUnexpectedEndException)
+            fail(pos, msg.format(show_token(token)))
+
+        def other_value():
+            # No simple lexeme at pos: EOF, a string with escapes or garbage.
+            nonlocal pos
+            pos = whitespace_match(string, pos).end()
+
+            if len(string) == pos:
+                fail(pos, "Encountered EOF while scanning for a value", VeryUnexpectedEndException)
+
+            elif QUOTE_CHAR != string[pos]:
+                fail(pos, "Invalid value start character: {!r}".format(show_char(pos)))
+
+            stream._pos = pos
+            value = read_string(stream)
+            pos = stream._pos
+            return value
+
+        def parse_object(depth):
+            nonlocal pos
+            if depth > max_depth:
+                too_deep()
+
+            obj = {} if new_object is None else new_object()
+
+            # 'such' is followed by a field name or 'wow'
+            pos = whitespace_match(string, pos).end()
+            if len(string) == pos:
+                fail(pos, "Encountered EOF while scanning for string or 'wow'", VeryUnexpectedEndException)
+
+            char = string[pos]
+            if W_CHAR == char:
+                match = token_match(string, pos)
+                pos = match.end()
+                if WOW != match.group(1):
+                    fail(pos, "Unexpected token {!r} after 'such'; expected 'wow' or string".format(show_token(match.group(1))))
+
+                return obj if finish_object is None else finish_object(obj)
+
+            elif QUOTE_CHAR != char:
+                fail(pos, "Unexpected character {!r} after 'such'; expected 'wow' or string".format(show_char(pos)))
+
+            while True:
+                # "field_name" is <<value>>
+                match = string_match(string, pos)
+                if match is not None:
+                    pos = match.end()
+                    name = match.group(1)
+                    if encoding is not None:
+                        name = name.decode(encoding)
+                    if string_cache is not None:
+                        name = string_cache(name)
+                else:
+                    stream._pos = pos
+                    name = read_string(stream)
+                    pos = stream._pos
+
+                match = token_match(string, pos)
+                pos = match.end()
+                if IS != match.group(1):
+                    fail_token(match.group(1), "Expected 'is' after field name, got token {!r}!")
+
+                match = value_match(string, pos)
+                if match is None:
+                    value = other_value()
+                else:
+                    pos = match.end()
+                    index = match.lastindex
+                    if 1 == index:
+                        value = match.group(1)
+                        if encoding is not None:
+                            value = value.decode(encoding)
+                        if string_cache is not None:
+                            value = string_cache(value)
+                    elif 3 == index:
+                        stream._pos = pos
+                        number = match.group(3)
+                        value = convert(stream, number if encoding is None else number.decode("ascii"))
+                    else:
+                        token = match.group(2)
+                        if token in constants:
+                            value = parse_constant(constants[token])
+                        elif SUCH == token:
+                            value = parse_object(depth + 1)
+                        elif SO == token:
+                            value = parse_array(depth + 1)
+                        else:
+                            fail(pos, "Expected tokens 'such', 'so' while reading object value, got {!r}".format(show_token(token)))
+
+                obj[memo_setdefault(name, name)] = value
+
+                match = token_match(string, pos)
+                pos = match.end()
+                token = match.group(1)
+                if token in separators:
+                    continue
+
+                elif WOW == token:
+                    return obj if finish_object is None else finish_object(obj)
+
+                fail_token(token, "Expected [,.!?] or 'wow'; got {!r}")
+
+        def parse_array(depth):
+            nonlocal pos
+            if depth > max_depth:
+                too_deep()
+
+            if read_numbers is not None:
+                numbers = read_numbers(string, pos, syntax)
+                if numbers is not None:
+                    array, pos = numbers
+                    return array
+
+            array = []
+            append = array.append
+
+            while True:
+                match = value_match(string, pos)
+                if match is None:
+                    value = other_value()
+                else:
+                    pos = match.end()
+                    index = match.lastindex
+                    if 1 == index:
+                        value = match.group(1)
+                        if encoding is not None:
+                            value = value.decode(encoding)
+                        if string_cache is not None:
+                            value = string_cache(value)
+                    elif 3 == index:
+                        stream._pos = pos
+                        number = match.group(3)
+                        value = convert(stream, number if encoding is None else number.decode("ascii"))
+                    else:
+                        token = match.group(2)
+                        if token in constants:
+                            value = parse_constant(constants[token])
+                        elif SUCH == token:
+                            value = parse_object(depth + 1)
+                        elif SO == token:
+                            value = parse_array(depth + 1)
+                        elif MANY == token:
+                            return array if finish_array is None else finish_array(array)
+                        else:
+                            fail(pos, "Expected tokens 'such', 'so' while reading array value, got {!r}".format(show_token(token)))
+
+                append(value)
+
+                match = token_match(string, pos)
+                pos = match.end()
+                token = match.group(1)
+                if AND == token or ALSO == token:
+                    continue
+
+                elif MANY == token:
+                    return array if finish_array is None else finish_array(array)
+
+                fail_token(token, "Expected 'and', 'also', or 'many', got {!r}")
+
+        try:
+            match = value_match(string, pos)
+            if match is None:
+                obj = other_value()
+            else:
+                pos = match.end()
+                index = match.lastindex
+                token = match.group(2)
+                if 1 == index:
+                    obj = match.group(1)
+                    if encoding is not None:
+                        obj = obj.decode(encoding)
+                    if string_cache is not None:
+                        obj = string_cache(obj)
+                elif 3 == index:
+                    stream._pos = pos
+                    number = match.group(3)
+                    obj = convert(stream, number if encoding is None else number.decode("ascii"))
+                elif token in constants:
+                    obj = parse_constant(constants[token])
+                elif SUCH == token:
+                    obj = parse_object(1)
+                elif SO == token:
+                    obj = parse_array(1)
+                else:
+                    fail(pos, "Expected tokens 'such' or 'so', got {!r}!".format(show_token(token)))
+
+        except VeryUnexpectedEndException:
+            stream._pos = start
+            raise
+
+        except (_TooDeep, RecursionError):
+            if not self.deep:
+                fail(pos, "Such nesting, very deep: out of stack")
+
+            stream._pos = start
+            return self._parse_deep(stream, syntax)
+
+        except UnicodeDecodeError as error:
+            fail(pos, "Such invalid {} in string: {}".format(encoding, error.reason))
+
+        stream._pos = pos
+        return obj
+
+    def _parse_deep(self, stream, syntax):
+        """
+        Parse the document at the stream position, too deep for recursion,
+        with a :class:`DocumentParser`: its extent is found by skipping over
+        it first, so that the state machine only sees (decoded) text.
+        """
+        string = stream._string
+        start = stream._pos
+        try:
+            end = skip_value(string, start, syntax)
+        except ManyParseException:
+            end = len(string) # let the state machine find the error, and report it the same way as loads()
+
+        if self._deep_parser is None:
+            object_hook, object_pairs_hook, array_hook = self._hooks
+            self._deep_parser = DocumentParser(self.scanner, object_hook, object_pairs_hook, array_hook=array_hook)
+
+        text = string[start:end]
+        document = StringStream(text if isinstance(text, str) else str(text, self.encoding), stream.pos())
+        parser = self._deep_parser
+        parser.reset()
+        obj = parser.parse(document)
+        if document._pos < len(text):
+            # Whatever skip_value() stopped at came after the document
+            done = document._string[:document._pos]
+            end = start + (len(done) if isinstance(text, str) else len(done.encode(self.encoding)))
+
+        stream._pos = end
+        return obj
+
+ENGINES = {
+    "state": DocumentParser,
+    "descent": DescentParser
+}
+
+DEFAULT_ENGINE = "state"
+
+def get_engine(engine=None):
+    """
+    Look up a parse engine class by name in :data:`ENGINES`; ``None``
+    selects :data:`DEFAULT_ENGINE`.
+    """
+    try:
+        return ENGINES[engine or DEFAULT_ENGINE]
+
+    except KeyError:
+        raise ValueError("Such unknown engine {!r}".format(engine))
+
+class DSONDecoder(object):
+    """
+    Such configurable decoder, analogous to :class:`json.JSONDecoder`. The
+    hooks convert values while parsing, so no second pass over the
+    resulting document is needed:
+
+    * ``object_hook(dict)`` is called with every decoded object, and its
+      result is used instead of the dict.
+    * ``object_pairs_hook(pairs)`` is called with the ordered list of
+      ``(name, value)`` pairs of every object instead; it takes priority
+      over ``object_hook``.
+    * ``parse_int(text)`` is called with the (octal) text of every integer.
+    * ``parse_float(text)`` is called with the (octal) text of every number
+      with a fraction or ``very`` exponent.
+    * ``parse_constant(name)`` is called with ``"yes"``, ``"no"`` or ``"empty"``.
+    * ``array_hook(list)`` is called with every decoded array, and its
+      result is used instead of the list; pass a :class:`NumericArrays` to
+      store arrays of numbers compactly.
+
+    ``string_cache`` is a :class:`StringCache` shared by every document this
+    decoder (or any other using the same cache) decodes, so frequently
+    repeated strings are kept only once.
+
+    ``engine`` names the parse engine used by :meth:`decode` and
+    :meth:`raw_decode` (see :func:`get_engine`). ``stats`` is a
+    :class:`ParseStats` recording the work of every parse; it needs the
+    state machine engine.
+
+    With no hooks set, decoding takes the same path as plain :func:`loads`.
+    """
+    def __init__(self, object_hook=None, parse_float=None, parse_int=None,
+                 parse_constant=None, object_pairs_hook=None, string_cache=None, engine=None, stats=None,
+                 array_hook=None):
+        self.object_hook = object_hook
+        self.array_hook = array_hook
+        self.parse_float = parse_float
+        self.parse_int = parse_int
+        self.parse_constant = parse_constant
+        self.object_pairs_hook = object_pairs_hook
+        self.string_cache = string_cache
+        self.engine = get_engine(engine)
+        self.stats = stats
+        if stats is not None and self.engine is not DocumentParser:
+            raise TypeError("Such stats need the state engine")
+
+        if string_cache is not None:
+            self.scanner = CachingRegexScanner(string_cache, parse_int, parse_float, parse_constant)
+        elif parse_float is None and parse_int is None and parse_constant is None:
+            self.scanner = get_scanner()
+        else:
+            self.scanner = RegexScanner(parse_int, parse_float, parse_constant)
+
+    def document_parser(self):
+        """ :return: A new :class:`DocumentParser` using this decoder's hooks """
+        return DocumentParser(self.scanner, self.object_hook, self.object_pairs_hook, self.stats, self.array_hook)
+
+    def decode(self, s):
+        """
+        Deserialize str s containing a DSON document to a Python object.
+
+        Raises :exc:`ManyParseException` if the document could not be deserialized.
+        """
+        obj, end = self.raw_decode(s)
+
+        # No more data should remain!
+        stream = StringStream(s)
+        stream._pos = end
+        self.scanner.strip_whitespace(stream)
+        if not stream.eof():
+            raise ManyParseException(stream, "Extra data after complete DSON document: {!r}".format(stream.remainder()))
+
+        return obj
+
+    def raw_decode(self, s, idx=0):
+        """
+        Decode a DSON document starting at index ``idx`` of str s, which may
+        have extra data after it.
+
+        :return: ``(obj, end)``, where ``end`` is the index where the document ended
+        """
+        stream = StringStream(s)
+        stream._pos = idx
+        if self.stats is not None:
+            parser = self.document_parser()
+        else:
+            parser = self.engine(self.scanner, self.object_hook, self.object_pairs_hook, array_hook=self.array_hook)
+
+        obj = parser.parse(stream)
+        return obj, stream._pos
+
+def _document_parser(cls, kw):
+    """ DocumentParser for the decoder options of load()-style functions. """
+    if cls is None and not kw:
+        return DocumentParser()
+
+    return (cls or DSONDecoder)(**kw).document_parser()
+
+def _bytes_parser(encoding, scanner, cls, engine, stats, kw):
+    """
+    :class:`DescentParser` parsing bytes in ``encoding`` directly with the
+    given options of :func:`loadb`, or None if they need decoded text.
+    """
+    if stats is not None or cls is not None or engine not in (None, "descent"):
+        return None
+
+    elif not is_ascii_compatible(encoding):
+        return None
+
+    # Unless asked for, the depth limit of the descent engine does not apply
+    deep = engine is None
+    if kw:
+        if scanner is not None:
+            return None
+
+        decoder = DSONDecoder(**kw)
+        return DescentParser(decoder.scanner, decoder.object_hook, decoder.object_pairs_hook, encoding=encoding,
+                             array_hook=decoder.array_hook, deep=deep)
+
+    return DescentParser(scanner, encoding=encoding, deep=deep)
+
+def loadb(b, encoding="utf-8", scanner=None, cls=None, engine=None, stats=None, index=False, **kw):
+    """
+    Deserialize a bytes-like object (``bytes``, ``bytearray``,
+    ``memoryview``, ``mmap``...) containing a DSON document to a Python
+    object. Takes the same options as :func:`loads`.
+
+    Unless the state engine, ``stats`` or ``cls`` is asked for, documents
+    in ASCII-compatible encodings (UTF-8, Latin-1...) are scanned without
+    decoding them first, by :class:`DescentParser`; only strings are
+    decoded. Error positions are byte offsets then. Documents nested too
+    deep for it are handed to the state engine, as with :func:`loads`.
+
+    ``index=True`` finds all the strings up front with a
+    :class:`StructuralIndex` (NumPy-backed if it is installed); a
+    :class:`StructuralIndex` of ``b`` may be passed instead to reuse it.
+    """
+    parser = _bytes_parser(encoding, scanner, cls, engine, stats, kw)
+    if parser is None:
+        return loads(str(b, encoding), scanner=scanner, cls=cls, engine=engine, stats=stats, **kw)
+
+    # mmap objects are used as they are: a memoryview would keep them from closing
+    data = b if isinstance(b, (bytes, bytearray, mmap_module.mmap)) else memoryview(b).cast("B")
+    if index is True:
+        index = StructuralIndex(data)
+    elif index is False:
+        index = None
+
+    stream = StringStream(data)
+    obj = parser.parse(stream, index)
+    _expect_bytes_end(stream, encoding)
+    return obj
+
+def _expect_bytes_end(stream, encoding):
+    """ Make sure nothing but whitespace remains in a stream over bytes. """
+    data = stream._string
+    stream._pos = BYTES_SYNTAX.whitespace_match(data, stream._pos).end()
+    if not stream.eof():
+        # The rest may be huge (a mapped file); show its start only
+        extra = str(data[stream._pos:stream._pos + 64], encoding, "replace")
+        raise ManyParseException(stream, "Extra data after complete DSON document: {!r}{}".format(
+            extra, "..." if len(data) - stream._pos > 64 else ""))
+
+def loads(s, scanner=None, cls=None, engine=None, stats=None, **kw):
+    """
+    Deserialize a str (unicode) instance containing a DSON document to a Python object.
+
+    ``scanner`` selects the lexeme scanner (see :func:`get_scanner`); pass
+    ``"reference"`` to compare results against the character-at-a-time scanner.
+    ``engine`` selects the parse engine (see :func:`get_engine`). Pass a
+    :class:`ParseStats` as ``stats`` to find out where parsing time goes.
+
+    Any other keyword arguments are hooks for :class:`DSONDecoder` (or the
+    ``cls`` subclass of it), which is used to decode the document instead.
+
+    Raises :exc:`ManyParseException` if the document could not be deserialized.
+    """
+    if cls is not None or kw:
+        if scanner is not None:
+            raise TypeError("Such scanner cannot be combined with decoder hooks")
+
+        return (cls or DSONDecoder)(engine=engine, stats=stats, **kw).decode(s)
+
+    stream = StringStream(s)
+    if stats is None:
+        parser = get_engine(engine)(scanner)
+    elif get_engine(engine) is DocumentParser:
+        parser = DocumentParser(scanner, stats=stats)
+    else:
+        raise TypeError("Such stats need the state engine")
+
+    obj = parser.parse(stream)
+
+    # No more data should remain!
+    parser.scanner.strip_whitespace(stream)
+    if not stream.eof():
+        raise ManyParseException(stream, "Extra data after complete DSON document: {!r}".format(stream.remainder()))
+
+    return obj
+
+# Tokens that no further characters can turn into another valid lexeme
+FINAL_TOKENS = frozenset(("such", "is", "wow", "so", "and", "also", "many") + tuple(CONSTANTS) + tuple(OBJECT_SEPARATORS))
+MAX_FINAL_TOKEN_SIZE = max(len(token) for token in FINAL_TOKENS)
+
+class _ChunkBuffer(object):
+    """
+    Text received in chunks, exposed through :attr:`stream`. Consumed data is
+    dropped whenever more is added, and trailing token/number characters are
+    held back until the next chunk shows whether they continue
+    ("so 12" + "3 many"), unless they are a whole token such as ``wow`` or
+    ``many`` that can only be followed by whitespace or another lexeme.
+
+    Chunks are only joined onto the stream when it is next looked at, so
+    adding n characters in small chunks takes O(n) time however long the
+    lexeme they belong to is.
+    """
+    def __init__(self, encoding="utf-8"):
+        self._bytes_decoder = codecs.getincrementaldecoder(encoding)()
+        self._held = [] # held back lexeme characters, in pieces
+        self._held_size = 0
+        self._added = [] # text not joined onto the stream yet
+        self._added_size = 0
+        self._stream = StringStream("")
+        self.closed = False
+
+    @property
+    def stream(self):
+        if self._added:
+            stream = self._stream
+            self._stream = StringStream(stream.remainder() + "".join(self._added), stream.pos())
+            self._added = []
+            self._added_size = 0
+
+        return self._stream
+
+    def pending(self):
+        """ :return: The number of characters received but not consumed yet. """
+        stream = self._stream
+        return len(stream._string) - stream._pos + self._added_size + self._held_size
+
+    def feed(self, chunk):
+        """
+        Add ``chunk`` (``str`` or bytes-like) to the buffer.
+
+        :return: The text it released into the stream, held back
+            characters that it showed to be complete included.
+        """
+        if self.closed:
+            raise ValueError("Such buffer, very closed")
+
+        if not isinstance(chunk, str):
+            chunk = self._bytes_decoder.decode(chunk)
+
+        released = chunk.rstrip(LEXEME_TEXT)
+        if not released and self._held_size + len(chunk) > MAX_FINAL_TOKEN_SIZE:
+            self._held.append(chunk)
+            self._held_size += len(chunk)
+            return ""
+
+        tail = chunk[len(released):]
+        if released:
+            released = "".join(self._held) + released
+        else:
+            tail = "".join(self._held) + tail
+
+        if tail in FINAL_TOKENS:
+            released += tail
+            tail = ""
+
+        if released:
+            self._add(released)
+        self._held = [tail]
+        self._held_size = len(tail)
+        return released
+
+    def close(self):
+        """ Mark the end of input, releasing any held back characters. """
+        if not self.closed:
+            self.closed = True
+            self._add("".join(self._held) + self._bytes_decoder.decode(b"", True))
+            self._held = []
+            self._held_size = 0
+
+    def fill(self, fp, chunk_size):
+        """
+        Read a chunk from file object fp, closing the buffer at EOF. The
+        chunk is at least as long as the pending input, so that a lexeme
+        spanning many chunks is only rescanned a logarithmic number of times.
+        """
+        chunk = fp.read(max(chunk_size, self.pending()))
+        if chunk:
+            self.feed(chunk)
+        else:
+            self.close()
+
+    def _add(self, text):
+        self._added.append(text)
+        self._added_size += len(text)
+
+class DSONIncrementalDecoder(object):
+    """
+    Push-style decoder for DSON arriving in arbitrary chunks, e.g. from a
+    socket. Whitespace-separated documents are returned as soon as they are
+    complete::
+
+        decoder = DSONIncrementalDecoder()
+        for chunk in chunks:
+            for obj in decoder.feed(chunk):
+                handle(obj)
+        for obj in decoder.close():
+            handle(obj)
+
+    Parser state is kept between chunks; only the data of a step that could
+    not be completed (at most a field name and its ``is``, or a single value)
+    is scanned again, and only once new data may complete it (a quote ending
+    a string, anything but whitespace otherwise) or there is twice as much of
+    it, so feeding n characters takes O(n) time however small the chunks.
+    Decoder hooks are passed on to :class:`DSONDecoder` (or ``cls``), as with
+    :func:`loads`.
+    """
+    def __init__(self, encoding="utf-8", cls=None, **kw):
+        self._parser = _document_parser(cls, kw)
+        self._buffer = _ChunkBuffer(encoding)
+        self._retry_size = 0 # pending size at which a stuck step is retried anyway
+        self._completes = None # what new data must match for that step to be retried
+        self._escaping = False # whether the input so far ends with an unfinished escape
+
+    def feed(self, chunk):
+        """
+        Add ``chunk`` (``str`` or bytes-like) to the input and return a list
+        of the documents it completed.
+        """
+        released = self._buffer.feed(chunk)
+        escaping = self._escaping
+        backslashes = len(released) - len(released.rstrip(RSOLIDUS))
+        self._escaping = (escaping if backslashes == len(released) else False) != (backslashes % 2 == 1)
+
+        if self._completes is not None and self._buffer.pending() < self._retry_size:
+            # " " stands in for the input before, and its unfinished escape
+            if self._completes.search((" \\" if escaping else " ") + released) is None:
+                return []
+
+        return self._parse()
+
+    def close(self):
+        """
+        Signal the end of input and return the documents completed by it.
+
+        Raises :exc:`VeryUnexpectedEndException` if a document is incomplete.
+        """
+        if self._buffer.closed:
+            return []
+
+        self._buffer.close()
+        return self._parse()
+
+    def _parse(self):
+        parser = self._parser
+        strip_whitespace = parser.scanner.strip_whitespace
+        stream = self._buffer.stream
+        documents = []
+        self._completes = None
+
+        while True:
+            if SO_START == parser.state:
+                strip_whitespace(stream)
+                if stream.eof():
+                    break
+
+            try:
+                documents.append(parser.parse(stream))
+
+            except VeryUnexpectedEndException:
+                if self._buffer.closed:
+                    raise
+
+                # The parser is back at the start of the step
+                string = stream._string
+                pos = WHITESPACE_RE.match(string, stream._pos).end()
+                in_string = pos < len(string) and QUOTE == string[pos] and ANY_STRING_RE.match(string, pos) is None
+                self._completes = UNESCAPED_QUOTE_RE if in_string else NOT_WHITESPACE_RE
+                self._retry_size = 2 * self._buffer.pending()
+                break
+
+            parser.reset()
+
+        return documents
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+def _read_step(fp, buffer, chunk_size, step, rewind=False):
+    """
+    Call ``step(buffer.stream)``, reading more chunks from fp for as long as
+    the step runs out of input. With ``rewind``, the stream is moved back to
+    where the step started before retrying, for steps (like the scanner
+    readers) that do not rewind by themselves.
+    """
+    while True:
+        stream = buffer.stream
+        pos = stream._pos
+        try:
+            return step(stream)
+
+        except VeryUnexpectedEndException:
+            if buffer.closed:
+                raise
+
+            if rewind:
+                stream._pos = pos
+
+            buffer.fill(fp, chunk_size)
+
+def _expect_end(fp, buffer, chunk_size, strip_whitespace):
+    """ Make sure nothing but whitespace remains in fp. """
+    while True:
+        stream = buffer.stream
+        strip_whitespace(stream)
+
+        if not stream.eof():
+            raise ManyParseException(stream, "Extra data after complete DSON document: {!r}".format(stream.remainder()))
+
+        elif buffer.closed:
+            return
+
+        buffer.fill(fp, chunk_size)
+
+def load(fp, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8", cls=None, **kw):
+    """
+    Deserialize a DSON document read from the text or binary file object fp.
+
+    fp is read ``chunk_size`` units at a time and parsed as it goes, so the
+    whole file is never held in memory next to the resulting object. Binary
+    data is decoded with ``encoding``. Decoder hooks are passed on to
+    :class:`DSONDecoder` (or ``cls``), as with :func:`loads`.
+
+    Raises :exc:`ManyParseException` if the document could not be deserialized.
+    """
+    buffer = _ChunkBuffer(encoding)
+    parser = _document_parser(cls, kw)
+
+    obj = _read_step(fp, buffer, chunk_size, parser.parse)
+    _expect_end(fp, buffer, chunk_size, parser.scanner.strip_whitespace)
+    return obj
+
+def iter_load(fp, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8", cls=None, **kw):
+    """
+    Yield the elements of the top-level ``so ... many`` array in file object
+    fp one at a time. Memory use is bounded by the largest element rather
+    than by the whole array. See :func:`load`.
+    """
+    buffer = _ChunkBuffer(encoding)
+    parser = _document_parser(cls, kw)
+    read_token = parser.scanner.read_token
+
+    def read_element(stream):
+        # Like loads, accept 'many' wherever an element may start
+        if SO_START == parser.state:
+            pos = stream._pos
+            if "many" == read_token(stream):
+                return None, True
+            stream._pos = pos
+
+        return parser.parse(stream), False
+
+    token = _read_step(fp, buffer, chunk_size, read_token)
+    if "so" != token:
+        raise ManyParseException(buffer.stream, "Expected token 'so' to start array, got {!r}".format(token))
+
+    element, done = _read_step(fp, buffer, chunk_size, read_element)
+    while not done:
+        parser.reset()
+        yield element
+
+        token = _read_step(fp, buffer, chunk_size, read_token)
+        if token in ("and", "also"):
+            element, done = _read_step(fp, buffer, chunk_size, read_element)
+
+        elif "many" == token:
+            done = True
+
+        else:
+            raise ManyParseException(buffer.stream, "Expected 'and', 'also', or 'many', got {!r}".format(token))
+
+    _expect_end(fp, buffer, chunk_size, parser.scanner.strip_whitespace)
+
+def _map_file(fp):
+    """ Read-only memory map of binary file fp; b"" for empty files, which cannot be mapped. """
+    if 0 == os.fstat(fp.fileno()).st_size:
+        return b""
+
+    return mmap_module.mmap(fp.fileno(), 0, access=mmap_module.ACCESS_READ)
+
+def load_path(path, mmap=True, encoding="utf-8", cls=None, **kw):
+    """
+    Deserialize the DSON file at path. With ``mmap``, the file is
+    memory-mapped and parsed in place (see :func:`loadb`), so the page
+    cache does the reading and no copy of the file is held in memory.
+    Otherwise it is read in chunks by :func:`load`. Decoder hooks are
+    passed on to :class:`DSONDecoder` (or ``cls``), as with :func:`loads`.
+    """
+    with open(path, "rb") as fp:
+        if not mmap:
+            return load(fp, encoding=encoding, cls=cls, **kw)
+
+        data = _map_file(fp)
+        try:
+            return loadb(data, encoding, cls=cls, **kw)
+
+        finally:
+            if b"" != data:
+                data.close()
+
+def iter_load_path(path, encoding="utf-8", cls=None, **kw):
+    """
+    Yield the elements of the top-level ``so ... many`` array in the DSON
+    file at path one at a time, parsing the memory-mapped file in place.
+    Files larger than memory can be walked this way: mapped pages are read
+    on demand and can be dropped by the OS again. See :func:`iter_load`.
+    """
+    parser = _bytes_parser(encoding, None, cls, None, None, kw)
+    if parser is None:
+        # Needs decoded text
+        with open(path, "rb") as fp:
+            yield from iter_load(fp, encoding=encoding, cls=cls, **kw)
+        return
+
+    with open(path, "rb") as fp:
+        data = _map_file(fp)
+        try:
+            stream = StringStream(data)
+
+            def read_element():
+                # Like loads, accept 'many' wherever an element may start
+                pos = stream._pos
+                if "many" == read_bytes_token(stream):
+                    return None, True
+
+                stream._pos = pos
+                return parser.parse(stream), False
+
+            token = read_bytes_token(stream)
+            if "so" != token:
+                raise ManyParseException(stream, "Expected token 'so' to start array, got {!r}".format(token))
+
+            element, done = read_element()
+            while not done:
+                parser.reset()
+                yield element
+
+                token = read_bytes_token(stream)
+                if token in ("and", "also"):
+                    element, done = read_element()
+
+                elif "many" == token:
+                    done = True
+
+                else:
+                    raise ManyParseException(stream, "Expected 'and', 'also', or 'many', got {!r}".format(token))
+
+            _expect_bytes_end(stream, encoding)
+
+        finally:
+            if b"" != data:
+                data.close()
+
+## asyncio
+
+DEFAULT_ASYNC_BUDGET = 16 * 1024
+
+class _AsyncSource(object):
+    """
+    Input of an ``asyncio.StreamReader``, fed into a :class:`_ChunkBuffer`
+    at most ``budget`` bytes at a time, so that parsing what has been fed
+    cannot hold up the event loop for long.
+    """
+    def __init__(self, reader, encoding, chunk_size, budget):
+        self.reader = reader
+        self.buffer = _ChunkBuffer(encoding)
+        self.chunk_size = chunk_size
+        self.budget = budget
+        self.fed = 0
+        self._data = memoryview(b"")
+
+    async def fill(self, whole=False):
+        """
+        Give other tasks a turn, then feed the buffer the next piece of
+        input (with ``whole``, all of the chunk read last), reading a chunk
+        first if need be. Closes the buffer at EOF.
+        """
+        await asyncio.sleep(0)
+        if not len(self._data):
+            data = await self.reader.read(self.chunk_size)
+            if not data:
+                self.buffer.close()
+                return
+
+            self._data = memoryview(data)
+
+        # Feed at least as much as is still pending (unparsed, or held back
+        # by the buffer), or a lexeme longer than the budget would be
+        # scanned again for every piece.
+        size = len(self._data) if whole else max(self.budget, self.buffer.pending())
+        piece = self._data[:size]
+        self._data = self._data[size:]
+        self.fed += len(piece)
+        self.buffer.feed(piece)
+
+async def _read_step_async(source, step, offload_size=None, executor=None):
+    """
+    Like :func:`_read_step`: call ``step(source.buffer.stream)``, feeding it
+    more input for as long as it runs out. Once more than ``offload_size``
+    bytes have been fed to the step, it is run in ``executor`` instead, on
+    whole chunks.
+    """
+    start = source.fed
+    while True:
+        offload = offload_size is not None and source.fed - start > offload_size
+        try:
+            if offload:
+                return await asyncio.get_running_loop().run_in_executor(executor, step, source.buffer.stream)
+            return step(source.buffer.stream)
+
+        except VeryUnexpectedEndException:
+            if source.buffer.closed:
+                raise
+
+            await source.fill(offload)
+
+async def load_async(reader, chunk_size=DEFAULT_CHUNK_SIZE, budget=DEFAULT_ASYNC_BUDGET, offload_size=None,
+                     executor=None, encoding="utf-8", cls=None, **kw):
+    """
+    Deserialize the DSON document read from ``asyncio.StreamReader`` reader
+    until EOF, parsing it as it arrives. Parsing gives other tasks a turn
+    after every ``budget`` bytes, so a huge document does not stall the
+    event loop.
+
+    Once more than ``offload_size`` bytes (if given) of a document have
+    been parsed, the rest of it is parsed in ``executor``, a thread pool
+    (None: the loop's default executor), a chunk at a time. See
+    :func:`load` for the other options.
+    """
+    source = _AsyncSource(reader, encoding, chunk_size, budget)
+    parser = _document_parser(cls, kw)
+
+    obj = await _read_step_async(source, parser.parse, offload_size, executor)
+
+    # Like _expect_end
+    while True:
+        stream = source.buffer.stream
+        parser.scanner.strip_whitespace(stream)
+
+        if not stream.eof():
+            raise ManyParseException(stream, "Extra data after complete DSON document: {!r}".format(stream.remainder()))
+
+        elif source.buffer.closed:
+            return obj
+
+        await source.fill(True)
+
+async def iter_documents_async(reader, chunk_size=DEFAULT_CHUNK_SIZE, budget=DEFAULT_ASYNC_BUDGET, offload_size=None,
+                               executor=None, encoding="utf-8", cls=None, **kw):
+    """
+    Asynchronously yield the whitespace-separated DSON documents read from
+    ``asyncio.StreamReader`` reader (e.g. one per line) as soon as each one
+    is complete, until EOF. Takes the options of :func:`load_async`.
+    """
+    source = _AsyncSource(reader, encoding, chunk_size, budget)
+    parser = _document_parser(cls, kw)
+    strip_whitespace = parser.scanner.strip_whitespace
+
+    while True:
+        stream = source.buffer.stream
+        strip_whitespace(stream)
+        if stream.eof():
+            if source.buffer.closed:
+                return
+
+            await source.fill()
+            continue
+
+        obj = await _read_step_async(source, parser.parse, offload_size, executor)
+        parser.reset()
+        yield obj
+
+## Parse cache
+
+DEFAULT_PARSE_CACHE_ENTRIES = 256
+DEFAULT_PARSE_CACHE_BYTES = 16 * 1024 * 1024
+PARSE_CACHE_DIGEST_SIZE = 20
+
+def freeze(obj):
+    """
+    :return: A read-only version of a parsed value: dicts become
+             ``MappingProxyType`` views and lists tuples, all the way down.
+             Other values (including objects made by hooks) are kept as
+             they are.
+    """
+    # Without recursion, so that any document loads() accepts can be frozen:
+    # containers are copied top-down, then frozen bottom-up.
+    root = [obj]
+    stack = [(root, 0)]
+    copies = []
+    while stack:
+        parent, key = stack.pop()
+        value = parent[key]
+        if isinstance(value, dict):
+            parent[key] = value = dict(value)
+            stack.extend((value, name) for name in value)
+        elif isinstance(value, list):
+            parent[key] = value = list(value)
+            stack.extend((value, index) for index in range(len(value)))
+        else:
+            continue
+
+        copies.append((parent, key))
+
+    for parent, key in reversed(copies):
+        value = parent[key]
+        parent[key] = MappingProxyType(value) if isinstance(value, dict) else tuple(value)
+
+    return root[0]
+
+class ParseCache(object):
+    """
+    Bounded LRU cache of parsed documents, for parsing the same documents
+    over and over (e.g. polling a config). Results are keyed by a BLAKE2b
+    digest of the document and the parse options, so a repeated parse
+    costs a hash and a lookup, and the documents themselves are not kept.
+
+    At most ``max_entries`` results are kept, for documents adding up to at
+    most ``max_bytes`` bytes (of UTF-8 for str documents); the least
+    recently used ones are evicted first. Documents that fail to parse are
+    not cached.
+
+    With ``frozen``, every parse of a document returns the same read-only
+    value (see :func:`freeze`). Otherwise each one returns a new copy, that
+    the caller may change: plain values are kept marshalled and loaded
+    again, values of other types (made by hooks) are deep-copied.
+
+    ``hits``, ``misses`` and ``evictions`` count lookups and evicted results.
+    """
+    def __init__(self, max_entries=DEFAULT_PARSE_CACHE_ENTRIES, max_bytes=DEFAULT_PARSE_CACHE_BYTES, frozen=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.frozen = frozen
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict() # key: (size, unmarshal, value)
+
+    def loads(self, s, **kw):
+        """ Like :func:`loads`, from the cache if s was parsed before. """
+        return self._lookup(s.encode("utf-8", "surrogatepass"), str, kw, lambda: loads(s, **kw))
+
+    def loadb(self, b, encoding="utf-8", **kw):
+        """ Like :func:`loadb`, from the cache if b was parsed before. """
+        return self._lookup(b, encoding, kw, lambda: loadb(b, encoding, **kw))
+
+    def _lookup(self, data, kind, kw, parse):
+        if kw.get("stats") is not None:
+            raise TypeError("Such stats cannot be collected from a cache")
+
+        entries = self._entries
+        try:
+            key = (hashlib.blake2b(data, digest_size=PARSE_CACHE_DIGEST_SIZE).digest(), kind, tuple(sorted(kw.items())))
+            entry = entries.get(key)
+        except TypeError:
+            # Unhashable options: no key to cache the result by
+            key = entry = None
+
+        if entry is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            _, unmarshal, value = entry
+            if self.frozen:
+                return value
+
+            return marshal.loads(value) if unmarshal else copy.deepcopy(value)
+
+        self.misses += 1
+        obj = parse()
+        if self.frozen:
+            obj = value = freeze(obj)
+            unmarshal = False
+        else:
+            try:
+                value = marshal.dumps(obj)
+                unmarshal = True
+            except ValueError:
+                # Not plain lists, dicts, strs and numbers, or nested too
+                # deep for marshal (then maybe for deepcopy too: not cached)
+                try:
+                    value = copy.deepcopy(obj)
+                except RecursionError:
+                    key = None
+                unmarshal = False
+
+        size = memoryview(data).nbytes
+        if key is not None and size <= self.max_bytes:
+            entries[key] = (size, unmarshal, value)
+            self.size += size
+            while len(entries) > self.max_entries or self.size > self.max_bytes:
+                self.size -= entries.popitem(last=False)[1][0]
+                self.evictions += 1
+
+        return obj
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self):
+        """ :return: Dict of the hits, misses, evictions, entries and bytes cached """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def clear(self):
+        """ Drop every cached result and reset the counts. """
+        self._entries.clear()
+        self.size = self.hits = self.misses = self.evictions = 0
+
+## Lazy documents
+
+def _lazy_fail(string, pos, msg, exception=ManyParseException):
+    stream = StringStream(string)
+    stream._pos = pos
+    raise exception(stream, msg)
+
+def skip_container(string, pos, opener, syntax=TEXT_SYNTAX):
+    """
+    Skip the rest of the object or array opened by token ``opener``
+    (``such`` or ``so``) just before ``pos`` in string, without building
+    anything. Only strings and the nesting tokens
+    are looked at: the contents are not checked.
+
+    :return: The position after the closing ``wow`` or ``many``
+    """
+    SUCH, SO, MANY, WOW = syntax.keywords[:4]
+    skip_match = syntax.skip_match
+    nesting_match = syntax.nesting_match
+    closers = [WOW if SUCH == opener else MANY]
+
+    while closers:
+        pos = skip_match(string, pos).end()
+        match = nesting_match(string, pos)
+        if match is None:
+            # Only the end or an unterminated string stops the skipping
+            _lazy_fail(string, pos, "Encountered EOF while skipping over a value", VeryUnexpectedEndException)
+
+        pos = match.end()
+        token = match.group(1)
+        if SUCH == token:
+            closers.append(WOW)
+        elif SO == token:
+            closers.append(MANY)
+        elif closers.pop() != token:
+            _lazy_fail(string, pos, "Such mismatched {!r}".format(syntax.show_token(token)))
+
+    return pos
+
+def skip_value(string, pos, syntax=TEXT_SYNTAX):
+    """
+    Skip the value at ``pos`` in string without building it; see
+    :func:`skip_container`.
+
+    :return: The position after the value
+    """
+    match = syntax.value_match(string, pos)
+    if match is None:
+        match = syntax.any_string_match(string, pos)
+        if match is not None:
+            return match.end()
+
+        pos = syntax.whitespace_match(string, pos).end()
+        if len(string) == pos:
+            _lazy_fail(string, pos, "Encountered EOF while scanning for a value", VeryUnexpectedEndException)
+
+        elif syntax.char(QUOTE) == string[pos]:
+            _lazy_fail(string, len(string), "End of stream while scanning for end quote in string!", VeryUnexpectedEndException)
+
+        _lazy_fail(string, pos, "Invalid value start character: {!r}".format(syntax.show(string[pos])))
+
+    token = match.group(2)
+    if token is None or token in syntax.constants:
+        return match.end()
+
+    elif token in syntax.keywords[:2]:
+        return skip_container(string, match.end(), token, syntax)
+
+    _lazy_fail(string, match.end(), "Expected tokens 'such', 'so' while reading value, got {!r}".format(syntax.show_token(token)))
+
+def _next_token(string, pos, syntax):
+    """ :return: ``(token, end)`` for the token at pos """
+    match = syntax.token_match(string, pos)
+    if not match.group(1) and len(string) == match.end():
+        _lazy_fail(string, match.end(), "Encountered EOF while scanning for token", VeryUnexpectedEndException)
+
+    return match.group(1), match.end()
+
+class _LazyContainer(object):
+    """
+    Base for the :func:`loads_lazy` proxies: the value offsets of one
+    object or array, indexed on creation, and its decoded values, decoded
+    on first access and cached.
+    """
+    def __init__(self, string, start, parser):
+        self._string = string
+        self._start = start
+        self._parser = parser
+        self._syntax = TEXT_SYNTAX if isinstance(string, str) else BYTES_SYNTAX
+        self._values = {}
+        self._end = self._index(self._syntax.value_match(string, start).end())
+
+    def _decode(self, pos):
+        """ Decode the value at pos; containers become lazy proxies. """
+        string = self._string
+        syntax = self._syntax
+        match = syntax.value_match(string, pos)
+        if match is not None:
+            if syntax.keywords[0] == match.group(2):
+                return LazyObject(string, pos, self._parser)
+
+            elif syntax.keywords[1] == match.group(2):
+                return LazyArray(string, pos, self._parser)
+
+        stream = StringStream(string)
+        stream._pos = pos
+        return self._parser.parse(stream)
+
+    def _get(self, key, pos):
+        try:
+            return self._values[key]
+
+        except KeyError:
+            value = self._values[key] = self._decode(pos)
+            return value
+
+    def materialize(self):
+        """ :return: The whole container decoded to plain Python objects """
+        stream = StringStream(self._string)
+        stream._pos = self._start
+        return self._parser.parse(stream)
+
+class LazyObject(_LazyContainer, Mapping):
+    """
+    Read-only mapping over a DSON object in its source document; field
+    values are decoded when first accessed.
+    """
+    def _index(self, pos):
+        string = self._string
+        syntax = self._syntax
+        SUCH, SO, MANY, WOW, IS = syntax.keywords[:5]
+        self._offsets = offsets = {}
+
+        token, end = _next_token(self._string, pos, self._syntax)
+        if WOW == token:
+            return end
+
+        elif token:
+            _lazy_fail(string, end, "Unexpected token {!r} after 'such'; expected 'wow' or string".format(syntax.show_token(token)))
+
+        while True:
+            match = syntax.string_match(string, pos)
+            if match is not None:
+                name = match.group(1)
+                if not isinstance(name, str):
+                    name = name.decode(self._parser.encoding)
+                pos = match.end()
+            else:
+                end = skip_value(self._string, pos, self._syntax)
+                name = self._decode(pos)
+                if not isinstance(name, str):
+                    _lazy_fail(string, pos, "Unexpected {!r} where a field name was expected".format(name))
+                pos = end
+
+            token, pos = _next_token(self._string, pos, self._syntax)
+            if IS != token:
+                _lazy_fail(string, pos, "Expected 'is' after field name, got token {!r}!".format(syntax.show_token(token)))
+
+            offsets[name] = pos
+            pos = skip_value(self._string, pos, self._syntax)
+
+            token, pos = _next_token(self._string, pos, self._syntax)
+            if token in syntax.separators:
+                continue
+
+            elif WOW == token:
+                return pos
+
+            _lazy_fail(string, pos, "Expected [,.!?] or 'wow'; got {!r}".format(syntax.show_token(token)))
+
+    def __getitem__(self, name):
+        return self._get(name, self._offsets[name])
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, name):
+        return name in self._offsets
+
+    def __repr__(self):
+        return "<LazyObject {!r}>".format(list(self._offsets))
+
+class LazyArray(_LazyContainer, Sequence):
+    """
+    Read-only sequence over a DSON array in its source document; elements
+    are decoded when first accessed.
+    """
+    def _index(self, pos):
+        string = self._string
+        syntax = self._syntax
+        MANY, AND, ALSO = syntax.keywords[2], syntax.keywords[5], syntax.keywords[6]
+        self._offsets = offsets = []
+
+        while True:
+            # Like loads, accept 'many' wherever an element may start
+            token, end = _next_token(self._string, pos, self._syntax)
+            if MANY == token:
+                return end
+
+            offsets.append(pos)
+            pos = skip_value(self._string, pos, self._syntax)
+
+            token, pos = _next_token(self._string, pos, self._syntax)
+            if AND == token or ALSO == token:
+                continue
+
+            elif MANY == token:
+                return pos
+
+            _lazy_fail(string, pos, "Expected 'and', 'also', or 'many', got {!r}".format(syntax.show_token(token)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._offsets)))]
+
+        if index < 0:
+            index += len(self._offsets)
+
+        if not 0 <= index < len(self._offsets):
+            raise IndexError("Such index, out of range")
+
+        return self._get(index, self._offsets[index])
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyArray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+        return NotImplemented
+
+    def __repr__(self):
+        return "<LazyArray of {} elements>".format(len(self._offsets))
+
+def loads_lazy(s, encoding="utf-8"):
+    """
+    Deserialize a DSON document (str or bytes-like) on demand. A fast
+    structural pass records where the fields and elements of the top-level
+    object or array are, skipping over nested containers; the result is a
+    :class:`LazyObject` or :class:`LazyArray` that decodes values, and
+    indexes nested containers, when they are first accessed.
+
+    Only the structure is checked up front: an invalid value inside the
+    document raises :exc:`ManyParseException` when it is accessed. The
+    proxies keep the source document alive; call ``materialize()`` for
+    plain Python objects.
+    """
+    if not isinstance(s, str):
+        if not is_ascii_compatible(encoding):
+            s = str(s, encoding)
+        elif not isinstance(s, (bytes, bytearray, mmap_module.mmap)):
+            s = memoryview(s).cast("B")
+
+    syntax = TEXT_SYNTAX if isinstance(s, str) else BYTES_SYNTAX
+    parser = DescentParser(encoding=encoding, deep=True)
+    match = syntax.value_match(s, 0)
+    token = match.group(2) if match is not None else None
+
+    if syntax.keywords[0] == token:
+        obj = LazyObject(s, 0, parser)
+    elif syntax.keywords[1] == token:
+        obj = LazyArray(s, 0, parser)
+    elif isinstance(s, str):
+        return loads(s)
+    else:
+        return loadb(s, encoding)
+
+    stream = StringStream(s)
+    stream._pos = syntax.whitespace_match(s, obj._end).end()
+    if not stream.eof():
+        raise ManyParseException(stream, "Extra data after complete DSON document")
+
+    return obj
+
+## Path extraction
+
+PATH_STEP_RE = re.compile(r"(\.?)([^.\[\]]+)|\[(\*|[0-9]+)\]")
+WILDCARD = "*"
+
+# Fields extract() has no use for: runs of '"name" is <<scalar>> ,' in one match
+UNWANTED_FIELDS_PATTERN = (r'(?:[ \t\v\r\n]*"{exclude}[^"\\]*"[ \t\v\r\n]*is(?![a-z,.!?])[ \t\v\r\n]*'
+                           r'(?:"[^"\\]*"|[-0-9][-0-9.veryVERY]*(?=[ \t\v\r\n])|(?:yes|no|empty)(?![a-z,.!?]))'
+                           r'[ \t\v\r\n]*[,.!?](?![a-z,.!?]))*')
+
+class _PathNode(object):
+    """
+    One step of the paths given to :func:`extract`: the paths ending here,
+    and the nodes of the next steps (``steps``, and ``wildcards`` for any
+    step).
+    """
+    __slots__ = ("paths", "children", "steps", "wildcards", "last_index", "_skippers")
+
+    def __init__(self):
+        self.paths = []
+        self.children = {}
+        self._skippers = {}
+
+    def finish(self):
+        """ Precompute the next steps, once all paths are in. """
+        self.steps = dict((step, [child]) for step, child in self.children.items() if WILDCARD != step)
+        self.wildcards = [self.children[WILDCARD]] if WILDCARD in self.children else []
+        indexes = [step for step in self.steps if isinstance(step, int)]
+        self.last_index = max(indexes) if indexes and not self.wildcards else None
+        for child in self.children.values():
+            child.finish()
+
+    @classmethod
+    def merge(cls, nodes):
+        """ :return: A node matching what any of nodes matches """
+        merged = cls()
+        merged.steps = {}
+        merged.wildcards = []
+        for node in nodes:
+            merged.paths.extend(node.paths)
+            merged.wildcards.extend(node.wildcards)
+            for step, children in node.steps.items():
+                merged.steps.setdefault(step, []).extend(children)
+        merged.last_index = None
+        return merged
+
+    def field_skipper(self, syntax, encoding):
+        """
+        :return: Match function skipping over scalar fields without a next
+                 step, or None if every field has one
+        """
+        if self.wildcards:
+            return None
+
+        key = (syntax, encoding)
+        if key not in self._skippers:
+            names = [re.escape(step) for step in self.steps if isinstance(step, str)]
+            exclude = '(?!(?:{})")'.format("|".join(names)) if names else ""
+            pattern = UNWANTED_FIELDS_PATTERN.format(exclude=exclude)
+            if syntax is BYTES_SYNTAX:
+                pattern = pattern.encode(encoding)
+
+            self._skippers[key] = re.compile(pattern).match
+
+        return self._skippers[key]
+
+def parse_path(path):
+    """
+    Split an :func:`extract` path into its steps: field names (str),
+    array indexes (int) and :data:`WILDCARD`.
+
+    >>> parse_path("users[*].name")
+    ['users', '*', 'name']
+    """
+    steps = []
+    pos = 0
+    while pos < len(path):
+        match = PATH_STEP_RE.match(path, pos)
+        # Field names after the first one follow a dot
+        if match is None or match.group(2) is not None and (pos > 0) != bool(match.group(1)):
+            raise ValueError("Such invalid path {!r} at {}".format(path, pos))
+
+        _, name, index = match.groups()
+        if name is not None:
+            steps.append(name)
+        elif WILDCARD == index:
+            steps.append(WILDCARD)
+        else:
+            steps.append(int(index))
+        pos = match.end()
+
+    if not steps:
+        raise ValueError("Such empty path")
+
+    return steps
+
+@lru_cache(maxsize=256)
+def _compile_paths(paths):
+    """ :return: The root :class:`_PathNode` of a tuple of paths """
+    root = _PathNode()
+    for path in paths:
+        node = root
+        for step in parse_path(path):
+            node = node.children.setdefault(step, _PathNode())
+        node.paths.append(path)
+
+    root.finish()
+    return root
+
+def _step_values(value, step):
+    """ :return: The values of one path step in an already decoded value """
+    if isinstance(value, dict):
+        if WILDCARD == step:
+            return list(value.values())
+
+        return [value[step]] if isinstance(step, str) and step in value else []
+
+    elif isinstance(value, list):
+        if WILDCARD == step:
+            return value
+
+        return value[step:step + 1] if isinstance(step, int) else []
+
+    return []
+
+def _resolve(value, node, found):
+    """ Record the paths below node in an already decoded value. """
+    for step, children in list(node.steps.items()) + [(WILDCARD, node.wildcards)]:
+        for child_value in _step_values(value, step):
+            for child in children:
+                for path in child.paths:
+                    found.setdefault(path, []).append(child_value)
+                _resolve(child_value, child, found)
+
+def extract(s, paths, encoding="utf-8"):
+    """
+    Pick the values at ``paths`` out of a DSON document (str or bytes-like)
+    without building the rest of it. Paths are field names separated by
+    dots, with ``[n]`` for array elements and ``*`` or ``[*]`` for every
+    field or element, e.g. ``"config.limits.max"`` or ``"users[*].name"``.
+
+    Values of subtrees that no path leads into are skipped (see
+    :func:`skip_value`) without being built, or checked beyond their
+    structure. Like :func:`loads`, only the last of the fields with the
+    same name in an object counts.
+
+    :return: Dict of path to its value, for the paths found in the
+             document; the value of a path with wildcards is the list of
+             every value it matches.
+    """
+    if isinstance(paths, str):
+        raise TypeError("Such paths must be a list of paths, not a str")
+
+    if not isinstance(s, str):
+        if not is_ascii_compatible(encoding):
+            s = str(s, encoding)
+        elif not isinstance(s, (bytes, bytearray, mmap_module.mmap)):
+            s = memoryview(s).cast("B")
+
+    paths = tuple(paths)
+    root = _compile_paths(paths)
+    syntax = TEXT_SYNTAX if isinstance(s, str) else BYTES_SYNTAX
+    text_encoding = None if syntax is TEXT_SYNTAX else encoding
+    SUCH, SO, MANY, WOW, IS, AND, ALSO = syntax.keywords
+    constants = syntax.constants
+    separators = syntax.separators
+    value_match = syntax.value_match
+    token_match = syntax.token_match
+    string_match = syntax.string_match
+
+    parser = None
+    stream = StringStream(s)
+
+    def decode(pos):
+        # :return: (value at pos, position after it)
+        nonlocal parser
+        match = value_match(s, pos)
+        if match is not None:
+            index = match.lastindex
+            if 1 == index:
+                value = match.group(1)
+                return (value if text_encoding is None else value.decode(text_encoding)), match.end()
+
+            elif 3 == index:
+                stream._pos = match.end()
+                number = match.group(3)
+                return convert_number(stream, number if text_encoding is None else number.decode("ascii")), match.end()
+
+            elif match.group(2) in constants:
+                return CONSTANTS[constants[match.group(2)]], match.end()
+
+        if parser is None:
+            parser = DescentParser(encoding=encoding, deep=True)
+
+        stream._pos = pos
+        return parser.parse(stream), stream._pos
+
+    def token_at(pos):
+        match = token_match(s, pos)
+        return match.group(1), match.end()
+
+    def fail_token(token, pos, msg):
+        if not token and len(s) == pos:
+            _lazy_fail(s, pos, "Encountered EOF while scanning for token", VeryUnexpectedEndException)
+        _lazy_fail(s, pos, msg.format(syntax.show_token(token)))
+
+    def skip(pos):
+        # Strings, numbers and constants in one match, the rest by skip_value()
+        match = value_match(s, pos)
+        if match is not None and (match.lastindex != 2 or match.group(2) in constants):
+            return match.end()
+        return skip_value(s, pos, syntax)
+
+    def walk(pos, node, found):
+        # :return: the position after the value at pos, whose values of
+        # the paths below node are added to found
+        if node.paths:
+            value, pos = decode(pos)
+            for path in node.paths:
+                found.setdefault(path, []).append(value)
+            _resolve(value, node, found)
+            return pos
+
+        steps = node.steps
+        wildcards = node.wildcards
+
+        match = value_match(s, pos)
+        token = match.group(2) if match is not None else None
+        if SUCH == token:
+            token, end = token_at(match.end())
+            if WOW == token:
+                return end
+
+            skip_fields = node.field_skipper(syntax, encoding)
+            fields = {} # name: what its value matched, replaced by a later field of that name
+            pos = match.end()
+            while True:
+                if skip_fields is not None:
+                    pos = skip_fields(s, pos).end()
+
+                match = string_match(s, pos)
+                if match is not None:
+                    name = match.group(1)
+                    pos = match.end()
+                    if text_encoding is not None:
+                        name = name.decode(text_encoding)
+                else:
+                    name, pos = decode(pos)
+                    if not isinstance(name, str):
+                        _lazy_fail(s, pos, "Unexpected {!r} where a field name was expected".format(name))
+
+                token, pos = token_at(pos)
+                if IS != token:
+                    fail_token(token, pos, "Expected 'is' after field name, got token {!r}!")
+
+                children = steps.get(name, []) + wildcards
+                if not children:
+                    pos = skip(pos)
+                else:
+                    fields[name] = matched = {}
+                    pos = walk(pos, children[0] if 1 == len(children) else _PathNode.merge(children), matched)
+
+                token, pos = token_at(pos)
+                if token in separators:
+                    continue
+
+                elif WOW == token:
+                    for matched in fields.values():
+                        for path, values in matched.items():
+                            found.setdefault(path, []).extend(values)
+                    return pos
+
+                fail_token(token, pos, "Expected [,.!?] or 'wow'; got {!r}")
+
+        elif SO == token:
+            last_index = node.last_index
+            pos = match.end()
+            index = 0
+            while True:
+                # Nothing wanted from the rest of the array
+                if last_index is not None and index > last_index:
+                    return skip_container(s, pos, SO, syntax)
+
+                # Like loads, accept 'many' wherever an element may start
+                token, end = token_at(pos)
+                if MANY == token:
+                    return end
+
+                children = steps.get(index, []) + wildcards
+                if not children:
+                    pos = skip(pos)
+                elif 1 == len(children):
+                    pos = walk(pos, children[0], found)
+                else:
+                    pos = walk(pos, _PathNode.merge(children), found)
+                index += 1
+
+                token, pos = token_at(pos)
+                if AND == token or ALSO == token:
+                    continue
+
+                elif MANY == token:
+                    return pos
+
+                fail_token(token, pos, "Expected 'and', 'also', or 'many', got {!r}")
+
+        # Not a container: the paths below node lead nowhere
+        return skip(pos)
+
+    found = {}
+    stream._pos = syntax.whitespace_match(s, walk(0, root, found)).end()
+    if not stream.eof():
+        raise ManyParseException(stream, "Extra data after complete DSON document")
+
+    result = {}
+    for path in paths:
+        values = found.get(path, [])
+        if WILDCARD in parse_path(path):
+            result[path] = values
+        elif values:
+            result[path] = values[-1]
+
+    return result
+
+## Validation
+
+VALIDATE_DECODE_CHUNK_SIZE = 64 * 1024
+
+def _is_well_formed(string, syntax):
+    """
+    :return: True if string holds one well-formed DSON document, checked
+             with the ``valid_*`` patterns of syntax and a stack of the open
+             containers, without building anything.
+    """
+    value_match = syntax.valid_value_match
+    object_start_match = syntax.valid_object_start_match
+    object_next_match = syntax.valid_object_next_match
+    array_next_match = syntax.valid_array_next_match
+    OBJECT = 1
+    ARRAY = 2
+
+    containers = bytearray()
+    pos = 0
+    while True:
+        # A value (or the 'many' ending an array) at pos
+        match = value_match(string, pos)
+        if match is None:
+            return False
+
+        pos = match.end()
+        kind = match.lastindex
+        if 2 == kind:
+            match = object_start_match(string, pos)
+            if match is None:
+                return False
+
+            pos = match.end()
+            if match.lastindex is None:
+                # Field name and 'is' read: the field value is next
+                containers.append(OBJECT)
+                continue
+
+        elif 3 == kind:
+            containers.append(ARRAY)
+            continue
+
+        elif 4 == kind:
+            if not containers or ARRAY != containers[-1]:
+                return False
+            containers.pop()
+
+        # A complete value: move on to the next value of the containers it
+        # closes, or to the end of the document
+        while True:
+            if not containers:
+                return len(string) == syntax.whitespace_match(string, pos).end()
+
+            elif OBJECT == containers[-1]:
+                match = object_next_match(string, pos)
+            else:
+                match = array_next_match(string, pos)
+
+            if match is None:
+                return False
+
+            pos = match.end()
+            if match.lastindex is None:
+                break
+
+            containers.pop()
+
+def _decodes(data, encoding):
+    """ :return: True if bytes-like data is valid in ``encoding``, checked a chunk at a time. """
+    if isinstance(data, (bytes, bytearray)) and data.isascii():
+        return True
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    data = memoryview(data).cast("B")
+    try:
+        for start in range(0, len(data), VALIDATE_DECODE_CHUNK_SIZE):
+            decoder.decode(data[start:start + VALIDATE_DECODE_CHUNK_SIZE])
+        decoder.decode(b"", True)
+
+    except UnicodeDecodeError:
+        return False
+
+    return True
+
+def validate(s, encoding="utf-8"):
+    """
+    Check that s (str or bytes-like in ``encoding``) is a DSON document
+    :func:`loads` (or :func:`loadb`) would accept, without building any
+    of it: the document is only matched against patterns of valid lexemes,
+    keeping a stack of the containers open. Memory use does not grow with
+    the size of the document, only with its nesting.
+
+    Raises the :exc:`ManyParseException` :func:`loads` would raise if it is
+    not; the error is found by parsing the document with :func:`loads`
+    again, so failures cost as much as a full parse.
+    """
+    if isinstance(s, str):
+        if not _is_well_formed(s, TEXT_SYNTAX):
+            loads(s)
+
+    elif not is_ascii_compatible(encoding):
+        validate(str(s, encoding))
+
+    else:
+        data = s if isinstance(s, (bytes, bytearray, mmap_module.mmap)) else memoryview(s).cast("B")
+        if not _is_well_formed(data, BYTES_SYNTAX) or not _decodes(data, encoding):
+            loadb(data, encoding)
+
+def is_valid(s, encoding="utf-8"):
+    """ :return: True if :func:`validate` accepts s """
+    try:
+        validate(s, encoding)
+
+    except (ManyParseException, UnicodeDecodeError):
+        return False
+
+    return True
+
+## Schema-compiled parsers
+
+SCHEMA_SCALARS = {int: "int", float: "float", str: "str", bool: "bool", object: "any"}
+
+# Patterns of the generated parsers
+_SCHEMA_WS = r"[ \t\v\r\n]*"
+_SCHEMA_END = r"(?![a-z,.!?])"
+SCHEMA_PATTERNS = {
+    "EMPTY": _SCHEMA_WS + r"empty" + _SCHEMA_END,
+    "SUCH": _SCHEMA_WS + r"such" + _SCHEMA_END,
+    "SO": _SCHEMA_WS + r"so" + _SCHEMA_END,
+    "WOW": _SCHEMA_WS + r"wow" + _SCHEMA_END,
+    "MANY": _SCHEMA_WS + r"many" + _SCHEMA_END,
+    "IS": _SCHEMA_WS + r"is" + _SCHEMA_END,
+    "OBJECT_NEXT": _SCHEMA_WS + r"(?:[,.!?]|(wow))" + _SCHEMA_END, # group 1: 'wow' rather than a separator
+    "ARRAY_NEXT": _SCHEMA_WS + r"(?:and|also|(many))" + _SCHEMA_END, # group 1: 'many' rather than 'and'/'also'
+    "WHITESPACE": WHITESPACE_RE.pattern,
+}
+# Scalar values: (pattern, number of groups, expression of the value of a
+# match m whose groups start at {0})
+SCHEMA_SCALAR_PATTERNS = {
+    "int": (r"(-?[0-7]+)(?![-0-9.veryVERY])", 1, "int(m.group({0}), 8)"),
+    "float": (r"(-?[0-7]+)(?:\.([0-7]+))?(?:(?i:very)(-?[0-7]+))?(?![-0-9.veryVERY])", 3, "float_value(m, {0})"),
+    "str": (r'"([^"\\]*)"', 1, "m.group({0})"),
+    "bool": (r"(?:(yes)|no)" + _SCHEMA_END, 1, "m.group({0}) is not None"),
+    "none": (r"empty" + _SCHEMA_END, 0, "None"),
+}
+
+def _normalize_schema(schema):
+    """
+    :return: Hashable form of a :func:`compile_schema` schema: ``(kind,)``
+             for scalars, ``("nullable", node)``, ``("object", ((name,
+             node), ...))`` or ``("array", node)``
+    """
+    if isinstance(schema, tuple):
+        kinds = [kind for kind in schema if kind is not None and kind is not type(None)]
+        if len(kinds) > 1:
+            raise TypeError("Such union, very unsupported: {!r}".format(schema))
+
+        elif not kinds:
+            return ("none",)
+
+        node = _normalize_schema(kinds[0])
+        return node if len(kinds) == len(schema) or node[0] in ("none", "any") else ("nullable", node)
+
+    elif schema is None or schema is type(None):
+        return ("none",)
+
+    elif isinstance(schema, type) and schema in SCHEMA_SCALARS:
+        return (SCHEMA_SCALARS[schema],)
+
+    elif isinstance(schema, dict):
+        for name in schema:
+            if not isinstance(name, str):
+                raise TypeError("Such field name, not a str: {!r}".format(name))
+
+        return ("object", tuple((name, _normalize_schema(value)) for name, value in schema.items()))
+
+    elif isinstance(schema, list) and 1 == len(schema):
+        return ("array", _normalize_schema(schema[0]))
+
+    raise TypeError("Such schema, very unknown: {!r}".format(schema))
+
+def _schema_fail(string, pos, msg):
+    """ Raise for a non-conforming document: VeryUnexpectedEndException if only whitespace is left. """
+    syntax = TEXT_SYNTAX if isinstance(string, str) else BYTES_SYNTAX
+    end = syntax.whitespace_match(string, pos).end()
+    if len(string) == end:
+        _lazy_fail(string, end, "Encountered EOF while scanning for {}".format(msg), VeryUnexpectedEndException)
+    _lazy_fail(string, end, "Expected {}, got {!r}".format(msg, syntax.show(string[end])))
+
+def _schema_float(match, first):
+    """ :return: The float of a "float" scalar pattern match, its groups numbered from first """
+    int_part, frac_part, exponent = match.group(first, first + 1, first + 2)
+    if frac_part is None and exponent is None:
+        return float(int(int_part, 8))
+
+    negative = int_part[:1] in ("-", b"-")
+    frac_part = frac_part or int_part[:0]
+    return octal_to_float(negative, int_part[1:] + frac_part if negative else int_part + frac_part,
+                          len(frac_part), int(exponent or "0", 8))
+
+SCHEMA_TYPES = {
+    "int": (int,),
+    "float": (int, float),
+    "str": (str,),
+    "bool": (bool,),
+    "none": (type(None),),
+    "object": (dict,),
+    "array": (list,),
+}
+
+def _schema_convert(string, pos, value, kinds):
+    """ :return: value, if it is a value of one of the (declared) ``kinds``; raise otherwise. """
+    for kind in kinds:
+        if isinstance(value, SCHEMA_TYPES[kind]) and (kind in ("bool", "none") or not isinstance(value, bool)):
+            return float(value) if "float" == kind else value
+
+    pos = (TEXT_SYNTAX if isinstance(string, str) else BYTES_SYNTAX).whitespace_match(string, pos).end()
+    _lazy_fail(string, pos, "Expected {} value, got {}".format(" or ".join(kinds), type(value).__name__))
+
+class _SchemaCompiler(object):
+    """ Generates the source of the parse functions of one normalized schema. """
+    def __init__(self, node, is_bytes):
+        self.is_bytes = is_bytes
+        self.patterns = dict(SCHEMA_PATTERNS)
+        self.pattern_names = {}
+        self.functions = []
+        self.names = {} # (kind, node): function name, to generate each function once
+        self.count = 0
+        root = self.value(node, "        ")
+        self.functions.append("\n".join(["    def parse(s):", "        pos = 0"] + root + [
+            "        if len(s) != WHITESPACE(s, pos).end():",
+            "            extra_data(s, pos)",
+            "        return v"]))
+
+    def source(self):
+        patterns = ["    {} = match_pattern({!r})".format(name, pattern) for name, pattern in sorted(self.patterns.items())]
+        return "def make(encoding):\n" + "\n".join(patterns) + "\n\n" + "\n\n".join(self.functions) + "\n\n    return parse\n"
+
+    def new_name(self, prefix):
+        self.count += 1
+        return "{}_{}".format(prefix, self.count)
+
+    def pattern(self, pattern, prefix):
+        """ :return: Name of the match function of pattern """
+        name = self.pattern_names.get(pattern)
+        if name is None:
+            name = self.pattern_names[pattern] = self.new_name(prefix)
+            self.patterns[name] = pattern
+        return name
+
+    def text(self, expression):
+        return expression + ".decode(encoding)" if self.is_bytes else expression
+
+    def scalar(self, node, first):
+        """
+        :return: ``(pattern, groups, expression)`` of a scalar node, its
+                 groups numbered from ``first``; None for other nodes
+        """
+        kind = node[0]
+        if "nullable" == kind:
+            scalar = self.scalar(node[1], first + 1)
+            if scalar is None:
+                return None
+
+            pattern, groups, expression = scalar
+            return ("(?:(empty){}|{})".format(_SCHEMA_END, pattern), groups + 1,
+                    "None if m.group({}) is not None else {}".format(first, expression))
+
+        elif kind not in SCHEMA_SCALAR_PATTERNS:
+            return None
+
+        pattern, groups, expression = SCHEMA_SCALAR_PATTERNS[kind]
+        expression = expression.format(first)
+        return pattern, groups, self.text(expression) if "str" == kind else expression
+
+    @staticmethod
+    def kinds(node):
+        """ :return: The kinds of values node accepts, for slow() """
+        return (node[1][0], "none") if "nullable" == node[0] else (node[0],)
+
+    def value(self, node, indent, on_miss=()):
+        """
+        :return: Lines parsing a value of node at ``pos`` into ``v``, running
+                 the on_miss lines first if it is not there as expected
+        """
+        slow = [indent + "    " + line for line in on_miss] + [indent + "    v, pos = slow(s, pos, {!r})".format(self.kinds(node))]
+
+        scalar = self.scalar(node, 1)
+        if scalar is not None:
+            pattern, _, expression = scalar
+            return [indent + "m = {}(s, pos)".format(self.pattern(_SCHEMA_WS + pattern, "VALUE")),
+                    indent + "if m is None:"] + slow + [
+                    indent + "else:",
+                    indent + "    pos = m.end()",
+                    indent + "    v = " + expression]
+
+        kind = node[0]
+        if "nullable" == kind:
+            return [indent + "m = EMPTY(s, pos)",
+                    indent + "if m is not None:",
+                    indent + "    pos = m.end()",
+                    indent + "    v = None",
+                    indent + "else:"] + self.value(node[1], indent + "    ", on_miss)
+
+        elif "any" == kind:
+            return [indent + line for line in on_miss] + [indent + "v, pos = any_value(s, pos)"]
+
+        elif "object" == kind:
+            pattern, function = "SUCH", self.object_function(node[1])
+        else:
+            pattern, function = "SO", self.array_function(node[1])
+
+        return [indent + "m = {}(s, pos)".format(pattern), indent + "if m is None:"] + slow + [
+                indent + "else:",
+                indent + "    v, pos = {}(s, m.end())".format(function)]
+
+    def value_function(self, node):
+        """ :return: Name of a function parsing a value of node at pos """
+        name = self.names.get(("value", node))
+        if name is None:
+            name = self.names[("value", node)] = self.new_name("parse_value")
+            self.functions.append("\n".join(["    def {}(s, pos):".format(name)] + self.value(node, "        ") +
+                                            ["        return v, pos"]))
+        return name
+
+    def object_function(self, fields):
+        name = self.names.get(("object", fields))
+        if name is not None:
+            return name
+
+        name = self.names[("object", fields)] = self.new_name("parse_object")
+        finish = "return finish_object(s, pos, obj, {!r})".format(tuple(field for field, _ in fields))
+        lines = ["    def {}(s, pos):".format(name),
+                 "        obj = {}",
+                 "        m = WOW(s, pos)",
+                 "        if m is not None:",
+                 "            pos = m.end()",
+                 "            " + finish]
+
+        # The fields in their expected order, with the general loop of
+        # name_fields() to fall back on
+        for field, node in fields:
+            if '"' in field or "\\" in field:
+                # Escaped in DSON: left to the general loop
+                break
+
+            field_pattern = r'{}"{}"{}'.format(_SCHEMA_WS, re.escape(field), SCHEMA_PATTERNS["IS"])
+            general = ["m = {}(s, pos)".format(self.pattern(field_pattern, "FIELD")),
+                       "if m is None:",
+                       "    return {}_fields(s, pos, obj)".format(name),
+                       "pos = m.end()"]
+            general += self.value(node, "")
+            general += ["obj[{!r}] = v".format(field),
+                        "m = OBJECT_NEXT(s, pos)",
+                        "if m is None:",
+                        "    fail(s, pos, \"[,.!?] or 'wow'\")",
+                        "pos = m.end()",
+                        "if m.lastindex is not None:",
+                        "    " + finish]
+
+            scalar = self.scalar(node, 1)
+            if scalar is None:
+                lines += ["        " + line for line in general]
+                continue
+
+            # Name, scalar value and separator in one match
+            pattern, groups, expression = scalar
+            combined = field_pattern + _SCHEMA_WS + pattern + SCHEMA_PATTERNS["OBJECT_NEXT"]
+            lines += ["        m = {}(s, pos)".format(self.pattern(combined, "FIELD_VALUE")),
+                      "        if m is not None:",
+                      "            pos = m.end()",
+                      "            obj[{!r}] = {}".format(field, expression),
+                      "            if {} == m.lastindex:".format(groups + 1),
+                      "                " + finish,
+                      "        else:"] + ["            " + line for line in general]
+
+        lines.append("        return {}_fields(s, pos, obj)".format(name))
+        self.functions.append("\n".join(lines))
+
+        parsers = ", ".join("{!r}: {}".format(field, self.value_function(node)) for field, node in fields)
+        self.functions.append("\n".join([
+            "    {}_parsers = {{{}}}".format(name, parsers),
+            "",
+            "    def {}_fields(s, pos, obj):".format(name),
+            "        while True:",
+            "            field, pos = field_name(s, pos)",
+            "            parse_field = {}_parsers.get(field)".format(name),
+            "            if parse_field is None:",
+            "                pos = skip(s, pos)",
+            "            else:",
+            "                obj[field], pos = parse_field(s, pos)",
+            "            m = OBJECT_NEXT(s, pos)",
+            "            if m is None:",
+            "                fail(s, pos, \"[,.!?] or 'wow'\")",
+            "            pos = m.end()",
+            "            if m.lastindex is not None:",
+            "                " + finish]))
+
+        return name
+
+    def array_function(self, node):
+        name = self.names.get(("array", node))
+        if name is not None:
+            return name
+
+        name = self.names[("array", node)] = self.new_name("parse_array")
+        lines = ["    def {}(s, pos):".format(name),
+                 "        arr = []",
+                 "        append = arr.append",
+                 "        while True:"]
+
+        scalar = self.scalar(node, 1)
+        if scalar is not None:
+            # Element and 'and'/'also'/'many' in one match
+            pattern, groups, expression = scalar
+            combined = _SCHEMA_WS + pattern + SCHEMA_PATTERNS["ARRAY_NEXT"]
+            lines += ["            m = {}(s, pos)".format(self.pattern(combined, "ELEMENT")),
+                      "            if m is not None:",
+                      "                pos = m.end()",
+                      "                append({})".format(expression),
+                      "                if {} == m.lastindex:".format(groups + 1),
+                      "                    return arr, pos",
+                      "                continue"]
+
+        # Like loads, accept 'many' wherever an element may start
+        lines += self.value(node, "            ", ["m = MANY(s, pos)", "if m is not None:", "    return arr, m.end()"])
+        lines += ["            append(v)",
+                  "            m = ARRAY_NEXT(s, pos)",
+                  "            if m is None:",
+                  "                fail(s, pos, \"'and', 'also', or 'many'\")",
+                  "            pos = m.end()",
+                  "            if m.lastindex is not None:",
+                  "                return arr, pos"]
+
+        self.functions.append("\n".join(lines))
+        return name
+
+class SchemaParser(object):
+    """
+    Parser generated by :func:`compile_schema` for documents of one shape.
+    ``source`` is the Python source of its parse functions.
+    """
+    def __init__(self, node):
+        self.node = node
+        self.source = _SchemaCompiler(node, False).source()
+        self._bytes_source = _SchemaCompiler(node, True).source()
+        self._text_parse = self._make(self.source, None)
+        self._bytes_parsers = {}
+
+    @staticmethod
+    def _make(source, encoding):
+        syntax = TEXT_SYNTAX if encoding is None else BYTES_SYNTAX
+        scanner = get_scanner()
+        parser = DescentParser(encoding=encoding or "utf-8", deep=True)
+
+        def match_pattern(pattern):
+            return re.compile(pattern if encoding is None else pattern.encode(encoding)).match
+
+        def any_value(s, pos):
+            stream = StringStream(s)
+            stream._pos = pos
+            return parser.parse(stream), stream._pos
+
+        def slow(s, pos, kinds):
+            value, end = any_value(s, pos)
+            return _schema_convert(s, pos, value, kinds), end
+
+        def field_name(s, pos):
+            match = syntax.string_match(s, pos)
+            if match is not None:
+                name = match.group(1) if encoding is None else match.group(1).decode(encoding)
+                pos = match.end()
+            else:
+                stream = StringStream(s)
+                stream._pos = pos
+                name = scanner.read_string(stream) if encoding is None else read_sliced_string(stream, encoding)
+                pos = stream._pos
+
+            match = syntax_is(s, pos)
+            if match is None:
+                _schema_fail(s, pos, "'is' after field name")
+            return name, match.end()
+
+        def finish_object(s, pos, obj, names):
+            if len(obj) != len(names):
+                missing = [name for name in names if name not in obj]
+                _lazy_fail(s, pos, "Missing field {!r}".format(missing[0]))
+            return obj, pos
+
+        syntax_is = match_pattern(SCHEMA_PATTERNS["IS"])
+        namespace = {
+            "match_pattern": match_pattern,
+            "any_value": any_value,
+            "slow": slow,
+            "field_name": field_name,
+            "finish_object": finish_object,
+            "fail": _schema_fail,
+            "extra_data": lambda s, pos: _lazy_fail(s, syntax.whitespace_match(s, pos).end(),
+                                                    "Extra data after complete DSON document"),
+            "float_value": _schema_float,
+            "skip": lambda s, pos: skip_value(s, pos, syntax),
+        }
+        exec(compile(source, "<schema>", "exec"), namespace)
+        return namespace["make"](encoding)
+
+    def loads(self, s):
+        """ Deserialize str s, which must be a DSON document of the schema's shape. """
+        return self._text_parse(s)
+
+    __call__ = loads
+
+    def loadb(self, b, encoding="utf-8"):
+        """ Like :meth:`loads`, for a bytes-like document in ``encoding`` (see :func:`loadb`). """
+        if not is_ascii_compatible(encoding):
+            return self._text_parse(str(b, encoding))
+
+        parse = self._bytes_parsers.get(encoding)
+        if parse is None:
+            parse = self._bytes_parsers[encoding] = self._make(self._bytes_source, encoding)
+
+        data = b if isinstance(b, (bytes, bytearray, mmap_module.mmap)) else memoryview(b).cast("B")
+        try:
+            return parse(data)
+
+        except UnicodeDecodeError as error:
+            raise ManyParseException(StringStream(data), "Such invalid {} in string: {}".format(encoding, error.reason))
+
+@lru_cache(maxsize=128)
+def _compile_node(node):
+    return SchemaParser(node)
+
+def compile_schema(schema):
+    """
+    Generate (once, then cached) a parser specialized for documents of one
+    shape, e.g.::
+
+        parse = compile_schema({"id": int, "name": str, "tags": [str],
+                                "owner": (str, None), "location": {"lat": float, "lon": float}})
+        record = parse(document)
+
+    A schema is a dict of field names to schemas (an object), a list of one
+    schema (an array of such values), ``int``, ``float`` (which takes
+    integers too), ``str``, ``bool``, ``None`` (``empty``), ``object`` (any
+    value), or a tuple of a schema and ``None`` for a value that may be
+    ``empty``.
+
+    Fields are expected in the schema's order, and matched with one regular
+    expression each while they come in that order (name, ``is``, and for
+    scalars the value and the separator or ``wow`` too); after a field out
+    of order, the rest are looked up by name. Values the expressions do not
+    cover (e.g. escaped strings) are parsed the general way. Fields not in
+    the schema are skipped over without being built (see
+    :func:`skip_value`). Values are converted straight to the declared
+    types.
+
+    Documents of another shape are rejected with :exc:`ManyParseException`
+    (missing fields and values of the wrong type included), or
+    :exc:`VeryUnexpectedEndException` if they are cut short.
+    """
+    return _compile_node(_normalize_schema(schema))
+
+## iterparse() events
+START_OBJECT = "start_object"
+KEY          = "key"
+SCALAR       = "scalar"
+END_OBJECT   = "end_object"
+START_ARRAY  = "start_array"
+END_ARRAY    = "end_array"
+
+def iterparse(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8"):
+    """
+    Parse a DSON document from a str, bytes or file object, generating
+    ``(event, value, path)`` tuples instead of building Python containers:
+
+    * ``(START_OBJECT, None, path)`` and ``(END_OBJECT, None, path)``
+    * ``(START_ARRAY, None, path)`` and ``(END_ARRAY, None, path)``
+    * ``(KEY, name, path)`` for each field name of the object at path
+    * ``(SCALAR, value, path)`` for strings, numbers, ``yes``, ``no`` and ``empty``
+
+    ``path`` is a tuple of the field names and array indices leading from the
+    document root to the value. File objects are read ``chunk_size`` units
+    at a time, so memory use does not grow with the document.
+
+    Raises :exc:`ManyParseException` once the document turns out to be invalid;
+    events before that point have already been generated.
+    """
+    buffer = _ChunkBuffer(encoding)
+    fp = None
+    if hasattr(source, "read"):
+        fp = source
+    else:
+        buffer.feed(source)
+        buffer.close()
+
+    scanner = get_scanner()
+    read_token = scanner.read_token
+    read_string = scanner.read_string
+    read_value = scanner.read_value
+    read = partial(_read_step, fp, buffer, chunk_size, rewind=True)
+
+    def read_object_start(stream):
+        # True if a field name follows 'such', False for an empty object
+        scanner.strip_whitespace(stream)
+
+        if stream.eof():
+            raise VeryUnexpectedEndException(stream, "Encountered EOF while scanning for string or 'wow'")
+
+        char = stream.peek()
+        if '"' == char:
+            return True
+
+        elif 'w' == char:
+            token = read_token(stream)
+            if "wow" == token:
+                return False
+
+            raise ManyParseException(stream, "Unexpected token {!r} after 'such'; expected 'wow' or string".format(token))
+
+        raise ManyParseException(stream, "Unexpected character {!r} after 'such'; "
+                                         "expected 'wow' or string".format(char))
+
+    path = []      # field names/array indices leading to the current value
+    is_object = [] # one entry per open container
+
+    state = SO_START
+    while SO_END != state:
+        if SO_START == state or SO_OBJECT_FIELD_VALUE == state or SO_ARRAY_VALUE == state:
+            value, value_type = read(read_value)
+
+            if SUCH_TOKEN != value_type:
+                yield SCALAR, value, tuple(path)
+                state = SO_END if not is_object else SO_OBJECT_NEXT if is_object[-1] else SO_ARRAY_NEXT
+
+            elif "such" == value:
+                state = SO_NEW_OBJECT
+
+            elif "so" == value:
+                state = SO_NEW_ARRAY
+
+            elif "many" == value and SO_ARRAY_VALUE == state:
+                state = SO_DECREMENT_NEST
+
+            else:
+                raise ManyParseException(buffer.stream, "Expected tokens 'such' or 'so', got {!r}!".format(value))
+
+        elif SO_NEW_OBJECT == state:
+            yield START_OBJECT, None, tuple(path)
+            is_object.append(True)
+            path.append(None)
+            state = SO_OBJECT_FIELD_NAME if read(read_object_start) else SO_DECREMENT_NEST
+
+        elif SO_NEW_ARRAY == state:
+            yield START_ARRAY, None, tuple(path)
+            is_object.append(False)
+            path.append(0)
+            state = SO_ARRAY_VALUE
+
+        elif SO_OBJECT_FIELD_NAME == state:
+            name = read(read_string)
+            token = read(read_token)
+
+            if "is" != token:
+                raise ManyParseException(buffer.stream, "Expected 'is' after field name, got token {!r}!".format(token))
+
+            yield KEY, name, tuple(path[:-1])
+            path[-1] = name
+            state = SO_OBJECT_FIELD_VALUE
+
+        elif SO_ARRAY_NEXT == state:
+            token = read(read_token)
+
+            if token in ("and", "also"):
+                path[-1] += 1
+                state = SO_ARRAY_VALUE
+
+            elif "many" == token:
+                state = SO_DECREMENT_NEST
+
+            else:
+                raise ManyParseException(buffer.stream, "Expected 'and', 'also', or 'many', got {!r}".format(token))
+
+        elif SO_OBJECT_NEXT == state:
+            token = read(read_token)
+
+            if token in (",", ".", "!", "?"):
+                state = SO_OBJECT_FIELD_NAME
+
+            elif "wow" == token:
+                state = SO_DECREMENT_NEST
+
+            else:
+                raise ManyParseException(buffer.stream, "Expected [,.!?] or 'wow'; got {!r}".format(token))
+
+        elif SO_DECREMENT_NEST == state:
+            path.pop()
+            yield (END_OBJECT if is_object.pop() else END_ARRAY), None, tuple(path)
+            state = SO_END if not is_object else SO_OBJECT_NEXT if is_object[-1] else SO_ARRAY_NEXT
+
+    _expect_end(fp, buffer, chunk_size, scanner.strip_whitespace)
+
+## JSON transcoding
+JSON_CONSTANTS = {
+    "yes": "true",
+    "no": "false",
+    "empty": "null",
+}
+
+def _json_number(stream, number):
+    """ :return: The JSON text of DSON number text, as ``json.dumps`` writes its value """
+    try:
+        value = int(number, 8) # such common case: an integer
+    except ValueError:
+        value = convert_number(stream, number)
+
+    if isinstance(value, float) and not math.isfinite(value):
+        return "Infinity" if value > 0 else "-Infinity"
+
+    try:
+        return repr(value)
+    except ValueError:
+        # Over sys.get_int_max_str_digits(): decimal conversion is quadratic
+        raise ManyParseException(stream, "Such number, too long for decimal: {} octal digits".format(len(number)))
+
+def transcode_to_json(src, dst, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8", ensure_ascii=False):
+    """
+    Rewrite the DSON document in src (a str, bytes or file object) as
+    compact JSON to the text file object dst, lexeme by lexeme, without
+    building any Python objects for its containers: ``such``/``wow``
+    become braces, ``so``/``many`` brackets, octal numbers decimal ones,
+    and strings are escaped the JSON way (``\\u`` escapes only for
+    control characters, or for all non-ASCII ones with ``ensure_ascii``).
+
+    File objects are read ``chunk_size`` units at a time, and dst is
+    written a few thousand lexemes at a time, so memory use does not grow
+    with the document. The output is that of ``json.dump(loads(src), dst,
+    separators=(",", ":"), ensure_ascii=ensure_ascii)``, except that
+    repeated field names are all written.
+
+    Raises :exc:`ManyParseException` once the document turns out to be
+    invalid; the JSON before that point has already been written.
+    """
+    buffer = _ChunkBuffer(encoding)
+    fp = None
+    if hasattr(src, "read"):
+        fp = src
+    else:
+        buffer.feed(src)
+        buffer.close()
+
+    value_match = VALUE_RE.match
+    token_match = TOKEN_RE.match
+    string_match = SIMPLE_STRING_RE.match
+    whitespace_match = WHITESPACE_RE.match
+    any_string_match = ANY_STRING_RE.match
+    valid_escapes_match = VALID_ESCAPES_RE.match
+    read_string = get_scanner().read_string
+    encode_string = json.encoder.encode_basestring_ascii if ensure_ascii else json.encoder.encode_basestring
+
+    out = []
+    append = out.append
+    is_object = [] # one entry per open container
+    string = buffer.stream._string
+    pos = buffer.stream._pos
+
+    def fail(at, msg, exception=ManyParseException):
+        buffer.stream._pos = at
+        raise exception(buffer.stream, msg)
+
+    def more(at, msg, fail_at=None):
+        # Read on from position at with another chunk: :return: the new
+        # position. At the end of input, fail with msg instead.
+        nonlocal string
+        if buffer.closed:
+            fail(whitespace_match(string, at).end() if fail_at is None else fail_at, msg, VeryUnexpectedEndException)
+
+        if out:
+            dst.write("".join(out))
+            del out[:]
+
+        buffer.stream._pos = at
+        buffer.fill(fp, chunk_size)
+        string = buffer.stream._string
+        return buffer.stream._pos
+
+    def other_string(at, msg, other_msg="Invalid value start character: {!r}"):
+        # A string with escapes at at, or one cut short: :return: its value
+        # and end, or None and the position to retry from with more input
+        start = whitespace_match(string, at).end()
+        if len(string) == start:
+            return None, more(at, msg)
+
+        elif QUOTE != string[start]:
+            fail(start, other_msg.format(string[start]))
+
+        # Unescape the whole string at once if it is complete and valid;
+        # otherwise leave it to the scanner for the error
+        match = any_string_match(string, start)
+        if match is not None:
+            end = match.end()
+            body = string[start + 1:end - 1]
+            if valid_escapes_match(body) is not None:
+                return ESCAPE_SEQUENCE_RE.sub(_unescape_sequence, body), end
+
+        stream = buffer.stream
+        stream._pos = start
+        try:
+            return read_string(stream), stream._pos
+
+        except VeryUnexpectedEndException:
+            if buffer.closed:
+                raise
+            return None, more(at, msg)
+
+    state = SO_START
+    comma = False # an 'and'/'also' was read: "," goes before the next element, not before ']'
+    try:
+        while SO_END != state:
+            if len(out) >= 4096:
+                dst.write("".join(out))
+                del out[:]
+
+            if SO_START == state or SO_OBJECT_FIELD_VALUE == state or SO_ARRAY_VALUE == state:
+                match = value_match(string, pos)
+                if match is None:
+                    value, pos = other_string(pos, "Encountered EOF while scanning for a value")
+                    if value is None:
+                        continue
+                    if comma:
+                        append(",")
+                        comma = False
+                    append(encode_string(value))
+
+                else:
+                    index = match.lastindex
+                    if comma and not (2 == index and "many" == match.group(2)):
+                        append(",")
+                        comma = False
+
+                    if 1 == index:
+                        append(encode_string(match.group(1)))
+
+                    elif 3 == index:
+                        buffer.stream._pos = match.end()
+                        append(_json_number(buffer.stream, match.group(3)))
+
+                    else:
+                        token = match.group(2)
+                        if token in JSON_CONSTANTS:
+                            append(JSON_CONSTANTS[token])
+
+                        elif "such" == token:
+                            append("{")
+                            is_object.append(True)
+                            pos = match.end()
+                            state = SO_NEW_OBJECT
+                            continue
+
+                        elif "so" == token:
+                            append("[")
+                            is_object.append(False)
+                            pos = match.end()
+                            state = SO_ARRAY_VALUE
+                            continue
+
+                        elif "many" == token and SO_ARRAY_VALUE == state:
+                            append("]")
+                            is_object.pop()
+                            comma = False
+
+                        elif SO_START == state:
+                            fail(match.end(), "Expected tokens 'such' or 'so', got {!r}!".format(token))
+
+                        else:
+                            fail(match.end(), "Expected tokens 'such', 'so' while reading object value, got {!r}".format(token))
+
+                    pos = match.end()
+
+                state = SO_END if not is_object else SO_OBJECT_NEXT if is_object[-1] else SO_ARRAY_NEXT
+
+            elif SO_NEW_OBJECT == state or SO_OBJECT_FIELD_NAME == state:
+                # "field_name" is, or 'wow' right after 'such'
+                match = string_match(string, pos)
+                if match is not None:
+                    name, end = match.group(1), match.end()
+                else:
+                    end = whitespace_match(string, pos).end()
+                    if SO_NEW_OBJECT != state or len(string) == end or QUOTE == string[end]:
+                        pass
+
+                    elif "w" == string[end]:
+                        match = token_match(string, end)
+                        if "wow" != match.group(1):
+                            fail(match.end(), "Unexpected token {!r} after 'such'; expected 'wow' or string".format(match.group(1)))
+
+                        append("}")
+                        is_object.pop()
+                        pos = match.end()
+                        state = SO_END if not is_object else SO_OBJECT_NEXT if is_object[-1] else SO_ARRAY_NEXT
+                        continue
+
+                    else:
+                        fail(end, "Unexpected character {!r} after 'such'; expected 'wow' or string".format(string[end]))
+
+                    name, end = other_string(pos, "Encountered EOF while scanning for string or 'wow'" if SO_NEW_OBJECT == state
+                                                  else "Encountered EOF while scanning for string",
+                                             "Expected quote character; got {!r} instead.")
+                    if name is None:
+                        pos = end
+                        continue
+
+                match = token_match(string, end)
+                token = match.group(1)
+                if "is" != token:
+                    if not token and len(string) == match.end():
+                        pos = more(pos, "Encountered EOF while scanning for token", match.end())
+                        continue
+                    fail(match.end(), "Expected 'is' after field name, got token {!r}!".format(token))
+
+                append(encode_string(name))
+                append(":")
+                pos = match.end()
+                state = SO_OBJECT_FIELD_VALUE
+
+            else:
+                match = token_match(string, pos)
+                token = match.group(1)
+                if SO_OBJECT_NEXT == state and token in OBJECT_SEPARATORS:
+                    append(",")
+                    state = SO_OBJECT_FIELD_NAME
+
+                elif SO_ARRAY_NEXT == state and ("and" == token or "also" == token):
+                    comma = True
+                    state = SO_ARRAY_VALUE
+
+                elif "wow" == token if SO_OBJECT_NEXT == state else "many" == token:
+                    append("}" if is_object.pop() else "]")
+                    state = SO_END if not is_object else SO_OBJECT_NEXT if is_object[-1] else SO_ARRAY_NEXT
+
+                elif not token and len(string) == match.end():
+                    pos = more(pos, "Encountered EOF while scanning for token")
+                    continue
+
+                elif SO_OBJECT_NEXT == state:
+                    fail(match.end(), "Expected [,.!?] or 'wow'; got {!r}".format(token))
+
+                else:
+                    fail(match.end(), "Expected 'and', 'also', or 'many', got {!r}".format(token))
+
+                pos = match.end()
+
+    finally:
+        # Whatever was transcoded, up to an error too
+        dst.write("".join(out))
+
+    buffer.stream._pos = pos
+    _expect_end(fp, buffer, chunk_size, get_scanner().strip_whitespace)
+
+## Serialization
+ARRAY_SEPARATOR  = " and "
+OBJECT_SEPARATOR = " , " # separators are tokens too; keep them apart from 'yes', 'wow', numbers...
+
+STRING_ESCAPE_RE = re.compile(r'["\\\x00-\x1f]')
+STRING_ESCAPE_ASCII_RE = re.compile(r'["\\]|[^\x20-\x7e]')
+ENCODE_ESCAPE_CHARS = dict((char, RSOLIDUS + escape) for escape, char in ESCAPE_CHARS.items() if "/" != escape)
+MAX_ESCAPED_CODE_POINT = 8 ** NUM_OCTAL_DIGITS_FOR_CODE_POINT - 1
+
+def _escape_char(match):
+    char = match.group()
+    try:
+        return ENCODE_ESCAPE_CHARS[char]
+
+    except KeyError:
+        code_point = ord(char)
+        if code_point > MAX_ESCAPED_CODE_POINT:
+            raise ValueError("Code point {:#x} is too big for a DSON octal escape".format(code_point))
+
+        return "\\u{:06o}".format(code_point)
+
+def encode_string(s, ensure_ascii=False):
+    """
+    Encode str s as a quoted DSON string. Only quotes, reverse solidi and
+    control characters are escaped, plus anything outside printable ASCII
+    if ``ensure_ascii`` is set.
+    """
+    pattern = STRING_ESCAPE_ASCII_RE if ensure_ascii else STRING_ESCAPE_RE
+
+    # Such common case: nothing to escape, wow
+    if pattern.search(s) is None:
+        return '"' + s + '"'
+
+    return '"' + pattern.sub(_escape_char, s) + '"'
+
+def encode_number(number):
+    """
+    Encode an int or float as a DSON (octal) number; the inverse of
+    :func:`read_number`. Floats are written exactly, using a ``very``
+    exponent for very large or very small magnitudes.
+    """
+    if not isinstance(number, float):
+        return format(number, "o")
+
+    if number != number or number in (float("inf"), float("-inf")):
+        raise ValueError("Out of range float values are not DSON compliant: {!r}".format(number))
+
+    sign = "-" if math.copysign(1.0, number) < 0 else ""
+    numerator, denominator = abs(number).as_integer_ratio()
+    if 0 == numerator:
+        return sign + "0.0"
+
+    # number == digits * 8 ** exponent, exactly; floats are binary fractions.
+    shift = denominator.bit_length() - 1 # denominator == 2 ** shift
+    places = -(-shift // 3)
+    digits = format(numerator << (3 * places - shift), "o")
+    stripped = digits.rstrip("0")
+    exponent = len(digits) - len(stripped) - places
+    digits = stripped
+
+    # Position of the octal point, counted from the left of digits
+    point = len(digits) + exponent
+
+    if point > 18 or point < -6:
+        return "{}{}.{}very{:o}".format(sign, digits[0], digits[1:] or "0", point - 1)
+
+    elif exponent >= 0:
+        return "{}{}{}.0".format(sign, digits, "0" * exponent)
+
+    elif point > 0:
+        return "{}{}.{}".format(sign, digits[:point], digits[point:])
+
+    return "{}0.{}{}".format(sign, "0" * -point, digits)
+
+_END = object()
+
+def iterencode(obj, ensure_ascii=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Encode obj as DSON, generating the output as strings of at least
+    ``chunk_size`` characters (except for the last one), so large documents
+    can be written out without building one giant string. ``chunk_size=None``
+    generates the whole document as a single string.
+
+    dicts become objects, lists and tuples arrays, str strings, int and float
+    numbers, and ``True``, ``False`` and ``None`` become ``yes``, ``no`` and
+    ``empty``. Raises :exc:`TypeError` for anything else.
+    """
+    parts = []
+    append = parts.append
+    size = 0 # characters in parts[:measured], the parts counted so far
+    measured = 0
+    markers = set()
+    stack = [] # (iterator over items, is_object, marker) for each open container
+
+    value = obj
+    while True:
+        if isinstance(value, str):
+            append(encode_string(value, ensure_ascii))
+
+        elif value is None:
+            append("empty")
+
+        elif value is True:
+            append("yes")
+
+        elif value is False:
+            append("no")
+
+        elif isinstance(value, (int, float)):
+            append(encode_number(value))
+
+        elif isinstance(value, (dict, list, tuple)):
+            is_object = isinstance(value, dict)
+            items = iter(value.items() if is_object else value)
+            item = next(items, _END)
+
+            if item is _END:
+                append("such wow" if is_object else "so many")
+
+            else:
+                if id(value) in markers:
+                    raise ValueError("Circular reference detected")
+                markers.add(id(value))
+                stack.append((items, is_object, id(value)))
+
+                if is_object:
+                    key, value = item
+                    if not isinstance(key, str):
+                        raise TypeError("Object keys must be str, not {}".format(type(key).__name__))
+
+                    append("such ")
+                    append(encode_string(key, ensure_ascii))
+                    append(" is ")
+
+                else:
+                    append("so ")
+                    value = item
+
+                # Go encode the first element
+                continue
+
+        else:
+            raise TypeError("Object of type {} is not DSON serializable".format(type(value).__name__))
+
+        if chunk_size is not None and len(parts) >= measured + 1024:
+            # Only count the parts added since the last check, and join
+            # them all just once, when the chunk is complete
+            size += sum(map(len, parts[measured:]))
+            measured = len(parts)
+            if size >= chunk_size:
+                yield "".join(parts)
+                del parts[:]
+                size = measured = 0
+
+        # Value done; continue with the next element of the innermost open
+        # container, closing containers that ran out of elements.
+        while stack:
+            items, is_object, marker = stack[-1]
+            item = next(items, _END)
+
+            if item is _END:
+                append(" wow" if is_object else " many")
+                markers.discard(marker)
+                stack.pop()
+
+            elif is_object:
+                key, value = item
+                if not isinstance(key, str):
+                    raise TypeError("Object keys must be str, not {}".format(type(key).__name__))
+
+                append(OBJECT_SEPARATOR)
+                append(encode_string(key, ensure_ascii))
+                append(" is ")
+                break
+
+            else:
+                append(ARRAY_SEPARATOR)
+                value = item
+                break
+
+        else:
+            break
+
+    if parts:
+        yield "".join(parts)
+
+def dumps(obj, ensure_ascii=False):
+    """
+    Serialize obj to a str containing a DSON document. See :func:`iterencode`.
+    """
+    return "".join(iterencode(obj, ensure_ascii, chunk_size=None))
+
+def dump(obj, fp, ensure_ascii=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Serialize obj as a DSON document to the text file object fp, writing it
+    in chunks of about ``chunk_size`` characters. See :func:`iterencode`.
+    """
+    for chunk in iterencode(obj, ensure_ascii, chunk_size):
+        fp.write(chunk)
+
+## Parallel parsing
+DEFAULT_BATCH_SIZE = 1000
+
+def _loads_batch(lines):
+    """
+    Worker side of :func:`loads_many`. Results travel back as one marshal
+    blob per batch, which is much cheaper to move between processes than
+    pickling every object tree.
+    """
+    results = []
+    errors = []
+    for offset, line in enumerate(lines):
+        try:
+            results.append(loads(line))
+
+        except ValueError as err:
+            results.append(None)
+            errors.append((offset, str(err)))
+
+    try:
+        return marshal.dumps(results), errors, {}
+
+    except ValueError:
+        # Too deeply nested to marshal (or pickle): such lines go back as
+        # they are, to be parsed again by the caller
+        deep = {}
+        for offset, obj in enumerate(results):
+            try:
+                marshal.dumps(obj)
+            except ValueError:
+                deep[offset] = lines[offset]
+                results[offset] = None
+
+        return marshal.dumps(results), errors, deep
+
+def _batch_results(start, batch_result):
+    blob, errors, deep = batch_result
+    errors = dict(errors)
+    for offset, obj in enumerate(marshal.loads(blob)):
+        if offset in deep:
+            obj = loads(deep[offset])
+        yield start + offset, obj, errors.get(offset)
+
+def _batches(lines, batch_size):
+    start = 0
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == batch_size:
+            yield start, batch
+            start += batch_size
+            batch = []
+
+    if batch:
+        yield start, batch
+
+def _ordered_results(executor, batches, max_pending, function, *args):
+    """
+    Submit ``function(batch, *args)`` to executor for every ``(start,
+    batch)`` of batches, with at most ``max_pending`` of them in flight so
+    huge inputs are not read into memory all at once, and generate
+    ``(start, result)`` in input order.
+    """
+    pending = deque()
+    for start, batch in batches:
+        pending.append((start, executor.submit(function, batch, *args)))
+        if len(pending) >= max_pending:
+            start, future = pending.popleft()
+            yield start, future.result()
+
+    for start, future in pending:
+        yield start, future.result()
+
+def loads_many(lines, workers=None, batch_size=DEFAULT_BATCH_SIZE, ordered=True):
+    """
+    Deserialize an iterable of DSON documents, one per line, generating
+    ``(index, obj, error)`` for each of them. ``error`` is ``None``, or the
+    message of the parse error for that line (and ``obj`` is then ``None``);
+    a bad line never stops the others from being parsed.
+
+    Lines are parsed in batches of ``batch_size`` by a pool of ``workers``
+    processes (default: one per CPU). With ``ordered=False``, batches are
+    generated as soon as they are done rather than in input order. A single
+    worker parses in this process, without a pool.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for start, batch in _batches(lines, batch_size):
+            for offset, line in enumerate(batch):
+                try:
+                    yield start + offset, loads(line), None
+
+                except ValueError as err:
+                    yield start + offset, None, str(err)
+        return
+
+    # Keep a bounded number of batches in flight, so huge inputs are not
+    # read into memory all at once.
+    max_pending = 2 * workers
+
+    with ProcessPoolExecutor(workers) as executor:
+        if ordered:
+            for start, result in _ordered_results(executor, _batches(lines, batch_size), max_pending, _loads_batch):
+                yield from _batch_results(start, result)
+
+        else:
+            pending = {}
+            for start, batch in _batches(lines, batch_size):
+                pending[executor.submit(_loads_batch, batch)] = start
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from _batch_results(pending.pop(future), future.result())
+
+            for future in list(pending):
+                yield from _batch_results(pending.pop(future), future.result())
+
+## Command-line tool
+# Formatting of the documents main() writes: one or more lines each
+CLI_FORMATS = {
+    "pprint": lambda obj: pprint.pformat(obj) + "\n",
+    "json": lambda obj: json.dumps(obj, separators=(",", ":")) + "\n",
+    "dson": lambda obj: dumps(obj, ensure_ascii=True) + "\n",
+}
+
+def _cli_batch(lines, output, validate_only):
+    """
+    Worker side of :func:`main`: parse (or only validate) a batch of lines
+    of bytes, skipping blank ones, and format the documents for ``output``.
+
+    :return: ``(text, documents, size, errors)``: the formatted documents,
+             how many lines held one, how many bytes there were and the
+             ``(offset, message)`` of every bad line
+    """
+    write = CLI_FORMATS[output]
+    parser = DescentParser(deep=True) # one for the batch, sharing field names
+    chunks = []
+    documents = 0
+    size = 0
+    errors = []
+    for offset, line in enumerate(lines):
+        size += len(line)
+        if line.isspace() or not line:
+            continue
+
+        documents += 1
+        try:
+            if validate_only:
+                validate(line)
+            else:
+                stream = StringStream(line)
+                obj = parser.parse(stream)
+                _expect_bytes_end(stream, "utf-8")
+                chunks.append(write(obj))
+
+        except ValueError as err:
+            errors.append((offset, str(err)))
+
+        except RecursionError:
+            # Parsed, but pprint and json recurse once per nesting level
+            errors.append((offset, "Such nesting, too deep to write as {}".format(output)))
+
+    return "".join(chunks), documents, size, errors
+
+def main(argv=None):
+    """
+    Parse each line of the input files (or standard input) as a DSON
+    document and write it to standard output; see ``--help``.
+    :return: The exit status, 1 if any line was not a valid document
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse each line of the input as a DSON document. Bad lines "
+                                                 "are reported on standard error, and make the exit status 1.")
+    parser.add_argument("files", metavar="FILE", nargs="*",
+                        help="DSON files, one document per line ('-' or none: standard input)")
+    parser.add_argument("-o", "--output", choices=sorted(CLI_FORMATS), default="pprint",
+                        help="write documents pretty-printed (the default), or as compact JSON or DSON lines")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="parse batches of lines in this many processes (0: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="lines per batch (default: %(default)s)")
+    parser.add_argument("--validate-only", action="store_true",
+                        help="only check the documents, without writing them")
+    parser.add_argument("--stats", action="store_true",
+                        help="write documents/s, MB/s and the error count to standard error at the end")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    documents = 0
+    size = 0
+    error_count = 0
+    start_time = time.perf_counter()
+
+    try:
+        for path in args.files or ["-"]:
+            if "-" == path:
+                name, fp = "<stdin>", sys.stdin.buffer
+            else:
+                name, fp = path, open(path, "rb", buffering=DEFAULT_CHUNK_SIZE)
+
+            try:
+                batches = _batches(fp, args.batch_size)
+                if executor is None:
+                    results = ((start, _cli_batch(batch, args.output, args.validate_only)) for start, batch in batches)
+                else:
+                    results = _ordered_results(executor, batches, 2 * workers, _cli_batch, args.output, args.validate_only)
+
+                for start, (text, batch_documents, batch_size, errors) in results:
+                    if text:
+                        sys.stdout.write(text)
+
+                    if errors:
+                        sys.stdout.flush() # keep the output in order with the errors, if both go to a terminal
+                        sys.stderr.write("".join("{}:{}: {}\n".format(name, start + offset + 1, message)
+                                                 for offset, message in errors))
+
+                    documents += batch_documents
+                    size += batch_size
+                    error_count += len(errors)
+
+            finally:
+                if fp is not sys.stdin.buffer:
+                    fp.close()
+
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    sys.stdout.flush()
+    if args.stats:
+        elapsed = max(time.perf_counter() - start_time, 1e-9)
+        mb = size / (1024.0 * 1024.0)
+        sys.stderr.write("{} documents, {} errors, {:.2f} MB in {:.2f} s: {:.0f} documents/s, {:.2f} MB/s\n".format(
+            documents, error_count, mb, elapsed, documents / elapsed, mb / elapsed))
+
+    return 1 if error_count else 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+
+    except KeyboardInterrupt:
+        pass
+
+    except BrokenPipeError:
+        # The reader went away (e.g. head): stop quietly, and keep Python
+        # from failing to flush stdout again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -1,4 +1,11 @@
+import asyncio
+import io
+import math
+import time
 import unittest
+from array import array
+from unittest import mock
+import dogeparser
 from dogeparser import *
 
 class StringStreamTests(unittest.TestCase):
@@ -268,3 +275,1603 @@ class DSONParserLoadsTests(unittest.TestCase):
 
         for document, obj in test_patterns:
             self.assertEqual(obj, loads(document))
+
+class RegexScannerTests(unittest.TestCase):
+    scanner = RegexScanner()
+
+    def test_read_token(self):
+        s = StringStream("    so many tokens")
+
+        self.assertEqual("so", self.scanner.read_token(s))
+        self.assertEqual("many", self.scanner.read_token(s))
+        self.assertEqual("tokens", self.scanner.read_token(s))
+        self.assertRaises(VeryUnexpectedEndException, self.scanner.read_token, s)
+        self.assertEqual("", s.remainder())
+
+    def test_read_string(self):
+        s = StringStream("   \"the \\r\\t\\nstring\\/\\u000142\"1a")
+        self.assertEqual("the \r\t\nstring/b", self.scanner.read_string(s))
+        self.assertEqual("1", s.peek())
+
+        s = StringStream('"\\u074617\\u056366\\u073414"')
+        self.assertEqual("福島県", self.scanner.read_string(s))
+        self.assertTrue(s.eof())
+
+    def test_read_string_errors(self):
+        bad_doge_samples = (
+            '"asdf \\x d"',
+            '"asdf \\u56"',
+            '"asdf \\u12345"',
+            '"asdf \\u123459"',
+            'asdf"',
+        )
+        for bad_doge in bad_doge_samples:
+            s = StringStream(bad_doge)
+            self.assertRaises(ManyParseException, self.scanner.read_string, s)
+
+        # Running out of input anywhere inside a string is always EOF
+        for incomplete in ('"asdf', '"asdf\\', '"asdf\\u12', ''):
+            s = StringStream(incomplete)
+            self.assertRaises(VeryUnexpectedEndException, self.scanner.read_string, s)
+
+    def test_read_number(self):
+        for very_number_string in ("43", "-1", "43very5", "43.10very5", "43.71", "-43.71"):
+            s = StringStream(very_number_string + " wow")
+            self.assertEqual(read_number(StringStream(very_number_string)), self.scanner.read_number(s))
+            self.assertEqual(len(very_number_string), s.pos())
+
+    def test_read_value(self):
+        s = StringStream('123 asdf "bbbb" yes no empty')
+        expected = (
+            (83, SUCH_NUMBER),
+            ("asdf", SUCH_TOKEN),
+            ("bbbb", SUCH_STRING),
+            (True, SUCH_CONST),
+            (False, SUCH_CONST),
+            (None, SUCH_CONST),
+        )
+        for value in expected:
+            self.assertEqual(value, self.scanner.read_value(s))
+
+    def test_matches_reference_scanner(self):
+        """ Both scanners must produce identical documents """
+        documents = (
+            'such "foo" is such "shiba" is "inu", "doge" is yes wow wow',
+            'so so "herp" also so "goddamn" many many and "asdf" and "zcat" also 123 and so "asdf" many many',
+            'such"help"is5,"derp"is4wow',
+            'such "a" is so so 1 many many . "" is so such wow many wow',
+            '   so "\\u074617\\"\\n" and 43.10very5 also empty many  ',
+            '"very"',
+        )
+        for document in documents:
+            self.assertEqual(loads(document, scanner="reference"), loads(document, scanner="regex"))
+
+    def test_unknown_scanner(self):
+        self.assertRaises(ValueError, loads, "such wow", scanner="shibe")
+
+class IncrementalDecoderTests(unittest.TestCase):
+    documents = (
+        'such "foo" is such "shiba" is "inu", "doge" is yes wow wow',
+        'so so "herp" also so "goddamn" many many and "asdf" and 123 and so "asdf" many many',
+        'such "esc\\"aped" is "\\u074617\\u056366\\u073414\\n" ! "n" is 43.10very5 wow',
+        'such"help"is5,"derp"is4wow',
+        '"very"',
+        '123',
+        'empty',
+    )
+
+    def test_every_split_point(self):
+        """ Documents split anywhere, including mid-lexeme, parse like loads """
+        for document in self.documents:
+            expected = loads(document)
+            for split in range(len(document) + 1):
+                decoder = DSONIncrementalDecoder()
+                result = decoder.feed(document[:split]) + decoder.feed(document[split:]) + decoder.close()
+                self.assertEqual([expected], result, "split at {}".format(split))
+
+    def test_one_char_at_a_time(self):
+        stream = "\n".join(self.documents) + "\n"
+        decoder = DSONIncrementalDecoder()
+        result = []
+        for char in stream:
+            result.extend(decoder.feed(char))
+
+        self.assertEqual([loads(document) for document in self.documents], result)
+        self.assertEqual([], decoder.close())
+
+    def test_document_emitted_when_complete(self):
+        decoder = DSONIncrementalDecoder()
+        self.assertEqual([], decoder.feed('such "a" is so 1 and'))
+        self.assertEqual([{"a": [1, 2]}], decoder.feed(' 2 many wow\nsuch "b"'))
+        self.assertEqual([{"b": 3}], decoder.feed(' is 3 wow '))
+
+        # Trailing number may continue in the next chunk
+        self.assertEqual([], decoder.feed('12'))
+        self.assertEqual([10, 83], decoder.feed('\n123 '))
+
+    def test_one_document_per_chunk(self):
+        """ A chunk ending with a whole document returns it, as a peer waiting for a reply needs """
+        decoder = DSONIncrementalDecoder()
+        for document in ('such "a" is 1 wow', "so 1 and 2 many", "such wow", "yes", "no", "empty", '"doge"'):
+            self.assertEqual([loads(document)], decoder.feed(document))
+            self.assertEqual([loads(document)], decoder.feed("\n" + document + "\n"))
+            self.assertEqual([], decoder.feed("\n"))
+
+        # A keyword cut short, or a number, may still go on
+        for document, rest in (('such "a" is 1 wo', "w"), ("so ma", "ny"), ("emp", "ty"), ("12", "3")):
+            self.assertEqual([], decoder.feed(document))
+            self.assertEqual([loads(document + rest)], decoder.feed(rest + " "))
+        self.assertEqual([], decoder.close())
+
+    def test_bytes_chunks(self):
+        data = 'such "ken" is "福島県" wow'.encode("utf-8")
+        decoder = DSONIncrementalDecoder()
+        result = []
+        for i in range(len(data)):
+            result.extend(decoder.feed(data[i:i + 1]))
+
+        self.assertEqual([{"ken": "福島県"}], result + decoder.close())
+
+    def test_close_incomplete(self):
+        decoder = DSONIncrementalDecoder()
+        decoder.feed('such "doge" is "very')
+        self.assertRaises(VeryUnexpectedEndException, decoder.close)
+        self.assertRaises(ValueError, decoder.feed, 'wow')
+
+    def test_invalid_document(self):
+        decoder = DSONIncrementalDecoder()
+        self.assertRaises(ManyParseException, decoder.feed, 'such "doge" is many wow ')
+
+class LoadTests(unittest.TestCase):
+    document = ('so such "foo" is such "shiba" is "inu", "doge" is yes wow wow also "\\u074617 very long" and '
+                '123 also 43.10very5 and so many also empty and so so 1 many many many')
+
+    def test_load_text_and_binary(self):
+        expected = loads(self.document)
+        for chunk_size in (1, 2, 3, 7, 64, DEFAULT_CHUNK_SIZE):
+            self.assertEqual(expected, load(io.StringIO(self.document), chunk_size=chunk_size))
+            self.assertEqual(expected, load(io.BytesIO(self.document.encode("utf-8")), chunk_size=chunk_size))
+
+    def test_load_errors(self):
+        with self.assertRaises(ManyParseException) as cm:
+            load(io.StringIO('such "a" is 1 wow\n\n  123'), chunk_size=4)
+        self.assertIn("Extra data after", cm.exception.msg)
+        self.assertIn("position 21", cm.exception.msg)
+
+        self.assertRaises(VeryUnexpectedEndException, load, io.StringIO('so "shiba" and 1'), chunk_size=3)
+        self.assertRaises(VeryUnexpectedEndException, load, io.StringIO('   '))
+
+    def test_iter_load(self):
+        expected = loads(self.document)
+        for chunk_size in (1, 5, DEFAULT_CHUNK_SIZE):
+            self.assertEqual(expected, list(iter_load(io.StringIO(self.document), chunk_size=chunk_size)))
+            self.assertEqual(expected, list(iter_load(io.BytesIO(self.document.encode("utf-8")), chunk_size=chunk_size)))
+
+        self.assertEqual([], list(iter_load(io.StringIO("so many"))))
+        self.assertEqual([1], list(iter_load(io.StringIO("so 1 and many"))))
+
+    def test_iter_load_is_lazy(self):
+        elements = iter_load(io.StringIO('so 1 and 2 and such wow many'), chunk_size=2)
+        self.assertEqual(1, next(elements))
+        self.assertEqual(2, next(elements))
+
+        elements = iter_load(io.StringIO('so 1 and 2 and 3 2 many'))
+        self.assertEqual([1, 2, 3], [next(elements), next(elements), next(elements)])
+        self.assertRaises(ManyParseException, next, elements)
+
+    def test_iter_load_errors(self):
+        self.assertRaises(ManyParseException, list, iter_load(io.StringIO('such "a" is 1 wow')))
+        self.assertRaises(ManyParseException, list, iter_load(io.StringIO('so 1 many 2')))
+        self.assertRaises(VeryUnexpectedEndException, list, iter_load(io.StringIO('so 1 and 2')))
+
+class IterparseTests(unittest.TestCase):
+    def test_events(self):
+        events = list(iterparse('such "foo" is so "bar" also such wow many , "doge" is yes wow'))
+        self.assertEqual([
+            (START_OBJECT, None, ()),
+            (KEY, "foo", ()),
+            (START_ARRAY, None, ("foo",)),
+            (SCALAR, "bar", ("foo", 0)),
+            (START_OBJECT, None, ("foo", 1)),
+            (END_OBJECT, None, ("foo", 1)),
+            (END_ARRAY, None, ("foo",)),
+            (KEY, "doge", ()),
+            (SCALAR, True, ("doge",)),
+            (END_OBJECT, None, ()),
+        ], events)
+
+        self.assertEqual([(SCALAR, 8, ())], list(iterparse(" 10 ")))
+        self.assertEqual([(START_ARRAY, None, ()), (END_ARRAY, None, ())], list(iterparse("so many")))
+
+    def build(self, events):
+        """ Rebuild a document from its events """
+        stack = [[]]
+        for event, value, path in events:
+            if event in (START_OBJECT, START_ARRAY):
+                stack.append({} if START_OBJECT == event else [])
+            elif event in (END_OBJECT, END_ARRAY) or SCALAR == event:
+                if SCALAR != event:
+                    value = stack.pop()
+                parent = stack[-1]
+                if isinstance(parent, dict):
+                    parent[path[-1]] = value
+                else:
+                    parent.append(value)
+
+        return stack[0][0]
+
+    def test_rebuild_matches_loads(self):
+        documents = (
+            'so so "herp" also so "goddamn" many many and "asdf" and "zcat" also 123 and so "asdf" many many',
+            'such "foo" is such "shiba" is "inu", "doge" is yes wow wow',
+            'such "a" is so so 1 many many . "" is so such wow many wow',
+            'so 1 and many',
+        )
+        for document in documents:
+            self.assertEqual(loads(document), self.build(iterparse(document)))
+            self.assertEqual(loads(document), self.build(iterparse(document.encode("utf-8"))))
+            for chunk_size in (1, 3, 16):
+                self.assertEqual(loads(document), self.build(iterparse(io.StringIO(document), chunk_size=chunk_size)))
+
+    def test_errors(self):
+        invalid_document_list = (
+            'such wer is 123 wow',
+            'such "doge" is many',
+            'so 1 and 2',
+            'so 1 many 2',
+            'such "doge" "is" 1 wow',
+        )
+        for document in invalid_document_list:
+            self.assertRaises(ManyParseException, list, iterparse(document))
+            self.assertRaises(ManyParseException, list, iterparse(io.StringIO(document), chunk_size=2))
+
+    def test_events_before_error(self):
+        events = iterparse('so 1 and 2 and such "a" is many')
+        self.assertEqual((START_ARRAY, None, ()), next(events))
+        self.assertEqual((SCALAR, 1, (0,)), next(events))
+        self.assertEqual((SCALAR, 2, (1,)), next(events))
+
+class DumpsTests(unittest.TestCase):
+    def test_canonical_examples(self):
+        self.assertEqual('such "foo" is "bar" , "doge" is "shibe" wow', dumps({"foo": "bar", "doge": "shibe"}))
+        self.assertEqual('such "foo" is so "bar" and 43 and yes many wow', dumps({"foo": ["bar", 35, True]}))
+        self.assertEqual('so such wow and so many and empty and no many', dumps([{}, (), None, False]))
+        self.assertEqual('"very"', dumps("very"))
+
+    def test_encode_string(self):
+        self.assertEqual('"shibe"', encode_string("shibe"))
+        self.assertEqual('"\\"\\\\\\n\\t\\u000001/"', encode_string('"\\\n\t\x01/'))
+        self.assertEqual('"福"', encode_string("福"))
+        self.assertEqual('"\\u074617"', encode_string("福", ensure_ascii=True))
+
+    def test_encode_number(self):
+        professor_doge_patterns = (
+            (35, "43"),
+            (-1, "-1"),
+            (35.125, "43.1"),
+            (-35.890625, "-43.71"),
+            (12.0, "14.0"),
+            (0.0, "0.0"),
+            (2.0 ** 60, "1.0very24"),
+        )
+        for python_number, very_number_string in professor_doge_patterns:
+            self.assertEqual(very_number_string, encode_number(python_number))
+
+        self.assertRaises(ValueError, encode_number, float("nan"))
+        self.assertRaises(ValueError, encode_number, float("inf"))
+
+    def test_float_round_trip(self):
+        """ Floats are written exactly, including very large and small ones """
+        for number in (0.1, 1 / 3, 1e300, 5e-324, 1e-7, 123456789.0, -2.5e-10, 1.7976931348623157e308):
+            value = loads(dumps(number))
+            self.assertEqual(number, value)
+            self.assertIsInstance(value, float)
+
+        self.assertEqual(-1.0, math.copysign(1.0, loads(dumps(-0.0))))
+
+    def test_round_trip(self):
+        documents = (
+            {"foo": {"shiba": "inu", "doge": True}, "": [[], [[1]], {}], "n": [-7, 0.5, 10 ** 30, None]},
+            [["herp", ["goddamn"]], "asdf", "zcat", 83, ["asdf"]],
+            {"esc": 'such "quotes" \\ and \x00\x1f\n福\U0001f436 wow'},
+            "very",
+            -1.25,
+        )
+        for document in documents:
+            self.assertEqual(document, loads(dumps(document)))
+            self.assertEqual(document, loads(dumps(document, ensure_ascii=True)))
+
+        self.assertEqual([1, 2], loads(dumps((1, 2))))
+
+    def test_iterencode_chunks(self):
+        document = [{"shibe": str(i), "n": i} for i in range(5000)]
+        chunks = list(iterencode(document, chunk_size=4096))
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), 4096)
+        self.assertEqual(dumps(document), "".join(chunks))
+
+        fp = io.StringIO()
+        dump(document, fp, chunk_size=100)
+        self.assertEqual(document, loads(fp.getvalue()))
+
+    def test_iterencode_joins_once(self):
+        """ Each chunk is joined from its parts once, however many parts it has """
+        import sys
+        joins = []
+
+        def profile(frame, event, arg):
+            if "c_call" == event and getattr(arg, "__name__", None) == "join":
+                joins.append(arg)
+
+        document = [1] * 20000
+        for chunk_size in (4096, 1 << 30):
+            del joins[:]
+            sys.setprofile(profile)
+            try:
+                chunks = list(iterencode(document, chunk_size=chunk_size))
+            finally:
+                sys.setprofile(None)
+
+            self.assertEqual("so " + " and ".join(["1"] * 20000) + " many", "".join(chunks))
+            self.assertEqual(len(chunks), len(joins))
+
+    def test_errors(self):
+        self.assertRaises(TypeError, dumps, {1: 2})
+        self.assertRaises(TypeError, dumps, [object()])
+        self.assertRaises(ValueError, dumps, "\U0010ffff", ensure_ascii=True)
+
+        circular = []
+        circular.append(circular)
+        self.assertRaises(ValueError, dumps, circular)
+        self.assertEqual("so so many and so many many", dumps([[], []]))
+
+class LoadsManyTests(unittest.TestCase):
+    lines = [
+        'such "foo" is so 1 and 2 many wow\n',
+        'so "shiba" and\n',
+        '"very"\n',
+        'such "doge" is many\n',
+        'so 43.10very5 also empty many\n',
+    ] * 7
+
+    def expected(self):
+        results = []
+        for index, line in enumerate(self.lines):
+            try:
+                results.append((index, loads(line), None))
+            except ManyParseException as err:
+                results.append((index, None, str(err)))
+        return results
+
+    def test_serial(self):
+        self.assertEqual(self.expected(), list(loads_many(self.lines, workers=1, batch_size=3)))
+
+    def test_parallel_ordered(self):
+        self.assertEqual(self.expected(), list(loads_many(iter(self.lines), workers=2, batch_size=3)))
+
+    def test_parallel_unordered(self):
+        results = list(loads_many(self.lines, workers=2, batch_size=2, ordered=False))
+        self.assertEqual(self.expected(), sorted(results, key=lambda result: result[0]))
+
+    def test_errors_reported_per_line(self):
+        errors = [(index, error) for index, _, error in loads_many(self.lines, workers=2, batch_size=4) if error]
+        self.assertEqual([1, 3] * 7, [index % 5 for index, _ in errors])
+        self.assertIn("Such parse error", errors[0][1])
+
+    def test_too_deep_to_marshal(self):
+        lines = ["so 1 many", "so " * 3000 + "many " * 3000, "so"]
+        for workers in (1, 2):
+            results = list(loads_many(lines, workers=workers, batch_size=3))
+            self.assertEqual([(0, [1], None)], results[:1])
+            self.assertIsNotNone(results[2][2])
+
+            index, obj, error = results[1]
+            depth = 0
+            while obj:
+                obj = obj[0]
+                depth += 1
+            self.assertEqual((1, 2999, None), (index, depth, error))
+
+class DecoderHookTests(unittest.TestCase):
+    document = 'such "foo" is such "shiba" is "inu", "doge" is yes wow . "n" is so 12 and 1.4 and 3very2 and empty many wow'
+
+    def test_no_hooks(self):
+        self.assertEqual(loads(self.document), DSONDecoder().decode(self.document))
+
+    def test_object_hook(self):
+        class Shibe(object):
+            __slots__ = ("fields",)
+
+            def __init__(self, fields):
+                self.fields = fields
+
+        obj = loads(self.document, object_hook=Shibe)
+        self.assertIsInstance(obj, Shibe)
+        self.assertIsInstance(obj.fields["foo"], Shibe)
+        self.assertEqual({"shiba": "inu", "doge": True}, obj.fields["foo"].fields)
+
+        self.assertEqual([1, {"empty": True}], loads('so 1 and such wow many', object_hook=lambda d: {"empty": not d}))
+
+    def test_object_pairs_hook(self):
+        pairs = loads('such "a" is 1 , "b" is such wow , "a" is 2 wow', object_pairs_hook=list)
+        self.assertEqual([("a", 1), ("b", []), ("a", 2)], pairs)
+
+        # object_pairs_hook takes priority
+        self.assertEqual([()], loads("so such wow many", object_pairs_hook=tuple, object_hook=dict))
+
+    def test_number_and_constant_hooks(self):
+        obj = loads(self.document, parse_int=lambda text: ("int", text), parse_float=lambda text: ("float", text),
+                    parse_constant=lambda name: name.upper())
+        self.assertEqual({"shiba": "inu", "doge": "YES"}, obj["foo"])
+        self.assertEqual([("int", "12"), ("float", "1.4"), ("float", "3very2"), "EMPTY"], obj["n"])
+
+    def test_hooks_with_load(self):
+        obj = load(io.StringIO(self.document), chunk_size=3, parse_int=str, object_pairs_hook=dict)
+        self.assertEqual(["12", 1.5, 192.0, None], obj["n"])
+
+        decoder = DSONIncrementalDecoder(object_hook=len)
+        self.assertEqual([2, 0], decoder.feed('such "a" is 1 , "b" is 2 wow such wow ') + decoder.close())
+
+    def test_raw_decode(self):
+        self.assertEqual(({"a": 1}, 17), DSONDecoder().raw_decode('such "a" is 1 wow such wow'))
+        self.assertEqual(({}, 26), DSONDecoder().raw_decode('such "a" is 1 wow such wow', 17))
+        self.assertRaises(ManyParseException, DSONDecoder(parse_int=str).decode, 'such "a" is 1 wow such wow')
+
+    def test_hooks_and_scanner(self):
+        self.assertRaises(TypeError, loads, "1", scanner="reference", parse_int=str)
+
+class StringMemoTests(unittest.TestCase):
+    def test_field_names_shared(self):
+        records = loads('so such "shibe" is 1 wow and such "shibe" is 2 wow and so such "shibe" is 3 wow many many')
+        self.assertIs(next(iter(records[0])), next(iter(records[1])))
+        self.assertIs(next(iter(records[0])), next(iter(records[2][0])))
+
+    def test_field_names_shared_across_elements(self):
+        records = list(iter_load(io.StringIO('so such "shibe" is 1 wow and such "shibe" is 2 wow many'), chunk_size=4))
+        self.assertIs(next(iter(records[0])), next(iter(records[1])))
+
+    def test_string_cache(self):
+        cache = StringCache(max_size=2, max_length=5)
+        first = "".join(["do", "ge"])
+        self.assertIs(first, cache(first))
+        self.assertIs(first, cache("".join(["do", "ge"])))
+
+        long_string = "".join(["shibe", "inu"])
+        self.assertIs(long_string, cache(long_string))
+        self.assertEqual(1, len(cache))
+
+        # Least recently used string is evicted
+        cache("wow")
+        cache("doge")
+        cache("such")
+        self.assertEqual(2, len(cache))
+        wow = "".join(["w", "ow"])
+        self.assertIs(wow, cache(wow))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_string_cache_across_documents(self):
+        decoder = DSONDecoder(string_cache=StringCache())
+        first = decoder.decode('such "state" is "very\\u000101ctive" wow')
+        second = decoder.decode('so "very\\u000101ctive" many')
+        self.assertEqual("veryActive", second[0])
+        self.assertIs(first["state"], second[0])
+
+        third = loads('such "state" is "veryActive" wow', string_cache=decoder.string_cache)
+        self.assertIs(first["state"], third["state"])
+        self.assertIs(next(iter(first)), next(iter(third)))
+
+class DescentLoadsTests(DSONParserLoadsTests):
+    """ The loads() tests again, with the descent engine as the default """
+    def setUp(self):
+        patcher = mock.patch.object(dogeparser, "DEFAULT_ENGINE", "descent")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+class DescentParserTests(unittest.TestCase):
+    documents = (
+        'such "foo" is such "shiba" is "inu", "doge" is yes wow wow',
+        'so so "herp" also so "goddamn" many many and "asdf" and "zcat" also 123 and so "asdf" many many',
+        'such"help"is5,"derp"is4wow',
+        'such "a" is so so 1 many many . "" is so such wow many wow',
+        '   so "\\u074617\\"\\n" and 43.10very5 also empty many  ',
+        'so 1 and many',
+        '"very"',
+        '-17.4',
+        'no',
+    )
+
+    def random_value(self, rng, depth=0):
+        kind = rng.randrange(8 if depth < 4 else 5)
+        if 0 == kind:
+            return rng.randrange(-10000, 10000)
+        elif 1 == kind:
+            return rng.randrange(-10000, 10000) / 8.0
+        elif 2 == kind:
+            return "".join(rng.choice('doge "\\\né') for _ in range(rng.randrange(6)))
+        elif 3 == kind:
+            return rng.choice((True, False, None))
+        elif 4 == kind:
+            return rng.choice(("wow", "such", "is"))
+        elif 5 == kind or 6 == kind:
+            return dict((rng.choice("abcdef"), self.random_value(rng, depth + 1)) for _ in range(rng.randrange(4)))
+        return [self.random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+
+    def assertSameResult(self, document):
+        try:
+            expected = loads(document, engine="state")
+        except ManyParseException as e:
+            with self.assertRaises(type(e), msg=document):
+                loads(document, engine="descent")
+        else:
+            self.assertEqual(expected, loads(document, engine="descent"), document)
+
+    def test_matches_state_engine(self):
+        for document in self.documents:
+            self.assertSameResult(document)
+
+        for document in ('such "foo" is "bar" wow', 'so 1 and 2 many'):
+            for end in range(len(document)):
+                self.assertSameResult(document[:end])
+
+    def test_random_documents(self):
+        import random
+        rng = random.Random(9)
+        for _ in range(300):
+            document = dumps(self.random_value(rng))
+            self.assertSameResult(document)
+
+            # Mangled documents must fail (or not) the same way too
+            for _ in range(5):
+                pos = rng.randrange(len(document) + 1)
+                mutation = rng.randrange(3)
+                if 0 == mutation:
+                    mangled = document[:pos]
+                elif 1 == mutation:
+                    mangled = document[:pos] + document[pos + 1:]
+                else:
+                    mangled = document[:pos] + rng.choice((" ", "so ", "such ", "wow", "many", '"', ",")) + document[pos:]
+                self.assertSameResult(mangled)
+
+    def test_hooks(self):
+        document = 'such "a" is so 1 and 2.4 and yes many , "b" is such "c" is "d" wow wow'
+        kw = dict(object_pairs_hook=tuple, parse_int=str, parse_float=str,
+                  parse_constant=str.upper, string_cache=StringCache())
+        self.assertEqual(loads(document, **kw), loads(document, engine="descent", **kw))
+
+    def test_max_depth(self):
+        self.assertEqual([[[]]], DescentParser(max_depth=3).parse(StringStream("so so so many many many")))
+        with self.assertRaises(ManyParseException) as cm:
+            DescentParser(max_depth=3).parse(StringStream("so so so so many many many many"))
+        self.assertIn("nesting", cm.exception.msg)
+
+        with self.assertRaises(ManyParseException):
+            loads("so " * 100000, engine="descent")
+
+    def test_eof_rewinds(self):
+        stream = StringStream('so 1 and such "a" is')
+        self.assertRaises(VeryUnexpectedEndException, DescentParser().parse, stream)
+        self.assertEqual(0, stream._pos)
+
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, loads, "such wow", engine="shibe")
+
+class NumberTests(unittest.TestCase):
+    def test_invalid_numbers(self):
+        for document in ("18", "1.5.3", "1very2very3", "--1", "1.very2", "so 9 many", "1very+2"):
+            with self.assertRaises(ManyParseException, msg=document) as cm:
+                loads(document)
+            self.assertNotIsInstance(cm.exception, VeryUnexpectedEndException)
+
+        # The number hooks take exactly the numbers loads reads
+        for number in ("18", "1very+2", "1very", ""):
+            for hook in (octal_number, octal_to_fraction, octal_to_decimal):
+                self.assertRaises(ValueError, hook, number)
+
+    def test_incomplete_numbers(self):
+        for document in ("-", "1.", "1.7v", "1VERY", "1very-", "so 1 and 1very"):
+            self.assertRaises(VeryUnexpectedEndException, loads, document)
+
+    def test_exact_floats(self):
+        """ Floats survive a round trip through dumps bit for bit """
+        import random
+        rng = random.Random(10)
+        numbers = [5e-324, 2.2250738585072014e-308, 1.7976931348623157e308, 0.1, -1 / 3.0]
+        numbers += [rng.uniform(-1, 1) * 10.0 ** rng.randrange(-320, 300) for _ in range(1000)]
+        for number in numbers:
+            self.assertEqual(number, loads(dumps(number)))
+
+    def test_huge_exponents(self):
+        self.assertEqual(math.inf, loads("1very77777777777"))
+        self.assertEqual(-math.inf, loads("-1.7VERY77777777777"))
+        self.assertEqual(0.0, loads("1very-77777777777"))
+        self.assertEqual(5e-324, loads("1very-" + format(1074 // 3, "o")))
+
+    def test_exact_mode(self):
+        from decimal import Decimal
+        from fractions import Fraction
+
+        self.assertEqual([Fraction(3, 2), Fraction(-13, 256), 64, 15],
+                         loads("so 1.4 and -3.2very-2 and 1very2 and 17 many", parse_float=octal_to_fraction))
+        self.assertEqual([Decimal("1.5"), Decimal("-0.05078125"), Decimal("64")],
+                         loads("so 1.4 and -3.2very-2 and 1very2 many", parse_float=octal_to_decimal))
+
+        # Lossless where a float is not
+        document = "0." + "1" * 40
+        self.assertEqual(Fraction(int("1" * 40, 8), 8 ** 40), loads(document, parse_float=octal_to_fraction))
+        self.assertEqual(Fraction(int("1" * 40, 8), 8 ** 40), Fraction(loads(document, parse_float=octal_to_decimal)))
+
+        self.assertRaises(ValueError, loads, "1very77777777777", parse_float=octal_to_fraction)
+
+class ParseStatsTests(unittest.TestCase):
+    document = 'such "a" is so 1 and such "b" is "c" wow many , "d" is 2.4 wow'
+
+    def test_counts(self):
+        stats = ParseStats()
+        self.assertEqual({"a": [1, {"b": "c"}], "d": 2.5}, loads(self.document, stats=stats))
+
+        self.assertEqual(1, stats.documents)
+        self.assertEqual(3, stats.max_depth)
+        self.assertEqual(2, stats.transitions[SO_NEW_OBJECT])
+        self.assertEqual(1, stats.state_counts()["NEW_ARRAY"])
+        self.assertEqual(3, stats.state_counts()["OBJECT_FIELD_NAME"])
+        self.assertEqual(2, stats.calls["convert_number"])
+        self.assertEqual(len("1") + len("2.4"), stats.consumed["convert_number"])
+        self.assertEqual(0.0, stats.seconds["read_value"])
+
+        # Every character is consumed by exactly one top-level reader call
+        self.assertEqual(len(self.document), sum(stats.consumed[reader] for reader in READERS))
+
+    def test_accumulates(self):
+        stats = ParseStats(timing=True)
+        for _ in range(3):
+            loads(self.document, stats=stats)
+        decoder = DSONDecoder(stats=stats, parse_int=str)
+        decoder.decode("so so many many")
+
+        self.assertEqual(4, stats.documents)
+        self.assertEqual(3, stats.max_depth)
+        self.assertGreater(stats.seconds["read_value"], 0.0)
+        self.assertIn("OBJECT_NEXT", stats.report())
+
+    def test_load(self):
+        stats = ParseStats()
+        self.assertEqual([1, 2], load(io.BytesIO(b"so 1 and 2 many"), chunk_size=3, stats=stats))
+        self.assertEqual(1, stats.documents)
+
+    def test_needs_state_engine(self):
+        self.assertRaises(TypeError, loads, "so many", engine="descent", stats=ParseStats())
+        self.assertRaises(TypeError, DSONDecoder, engine="descent", stats=ParseStats())
+
+class BytesParsingTests(unittest.TestCase):
+    document = 'such "a" is so 1 and "é\\u000101\\n" also 1.4very2 and yes many , "犬" is such wow wow'
+    expected = {"a": [1, "éA\n", 96.0, True], "犬": {}}
+
+    def test_bytes_like(self):
+        data = self.document.encode("utf-8")
+        for b in (data, bytearray(data), memoryview(data), memoryview(bytearray(data)).cast("c")):
+            self.assertEqual(self.expected, loadb(b))
+
+    def test_encodings(self):
+        document = self.document.replace("犬", "doge")
+        expected = {"a": self.expected["a"], "doge": {}}
+        for encoding in ("latin-1", "cp1252", "utf-16", "utf-32"):
+            self.assertEqual(expected, loadb(document.encode(encoding), encoding))
+
+    def test_options(self):
+        data = self.document.encode("utf-8")
+        self.assertEqual(self.expected, loadb(data, engine="state"))
+        self.assertEqual(self.expected, loadb(data, stats=ParseStats()))
+        self.assertEqual(loads(self.document, parse_int=str, object_pairs_hook=list, string_cache=StringCache()),
+                         loadb(data, parse_int=str, object_pairs_hook=list, string_cache=StringCache()))
+        self.assertRaises(TypeError, loadb, data, scanner="regex", parse_int=str)
+
+    def test_matches_loads(self):
+        import random
+        rng = random.Random(13)
+        generator = DescentParserTests()
+        for _ in range(200):
+            document = dumps(generator.random_value(rng), ensure_ascii=rng.randrange(2))
+            self.assertEqual(loads(document), loadb(document.encode("utf-8")))
+
+            for end in rng.sample(range(len(document)), min(5, len(document))):
+                mangled = document[:end] + rng.choice(("", "so ", '"', "\\")) + document[end + 1:]
+                try:
+                    expected = loads(mangled)
+                except ManyParseException as e:
+                    with self.assertRaises(type(e), msg=mangled):
+                        loadb(mangled.encode("utf-8"))
+                else:
+                    self.assertEqual(expected, loadb(mangled.encode("utf-8")))
+
+    def test_errors(self):
+        with self.assertRaises(ManyParseException) as cm:
+            loadb(b'so "\xff" many')
+        self.assertIn("utf-8", cm.exception.msg)
+
+        # Positions count bytes
+        with self.assertRaises(ManyParseException) as cm:
+            loadb('so "犬" many wow'.encode("utf-8"))
+        self.assertIn("position 14", cm.exception.msg)
+
+        self.assertRaises(VeryUnexpectedEndException, loadb, b'such "a" is "\\u00')
+        self.assertRaises(ManyParseException, loadb, b'so "\\q" many')
+
+    def test_error_messages_match_loads(self):
+        for document in ("bad", "so 1 bad many", 'such "a" is 1 bad', 'such "a" is bad wow', "such wowx",
+                         'such "a" bad 1 wow', "such bad wow", "so é many", "such 犬 wow", 'such "a" is 1 , é'):
+            with self.assertRaises(ManyParseException) as expected:
+                loads(document)
+            with self.assertRaises(ManyParseException) as cm:
+                loadb(document.encode("utf-8"))
+
+            if document.isascii():
+                self.assertEqual(str(expected.exception), str(cm.exception))
+            else: # positions count bytes
+                self.assertEqual(expected.exception.msg.split(": ", 1)[1], cm.exception.msg.split(": ", 1)[1])
+
+        for document in (b'such "a" is bad wow', b'such "a" is so 1 wow wow', b'such "a" is 1 bad'):
+            for parse in (lambda b: extract(b, ["a"]), lambda b: loads_lazy(b)["a"]):
+                with self.assertRaises(ManyParseException) as cm:
+                    parse(document)
+                self.assertNotIn("b'", cm.exception.msg)
+
+    def test_deep_nesting(self):
+        def innermost(obj):
+            depth = 0
+            while isinstance(obj, (list, dict)) and obj:
+                obj = obj[0] if isinstance(obj, list) else obj["a"]
+                depth += 1
+            return depth, obj
+
+        depth = 5 * DEFAULT_MAX_DEPTH
+        document = ('such "a" is so ' * depth + '"犬"' + " many wow" * depth).encode("utf-8")
+        self.assertEqual((2 * depth, "犬"), innermost(loadb(document)))
+        self.assertEqual((2 * depth, "犬"), innermost(loadb(document, object_pairs_hook=dict)))
+        self.assertTrue(is_valid(document))
+        self.assertEqual((2 * depth + 1, "犬"), innermost(loadb(b"so " + document + b" and 1 many")))
+        with self.assertRaises(ManyParseException) as cm:
+            loadb(document, engine="descent")
+        self.assertIn("nesting", cm.exception.msg)
+
+        for bad in (document[:-4], document + b" 1", document.replace(b"many", b"wow", 1)):
+            with self.assertRaises(ManyParseException) as expected:
+                loads(bad.decode("utf-8"))
+            with self.assertRaises(type(expected.exception)) as cm:
+                loadb(bad)
+            self.assertEqual(expected.exception.msg.split(": ", 1)[1], cm.exception.msg.split(": ", 1)[1])
+
+        path = LoadPathTests.write(self, b"so " + document + b" and 1 many")
+        self.assertEqual((2 * depth, "犬"), innermost(load_path(path, mmap=True)[0]))
+        self.assertEqual([2 * depth, 0], [innermost(element)[0] for element in iter_load_path(path)])
+
+class LoadPathTests(unittest.TestCase):
+    def write(self, data):
+        import os
+        import tempfile
+        fd, path = tempfile.mkstemp(suffix=".dson")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_load_path(self):
+        document = 'such "foo" is so 1 and "犬\\n" many , "bar" is such wow wow'
+        path = self.write(document.encode("utf-8"))
+        for mmap in (True, False):
+            self.assertEqual(loads(document), load_path(path, mmap=mmap))
+            self.assertEqual(loads(document, parse_int=str), load_path(path, mmap=mmap, parse_int=str))
+
+        path = self.write(document.encode("utf-16"))
+        self.assertEqual(loads(document), load_path(path, encoding="utf-16"))
+
+    def test_load_path_errors(self):
+        for data, exception in ((b"", VeryUnexpectedEndException),
+                                (b"so 1 many", None),
+                                (b"so 1 many wow", ManyParseException),
+                                (b"so 1 and", VeryUnexpectedEndException)):
+            path = self.write(data)
+            for mmap in (True, False):
+                if exception is None:
+                    self.assertEqual([1], load_path(path, mmap=mmap))
+                else:
+                    self.assertRaises(exception, load_path, path, mmap=mmap)
+
+    def test_iter_load_path(self):
+        path = self.write(b'so such "a" is 1 wow and 2 also "three" and so many many')
+        self.assertEqual([{"a": 1}, 2, "three", []], list(iter_load_path(path)))
+        self.assertEqual(["1", 2], list(iter_load_path(self.write(b"so 1 and 2.0 many"), parse_int=str, parse_float=float)))
+        self.assertEqual([], list(iter_load_path(self.write(b" so many "))))
+        self.assertEqual(["a"], list(iter_load_path(self.write('so "a" many'.encode("utf-16")), encoding="utf-16")))
+
+        elements = iter_load_path(self.write(b"so 1 and 2 and 3 and wow many"))
+        self.assertEqual([1, 2, 3], [next(elements) for _ in range(3)])
+        self.assertRaises(ManyParseException, next, elements)
+
+        for data in (b"", b"such wow", b"so 1 many 2", b"so 1 and"):
+            self.assertRaises(ManyParseException, list, iter_load_path(self.write(data)))
+
+class LazyTests(unittest.TestCase):
+    document = ('such "a" is so 1 and such "b" is "c\\n" , "x" is so so many many wow also "é" many , '
+                '"d\\t" is 2.4 . "e" is such wow ! "f" is "wow such \\" so" wow')
+
+    def test_access(self):
+        for source in (self.document, self.document.encode("utf-8"), memoryview(self.document.encode("utf-8"))):
+            obj = loads_lazy(source)
+            self.assertIsInstance(obj, LazyObject)
+            self.assertEqual(["a", "d\t", "e", "f"], list(obj))
+            self.assertEqual(2.5, obj["d\t"])
+            self.assertEqual("wow such \" so", obj["f"])
+            self.assertIsInstance(obj["a"], LazyArray)
+            self.assertEqual(3, len(obj["a"]))
+            self.assertEqual("é", obj["a"][-1])
+            self.assertEqual(["é", 1], obj["a"][::-2])
+            self.assertEqual("c\n", obj["a"][1]["b"])
+            self.assertIs(obj["a"], obj["a"]) # decoded once
+            self.assertNotIn("b", obj)
+            self.assertRaises(KeyError, obj.__getitem__, "b")
+            self.assertRaises(IndexError, obj["a"].__getitem__, 3)
+            self.assertEqual(loads(self.document), obj)
+            self.assertEqual(loads(self.document), obj.materialize())
+
+    def test_scalars_and_empty(self):
+        self.assertEqual([], loads_lazy("so many"))
+        self.assertEqual({}, loads_lazy(" such wow "))
+        self.assertEqual([1], loads_lazy("so 1 and many"))
+        self.assertEqual("doge", loads_lazy('"doge"'))
+        self.assertEqual(8, loads_lazy(b"10"))
+
+    def test_matches_loads(self):
+        import random
+        rng = random.Random(15)
+        generator = DescentParserTests()
+        for _ in range(200):
+            obj = generator.random_value(rng)
+            if isinstance(obj, (dict, list)):
+                document = dumps(obj)
+                self.assertEqual(loads(document), loads_lazy(document))
+
+    def test_structure_errors(self):
+        for document in ("such", "so 1 and", 'so "x many', 'such "a" is so 1 many', "such wow wow", "so many many"):
+            self.assertRaises(ManyParseException, loads_lazy, document)
+
+        self.assertRaises(VeryUnexpectedEndException, loads_lazy, "so so 1 many")
+        self.assertRaises(ManyParseException, loads_lazy, 'such "a" is so wow wow')
+
+        # Values are only checked when decoded
+        obj = loads_lazy('such "ok" is 1 , "bad" is 18 wow')
+        self.assertEqual(1, obj["ok"])
+        self.assertRaises(ManyParseException, obj.__getitem__, "bad")
+
+class ExtractTests(unittest.TestCase):
+    document = ('such "users" is so such "name" is "shibe" , "age" is 3 wow and '
+                'such "name" is "inu\\n" , "tags" is so "a" also "b" many wow many , '
+                '"config" is such "limits" is such "max" is 12 , "min" is -1.4 wow wow . '
+                '"tenant" is "t1" ! "on" is yes wow')
+
+    def test_paths(self):
+        for source in (self.document, self.document.encode("utf-8"), memoryview(self.document.encode("utf-8"))):
+            self.assertEqual({
+                "users[*].name": ["shibe", "inu\n"],
+                "users[1].tags[1]": "b",
+                "config.limits.max": 10,
+                "config.limits": {"max": 10, "min": -1.5},
+                "tenant": "t1",
+                "on": True,
+                "*.limits.min": [-1.5],
+            }, extract(source, ["users[*].name", "users[1].tags[1]", "config.limits.max", "config.limits",
+                                "tenant", "on", "*.limits.min", "users[5]", "missing.field"]))
+
+    def test_top_level_array(self):
+        self.assertEqual({"[1]": 2, "[*]": [1, 2, 3]}, extract("so 1 and 2 also 3 many", ["[1]", "[*]"]))
+        self.assertEqual({"[*]": []}, extract("so many", ["[*]"]))
+        self.assertEqual({}, extract('"doge"', ["a"]))
+        self.assertRaises(TypeError, extract, "so many", "[0]")
+
+    def test_duplicate_fields(self):
+        # As in loads, the last field of a name replaces the others
+        document = ('such "a" is so 1 many , "b" is 2 , "a" is 7 , "c" is such "d" is 3 wow , '
+                    '"c" is such "e" is so 4 many , "d" is 5 , "e" is 6 wow wow')
+        obj = loads(document)
+        self.assertEqual({"a": 7, "*": list(obj.values()), "c.d": 5, "c.*": list(obj["c"].values())},
+                         extract(document, ["a", "a[0]", "*", "c.e[0]", "c.d", "c.*"]))
+        for source in (document, document.encode("utf-8")):
+            self.assertEqual({"*.d": [5], "*.e": [6]}, extract(source, ["*.d", "*.e"]))
+
+    def test_parse_path(self):
+        self.assertEqual(["users", WILDCARD, "name"], parse_path("users[*].name"))
+        self.assertEqual([0, "a", 2], parse_path("[0].a[2]"))
+        self.assertEqual([WILDCARD, "b"], parse_path("*.b"))
+        for path in ("", ".a", "a..b", "a[x]", "a[-1]", "a.", "a[0"):
+            self.assertRaises(ValueError, parse_path, path)
+
+    def test_matches_loads(self):
+        import random
+        rng = random.Random(16)
+        generator = DescentParserTests()
+        for _ in range(200):
+            obj = generator.random_value(rng)
+            if not isinstance(obj, dict) or not obj:
+                continue
+
+            document = dumps(obj)
+            name = rng.choice(list(obj))
+            if "." in name or "[" in name or "]" in name or not name:
+                continue
+
+            expected = loads(document)
+            self.assertEqual({name: expected[name]}, extract(document, [name]))
+            self.assertEqual({"*": list(expected.values())}, extract(document, ["*"]))
+
+    def test_structure_errors(self):
+        for document in ("such", 'such "a" 1 wow', "so 1 and 2", 'such "a" is 1 wow extra', 'so "x many'):
+            self.assertRaises(ManyParseException, extract, document, ["a"])
+
+        self.assertRaises(VeryUnexpectedEndException, extract, 'such "a" is 1', ["a"])
+        self.assertRaises(ManyParseException, extract, 'such "a" is 18 wow', ["a"])
+        # Skipped values are only checked for structure
+        self.assertEqual({"a": 1}, extract('such "b" is 18 , "a" is 1 wow', ["a"]))
+
+class StructuralIndexTests(unittest.TestCase):
+    document = b'so "a\\"b" and "c\\\\" also "\\\\\\"" and "\\u000101\\n" also "" many'
+
+    def test_positions(self):
+        index = StructuralIndex(self.document, "python")
+        self.assertEqual([3, 8, 14, 18, 25, 30, 36, 47, 54, 55], list(index.quotes))
+        self.assertEqual([6, 17, 27, 29, 38, 46], list(index.escaped))
+        self.assertEqual(5, len(index))
+        self.assertEqual(8, index.string_end(3))
+        self.assertEqual(55, index.string_end(54))
+        self.assertIsNone(index.string_end(8)) # closing quote
+        self.assertIsNone(index.string_end(4))
+        self.assertTrue(index.in_string(6))
+        self.assertFalse(index.in_string(10))
+        self.assertIsNone(StructuralIndex(b'so "open many', "python").string_end(3))
+        self.assertRaises(ValueError, StructuralIndex, self.document, "simd")
+
+    @unittest.skipIf(dogeparser.numpy is None, "NumPy is not installed")
+    def test_numpy_backend(self):
+        import random
+        rng = random.Random(17)
+        for document in [self.document, b"", b"\\", b'"\\'] + [bytes(rng.choice(b'ab"\\ ') for _ in range(200)) for _ in range(100)]:
+            expected = StructuralIndex(document, "python")
+            index = StructuralIndex(document, "numpy")
+            self.assertEqual(list(expected.quotes), list(index.quotes))
+            self.assertEqual(list(expected.escaped), list(index.escaped))
+
+        self.assertEqual("numpy", StructuralIndex(self.document).backend)
+
+    def test_without_numpy(self):
+        with mock.patch("dogeparser.numpy", None):
+            self.assertRaises(ImportError, StructuralIndex, self.document, "numpy")
+            self.assertEqual("python", StructuralIndex(self.document).backend)
+
+    def test_loadb(self):
+        expected = loads(self.document.decode("ascii"))
+        self.assertEqual(['a"b', "c\\", '\\"', "A\n", ""], expected)
+        for index in (False, True, StructuralIndex(self.document, "python")):
+            self.assertEqual(expected, loadb(self.document, index=index))
+            self.assertEqual(expected, loadb(memoryview(self.document), index=index))
+
+        document = dumps({"é\t": ["ü\"", "犬"]}).encode("utf-8")
+        self.assertEqual(loads(document.decode("utf-8")), loadb(document, index=True))
+
+    def test_errors(self):
+        for document, exception in ((b'so "a\\x" many', ManyParseException),
+                                    (b'so "a\\u12" many', ManyParseException),
+                                    (b'so "a\\"', VeryUnexpectedEndException),
+                                    (b'so "a many', VeryUnexpectedEndException)):
+            with self.assertRaises(exception) as expected:
+                loadb(document, index=False)
+
+            with self.assertRaises(exception) as indexed:
+                loadb(document, index=True)
+
+            self.assertEqual(str(expected.exception), str(indexed.exception))
+
+class ParseCacheTests(unittest.TestCase):
+    document = 'such "a" is so 1 and 2 many , "b" is such "c" is "x" wow wow'
+
+    def test_copies(self):
+        cache = ParseCache()
+        first = cache.loads(self.document)
+        first["a"].append(3)
+        second = cache.loads(self.document)
+        self.assertEqual({"a": [1, 2], "b": {"c": "x"}}, second)
+        self.assertIsNot(second, cache.loads(self.document))
+        self.assertEqual({"hits": 2, "misses": 1, "evictions": 0, "entries": 1, "bytes": len(self.document)}, cache.info())
+
+        # Hook objects are deep-copied instead
+        class Doge(dict):
+            pass
+
+        doge = cache.loads(self.document, object_hook=Doge)
+        self.assertIsInstance(cache.loads(self.document, object_hook=Doge)["b"], Doge)
+        self.assertIsNot(doge, cache.loads(self.document, object_hook=Doge))
+        self.assertEqual(2, len(cache))
+
+    def test_frozen(self):
+        cache = ParseCache(frozen=True)
+        obj = cache.loads(self.document)
+        self.assertIs(obj, cache.loads(self.document))
+        self.assertEqual((1, 2), obj["a"])
+        self.assertEqual({"c": "x"}, obj["b"])
+        with self.assertRaises(TypeError):
+            obj["b"]["c"] = 1
+        self.assertEqual((1, {"d": None}), freeze([1, {"d": None}]))
+
+    def test_deep_document(self):
+        depth = 3000
+        document = 'so such "a" is ' * depth + "1" + " wow many" * depth
+
+        def innermost(obj, container):
+            for _ in range(depth):
+                self.assertIsInstance(obj, container)
+                obj = obj[0]["a"]
+            return obj
+
+        # Too deep for marshal and deepcopy: parsed again on every call
+        cache = ParseCache()
+        for _ in range(2):
+            self.assertEqual(1, innermost(cache.loads(document), list))
+        self.assertEqual(0, len(cache))
+
+        cache = ParseCache(frozen=True)
+        obj = cache.loads(document)
+        self.assertEqual(1, innermost(obj, tuple))
+        self.assertIs(obj, cache.loads(document))
+        self.assertEqual(1, cache.hits)
+
+    def test_keys(self):
+        cache = ParseCache()
+        self.assertEqual(8, cache.loads("10"))
+        self.assertEqual(8, cache.loadb(b"10"))
+        self.assertEqual("é", cache.loadb('"é"'.encode("latin-1"), "latin-1"))
+        self.assertEqual("10", cache.loads("10", parse_int=str))
+        self.assertEqual(4, len(cache))
+        self.assertEqual(0, cache.hits)
+
+        # Options that cannot be hashed leave nothing to key the result by
+        with mock.patch("dogeparser.loads", return_value=8) as parse:
+            for _ in range(2):
+                self.assertEqual(8, cache.loads("10", parse_int=int, hooks=[]))
+        self.assertEqual(2, parse.call_count)
+        self.assertEqual(4, len(cache))
+
+        self.assertRaises(TypeError, cache.loads, "10", stats=ParseStats())
+
+    def test_eviction(self):
+        cache = ParseCache(max_entries=2, max_bytes=10)
+        for document in ("1", "2", "1", "3"):
+            cache.loads(document)
+        self.assertEqual({"hits": 1, "misses": 3, "evictions": 1, "entries": 2, "bytes": 2}, cache.info())
+
+        cache.loads('"shibe"') # evicts "1", the least recently used
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(8, cache.size)
+        cache.loads("3")
+        self.assertEqual(2, cache.hits)
+
+        cache.loads('"very long"') # larger than the whole cache
+        self.assertEqual(8, cache.size)
+        self.assertEqual(2, len(cache))
+
+        cache.clear()
+        self.assertEqual({"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0}, cache.info())
+
+    def test_errors_not_cached(self):
+        cache = ParseCache()
+        for _ in range(2):
+            self.assertRaises(ManyParseException, cache.loads, "such wow wow")
+        self.assertEqual(0, len(cache))
+        self.assertEqual(2, cache.misses)
+
+class AsyncTests(unittest.TestCase):
+    document = 'such "a" is so 1 and "b\\n" also such wow many , "c" is 2.4 wow'
+
+    def run_async(self, function, data, **options):
+        """ Run function(reader, **options) over a StreamReader of data. """
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            result = function(reader, **options)
+            if hasattr(result, "__aiter__"):
+                return [obj async for obj in result]
+            return await result
+
+        return asyncio.run(main())
+
+    def test_load_async(self):
+        expected = loads(self.document)
+        data = self.document.encode("utf-8") + b"\n"
+        for options in ({}, {"budget": 3, "chunk_size": 7}, {"budget": 3, "chunk_size": 7, "offload_size": 10}):
+            self.assertEqual(expected, self.run_async(load_async, data, **options))
+
+        self.assertEqual("x" * 100000, self.run_async(load_async, b'"' + b"x" * 100000 + b'"', budget=16))
+        self.assertEqual(expected, self.run_async(load_async, data, object_pairs_hook=dict))
+
+    def test_iter_documents_async(self):
+        data = (self.document + "\n so many\n\n 7 such wow ").encode("utf-8")
+        expected = [loads(self.document), [], 7, {}]
+        self.assertEqual(expected, self.run_async(iter_documents_async, data))
+        self.assertEqual(expected, self.run_async(iter_documents_async, data, budget=2, chunk_size=5, offload_size=20))
+        self.assertEqual([], self.run_async(iter_documents_async, b"  \n"))
+
+    def test_errors(self):
+        self.assertRaises(ManyParseException, self.run_async, load_async, b"such wow wow")
+        self.assertRaises(VeryUnexpectedEndException, self.run_async, load_async, b"so 1 and")
+        self.assertRaises(VeryUnexpectedEndException, self.run_async, load_async, b"")
+        self.assertRaises(VeryUnexpectedEndException, self.run_async, iter_documents_async, b"1 so 2")
+
+    def test_yields_control(self):
+        data = ("so " + " and ".join(['"shibe"'] * 1000) + " many").encode("ascii")
+        turns = 0
+
+        async def tick():
+            nonlocal turns
+            while True:
+                turns += 1
+                await asyncio.sleep(0)
+
+        async def parse(reader):
+            ticker = asyncio.ensure_future(tick())
+            obj = await load_async(reader, budget=100)
+            ticker.cancel()
+            return obj
+
+        self.assertEqual(["shibe"] * 1000, self.run_async(parse, data))
+        self.assertGreater(turns, len(data) // 100)
+
+class ValidateTests(unittest.TestCase):
+    def test_valid(self):
+        for document in ('such "a" is so 1 and "b\\n" also such wow many , "c" is 2.4 wow', "so many", "so 1 and many",
+                         ' "\\u000101" ', "-1.4very-12", "empty", 'such"a"is"b"wow', "so " * 1000 + "many " * 1000):
+            with mock.patch("dogeparser.loads") as parse:
+                validate(document)
+                self.assertTrue(is_valid(document))
+                self.assertTrue(is_valid(document.encode("utf-8")))
+                self.assertTrue(is_valid(memoryview(document.encode("utf-8"))))
+            parse.assert_not_called()
+
+    def test_invalid(self):
+        for document in ("", "such", "so 1 and", "wow", "many", "so 1 many many", "18", "1.", "1very", "1y",
+                         'such "a" is 1 , wow', 'such "a" is many wow', 'such "a" 1 wow', 'so "\\x" many',
+                         'so "\\u12" many', "so 1 , 2 many", "yess", "such wow wow", "so 1 and 2 many,",
+                         "1very+1", "so 1very+1 many"):
+            with self.assertRaises(ManyParseException) as expected:
+                loads(document)
+
+            with self.assertRaises(ManyParseException) as validated:
+                validate(document)
+
+            self.assertEqual(str(expected.exception), str(validated.exception))
+            self.assertIs(type(expected.exception), type(validated.exception))
+            self.assertFalse(is_valid(document))
+            self.assertFalse(is_valid(document.encode("utf-8")))
+
+    def test_encodings(self):
+        self.assertFalse(is_valid(b'so "\xff" many'))
+        self.assertRaises(ManyParseException, validate, b'so "\xc3" many')
+        self.assertTrue(is_valid(b'so "\xff" many', "latin-1"))
+        self.assertTrue(is_valid('so "犬" many'.encode("utf-16"), "utf-16"))
+        self.assertFalse(is_valid('so "犬" many'.encode("utf-16")[:-1], "utf-16"))
+
+    def test_matches_loads(self):
+        import random
+        rng = random.Random(20)
+        generator = DescentParserTests()
+        lexemes = ["such", "wow", "so", "many", "and", "is", ",", '"a"', '"\\u000101"', "1", "18", "1very", "yes", '"',
+                   "1very+1", "very-", "+", "-"]
+        cases = ["1very+1", "1very-1", "so 1very+1 many", 'such "a" is 1.4very+7 wow']
+        for _ in range(500):
+            document = dumps(generator.random_value(rng))
+            pos = rng.randrange(len(document) + 1)
+            cases.append(document)
+            cases.append(document[:pos] + rng.choice(lexemes) + document[pos + rng.randrange(3):])
+        for s in cases:
+            try:
+                loads(s)
+                valid = True
+            except ManyParseException:
+                valid = False
+            self.assertEqual(valid, is_valid(s), s)
+
+class SchemaTests(unittest.TestCase):
+    SCHEMA = {"id": int, "name": str, "active": bool, "owner": (str, None), "score": float,
+              "tags": [str], "location": {"lat": float, "lon": float}, "extra": object}
+
+    def setUp(self):
+        self.parse = compile_schema(self.SCHEMA)
+
+    def test_conforming(self):
+        document = ('such "id" is 12 , "name" is "shibe" . "active" is yes ! "owner" is empty ? '
+                    '"score" is 1.4very-1 , "tags" is so "a" and "b" also "c" many , '
+                    '"location" is such "lat" is -3 , "lon" is 0.4 wow , "extra" is so 1 and empty many wow')
+        self.assertEqual(loads(document), self.parse(document))
+        self.assertEqual(loads(document), self.parse.loadb(document.encode("utf-8")))
+        self.assertIsInstance(self.parse(document)["location"]["lat"], float)
+
+    def test_out_of_order_and_unknown_fields(self):
+        document = ('such "name" is "inu" , "unknown" is such "x" is so 1 many wow , "id" is 1 , "active" is no , '
+                    '"owner" is "doge" , "score" is 2 , "tags" is so many , "extra" is "e" , '
+                    '"location" is such "lon" is 1 , "lat" is 2 wow wow')
+        expected = loads(document)
+        del expected["unknown"]
+        self.assertEqual(expected, self.parse(document))
+        self.assertEqual(expected, self.parse.loadb(document.encode("utf-8")))
+
+    def test_escapes_and_spacing(self):
+        parse = compile_schema({'"quoted"': str, "s": [str]})
+        document = 'such\n"\\"quoted\\""\tis "a\\nb\\u000101" . "s" is so"\\/"and "x"many wow'
+        self.assertEqual(loads(document), parse(document))
+        self.assertEqual(loads(document), parse.loadb(document.encode("utf-8")))
+        self.assertEqual({'"quoted"': "犬", "s": []}, parse.loadb('such "\\"quoted\\"" is "犬" , "s" is so many wow'.encode("utf-8")))
+
+    def test_nullable_and_scalars(self):
+        parse = compile_schema([(int, None)])
+        self.assertEqual([1, None, 8, None], parse("so 1 and empty also 10 and empty many"))
+        self.assertEqual([True, False, None], compile_schema([(bool, None)])("so yes and no and empty many"))
+        self.assertEqual([True, None, 1.5, "s"], compile_schema([object])("so yes and empty and 1.4 and \"s\" many"))
+        self.assertEqual(3.0, compile_schema(float)(" 3 "))
+        self.assertIsNone(compile_schema(None)("empty"))
+        self.assertEqual({"a": None}, compile_schema({"a": (dict(b=int), None)})('such "a" is empty wow'))
+        self.assertEqual({"a": {"b": 1}}, compile_schema({"a": (dict(b=int), None)})('such "a" is such "b" is 1 wow wow'))
+
+    def test_errors(self):
+        parse = compile_schema({"a": int, "b": [float]})
+        for document, message in (('such "a" is 1 wow', "Missing field 'b'"),
+                                  ('such "a" is "1" , "b" is so many wow', "Expected int value, got str"),
+                                  ('such "a" is 1.4 , "b" is so many wow', "Expected int value, got float"),
+                                  ('such "a" is yes , "b" is so many wow', "Expected int value, got bool"),
+                                  ('such "a" is 1 , "b" is so 1 and "x" many wow', "Expected float value, got str"),
+                                  ('such "a" is 1 , "b" is so many wow wow', "Extra data"),
+                                  ('so 1 many', "Expected object value, got list"),
+                                  ('such "a" is 18 , "b" is so many wow', ""),
+                                  ('such "a" 1 wow', "")):
+            with self.assertRaises(ManyParseException) as raised:
+                parse(document)
+            self.assertIn(message, str(raised.exception))
+            self.assertRaises(ManyParseException, parse.loadb, document.encode("utf-8"))
+
+        with self.assertRaises(ManyParseException) as raised:
+            parse('such "a" is "1" , "b" is so many wow')
+        self.assertIn("position 12", str(raised.exception))
+
+        for document in ('such "a" is 1 , "b" is so 1', 'such "a" is', ""):
+            self.assertRaises(VeryUnexpectedEndException, parse, document)
+            self.assertRaises(VeryUnexpectedEndException, parse.loadb, document.encode("utf-8"))
+
+        self.assertRaises(ManyParseException, parse.loadb, b'such "a" is 1 , "b" is so many , "\xff" is 1 wow')
+
+        # Exponents take a '-' but never a '+', as in loads()
+        for parse, document in ((compile_schema({"a": float}), 'such "a" is 1very+1 wow'),
+                                (compile_schema([float]), "so 1very+1 many")):
+            self.assertRaises(ManyParseException, loads, document)
+            self.assertRaises(ManyParseException, parse, document)
+            self.assertRaises(ManyParseException, parse.loadb, document.encode("utf-8"))
+            self.assertEqual(loads(document.replace("+", "-")), parse(document.replace("+", "-")))
+
+        for schema in ({1: int}, [int, str], (int, str), set, 1):
+            self.assertRaises(TypeError, compile_schema, schema)
+
+    def test_cached(self):
+        self.assertIs(self.parse, compile_schema(dict(self.SCHEMA)))
+        self.assertIsNot(self.parse, compile_schema({"id": int}))
+        self.assertIn("def parse(s):", self.parse.source)
+
+    def test_matches_loads(self):
+        import random
+        rng = random.Random(21)
+        lexemes = ["such", "wow", "so", "many", "and", "is", ",", '"a"', '"\\u000101"', "1", "1.4", "18", "1very",
+                   "yes", "empty", '"']
+        for _ in range(500):
+            record = {"id": rng.randrange(-100, 100), "name": rng.choice(["shibe", "a\nb", ""]),
+                      "active": rng.random() < 0.5, "owner": rng.choice([None, "doge"]),
+                      "score": rng.choice([0.5, -2.25, 1e20, 3.0]), "tags": rng.sample(["a", "b", "c"], rng.randrange(4)),
+                      "location": {"lat": rng.random(), "lon": -rng.random()}, "extra": rng.choice([[1, {}], None])}
+            document = dumps(record)
+            pos = rng.randrange(len(document) + 1)
+            mutated = document[:pos] + rng.choice(lexemes) + document[pos + rng.randrange(3):]
+            self.assertEqual(loads(document), self.parse(document))
+            try:
+                expected = loads(mutated)
+            except ManyParseException:
+                self.assertRaises(ManyParseException, self.parse, mutated)
+                continue
+
+            try:
+                self.assertEqual(expected, self.parse(mutated), mutated)
+            except ManyParseException:
+                pass # a document of another shape
+
+class NumericArraysTests(unittest.TestCase):
+    def parse_all(self, document, **kw):
+        """ :return: document parsed by both engines and loadb, which must agree """
+        results = [loads(document, engine=engine, **kw) for engine in ("state", "descent")]
+        results.append(loadb(document.encode("utf-8"), **kw))
+        for result in results[1:]:
+            self.assertEqual(repr(results[0]), repr(result))
+
+        return results[0]
+
+    def test_python_backend(self):
+        hook = NumericArrays("python")
+        self.assertEqual(array("q", [1, 2, -3]), self.parse_all("so 1 and 2 also -3 many", array_hook=hook))
+        self.assertEqual(array("d", [1.5, 2.0, 16.0]), self.parse_all("so 1.4 and 2\nand 2very1many", array_hook=hook))
+        self.assertEqual({"a": [array("q", [1]), ["b", 2], [], array("q", [0])]},
+                         self.parse_all('such "a" is so so 1 many and so "b" and 2 many also so many and so -0 many many wow',
+                                        array_hook=hook))
+        self.assertEqual([1, True], self.parse_all("so 1 and yes many", array_hook=hook))
+        self.assertEqual([8 ** 30, 1], self.parse_all("so 1" + "0" * 30 + " and 1 many", array_hook=hook))
+
+    @unittest.skipIf(dogeparser.numpy is None, "NumPy is not installed")
+    def test_numpy_backend(self):
+        hook = NumericArrays()
+        self.assertEqual("numpy", hook.backend)
+        result = self.parse_all("so so 1 and 2 many also so 1.4 and 2 many many", array_hook=hook)
+        self.assertEqual(dogeparser.numpy.int64, result[0].dtype)
+        self.assertEqual([1, 2], result[0].tolist())
+        self.assertEqual(dogeparser.numpy.float64, result[1].dtype)
+        self.assertEqual([1.5, 2.0], result[1].tolist())
+        self.assertEqual([8 ** 30], self.parse_all("so 1" + "0" * 30 + " many", array_hook=hook))
+
+    def test_without_numpy(self):
+        with mock.patch("dogeparser.numpy", None):
+            self.assertRaises(ImportError, NumericArrays, "numpy")
+            self.assertEqual("python", NumericArrays().backend)
+        self.assertRaises(ValueError, NumericArrays, "simd")
+
+    def test_hooks(self):
+        # Numbers converted by hooks are packed when the array is complete
+        double = lambda text: 2 * int(text, 8)
+        self.assertEqual(array("q", [2, 4]), loads("so 1 and 2 many", parse_int=double, array_hook=NumericArrays("python")))
+        self.assertEqual([1.5, 2.0], loads("so 1.4 and 2 many", parse_float=octal_to_fraction, array_hook=NumericArrays("python")))
+        self.assertEqual((1, (2, "a")), self.parse_all('so 1 and so 2 and "a" many many', array_hook=tuple))
+        self.assertEqual(array("q", [1, 2]), loads("so 1 and 2 many", stats=ParseStats(), array_hook=NumericArrays("python")))
+
+    def test_errors(self):
+        hook = NumericArrays("python")
+        for document in ("so 1 and 18 many", "so 1 and 1. many", "so 1 and 2 many,", "so 1 and 2 manyy",
+                         "so 1 , 2 many", "so 1 and 2", "so 1 and", "so 1very many"):
+            for engine in ("state", "descent"):
+                with self.assertRaises(ManyParseException) as expected:
+                    loads(document, engine=engine)
+
+                with self.assertRaises(ManyParseException) as packed:
+                    loads(document, engine=engine, array_hook=hook)
+
+                self.assertEqual(str(expected.exception), str(packed.exception))
+                self.assertIs(type(expected.exception), type(packed.exception))
+
+    def test_incremental(self):
+        decoder = DSONIncrementalDecoder(array_hook=NumericArrays("python"))
+        self.assertEqual([], decoder.feed(b"so 1 and 2"))
+        self.assertEqual([array("q", [1, 2, 3])], decoder.feed(b" and 3 many\nso 4"))
+        self.assertEqual([array("q", [4])], decoder.feed(b" many"))
+        self.assertEqual([], decoder.close())
+
+class CommandLineTests(unittest.TestCase):
+    data = b'such "a" is so 1 and 2 many wow\n\nso "\\u000101" and\n"x" 2\nso 1.4 also empty many\n'
+
+    def run_main(self, *argv, data=None):
+        """ :return: ``(status, stdout, stderr)`` of main(argv) reading data on standard input """
+        stdin = io.TextIOWrapper(io.BytesIO(self.data if data is None else data))
+        with mock.patch("sys.stdin", stdin), mock.patch("sys.stdout", io.StringIO()) as stdout, \
+                mock.patch("sys.stderr", io.StringIO()) as stderr:
+            status = dogeparser.main(list(argv))
+
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_outputs(self):
+        status, out, err = self.run_main()
+        self.assertEqual(1, status)
+        self.assertEqual("{'a': [1, 2]}\n[1.5, None]\n", out)
+        self.assertEqual(["<stdin>:3", "<stdin>:4"], [line.split(": ")[0] for line in err.splitlines()])
+        self.assertIn("Such parse error", err)
+
+        self.assertEqual('{"a":[1,2]}\n[1.5,null]\n', self.run_main("-o", "json")[1])
+        self.assertEqual('such "a" is so 1 and 2 many wow\nso 1.4 and empty many\n', self.run_main("-o", "dson")[1])
+        self.assertEqual(dumps("犬", ensure_ascii=True) + "\n", self.run_main("-o", "dson", data='"犬"\n'.encode("utf-8"))[1])
+        self.assertEqual((0, '"A"\n', ""), self.run_main("-o", "json", data=b'"A"'))
+
+    def test_validate_only(self):
+        status, out, err = self.run_main("--validate-only")
+        self.assertEqual(1, status)
+        self.assertEqual("", out)
+        self.assertEqual(2, len(err.splitlines()))
+        self.assertEqual((0, "", ""), self.run_main("--validate-only", data=b"so many\n"))
+
+    def test_files_and_stats(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + "/shibes.dson"
+            with open(path, "wb") as fp:
+                fp.write(self.data)
+
+            status, out, err = self.run_main("-o", "json", "--stats", "--batch-size", "2", path, "-", data=b"such wow\n")
+            self.assertEqual(1, status)
+            self.assertEqual('{"a":[1,2]}\n[1.5,null]\n{}\n', out)
+            lines = err.splitlines()
+            self.assertEqual([path + ":3", path + ":4"], [line.split(": ")[0] for line in lines[:2]])
+            self.assertTrue(lines[2].startswith("5 documents, 2 errors, 0.00 MB in "), lines[2])
+            self.assertIn("documents/s", lines[2])
+
+    def test_workers(self):
+        data = self.data * 5
+        self.assertEqual(self.run_main("-o", "json", "--batch-size", "3", data=data),
+                         self.run_main("-o", "json", "--batch-size", "3", "--workers", "2", data=data))
+
+    def test_too_deep_to_marshal(self):
+        # Workers send back text, but pprint and json cannot write this deep
+        depth = 3000
+        deep = ("so " * depth + "many " * depth).encode("ascii")
+        data = deep + b"\nso 1 many\n" + deep + b"\n"
+        for workers in ("1", "2"):
+            status, out, err = self.run_main("-o", "dson", "-w", workers, "--batch-size", "2", data=data)
+            self.assertEqual((0, ""), (status, err))
+            self.assertEqual(data.decode("ascii").replace("many \n", "many\n"), out)
+
+            for output in ("json", "pprint"):
+                status, out, err = self.run_main("-o", output, "-w", workers, "--batch-size", "2", data=data)
+                self.assertEqual((1, "[1]\n"), (status, out))
+                self.assertEqual(["<stdin>:1: Such nesting, too deep to write as " + output,
+                                  "<stdin>:3: Such nesting, too deep to write as " + output], err.splitlines())
+
+            self.assertEqual((0, "", ""), self.run_main("--validate-only", "-w", workers, data=data))
+
+class TranscodeTests(unittest.TestCase):
+    document = ('such "a" is so 1 and -2.4 also yes many , "b\\n" is "x\\u000101\\u001750\\t" ! '
+                '"c" is such wow ? "d" is so so many and empty many . "e" is 1very77777 wow')
+
+    def transcode(self, src, **options):
+        dst = io.StringIO()
+        transcode_to_json(src, dst, **options)
+        return dst.getvalue()
+
+    def test_matches_json(self):
+        import json
+        for document in (self.document, "so many", '"a"', "17", "-0", "no", 'so "\x01é" and "\\"" many'):
+            for ensure_ascii in (False, True):
+                expected = json.dumps(loads(document), separators=(",", ":"), ensure_ascii=ensure_ascii)
+                self.assertEqual(expected, self.transcode(document, ensure_ascii=ensure_ascii))
+                self.assertEqual(expected, self.transcode(document.encode("utf-8"), ensure_ascii=ensure_ascii))
+                for chunk_size in (1, 2, 5):
+                    self.assertEqual(expected, self.transcode(io.StringIO(document), chunk_size=chunk_size,
+                                                              ensure_ascii=ensure_ascii))
+                    self.assertEqual(expected, self.transcode(io.BytesIO(document.encode("utf-8")), chunk_size=chunk_size,
+                                                              ensure_ascii=ensure_ascii))
+
+        self.assertEqual('{"a":1,"a":2}', self.transcode('such "a" is 1 , "a" is 2 wow'))
+
+    def test_separator_before_many(self):
+        import json
+        for document in ("so 1 and many", "so 1 also many", 'so "a" and so 2 also many and many',
+                         'such "a" is so yes also many wow'):
+            for chunk_size in (1, 3, DEFAULT_CHUNK_SIZE):
+                transcoded = self.transcode(io.StringIO(document), chunk_size=chunk_size)
+                self.assertEqual(loads(document), json.loads(transcoded))
+
+    def test_written_in_pieces(self):
+        import json
+        document = "so " + " and ".join(['"doge\\u000101"'] * 20000) + " many"
+        dst = mock.Mock()
+        transcode_to_json(io.BytesIO(document.encode("utf-8")), dst, chunk_size=1000)
+        self.assertGreater(dst.write.call_count, 10)
+        pieces = [call.args[0] for call in dst.write.call_args_list]
+        self.assertLess(max(map(len, pieces)), 40000)
+        self.assertEqual(["dogeA"] * 20000, json.loads("".join(pieces)))
+        self.assertEqual('["' + "a" * 100000 + '"]', self.transcode(io.StringIO('so "' + "a" * 100000 + '" many'), chunk_size=10))
+
+    def test_errors(self):
+        for document in ("", "so 1 and", "such", 'such "a" is', 'such "a" 1 wow', "so 18 many", "so 1 , 2 many",
+                         "such yes wow", "such wo wow", 'so "\\x" many', 'so "open many', "so 1 many many",
+                         'such "a" is 1 wow wow', "many", 'such "a" is many wow', "such 1 is 1 wow"):
+            with self.assertRaises(ManyParseException) as expected:
+                loads(document)
+
+            for src in (document, io.StringIO(document)):
+                with self.assertRaises(ManyParseException) as transcoded:
+                    self.transcode(src, chunk_size=3)
+
+                self.assertEqual(str(expected.exception), str(transcoded.exception), document)
+                self.assertIs(type(expected.exception), type(transcoded.exception))
+
+        dst = io.StringIO()
+        self.assertRaises(ManyParseException, transcode_to_json, "so 1 and 2 and 18 many", dst)
+        self.assertEqual("[1,2,", dst.getvalue())
+
+def _feed_in_chunks(document, size=64):
+    decoder = DSONIncrementalDecoder()
+    documents = []
+    for pos in range(0, len(document), size):
+        documents += decoder.feed(document[pos:pos + size])
+    return documents + decoder.close()
+
+class AdversarialScalingTests(unittest.TestCase):
+    """
+    Each family of pathological documents is parsed at two sizes GROWTH
+    times apart: in linear time the big one takes about GROWTH times as
+    long, in quadratic time GROWTH squared. Parsing is timed in CPU time
+    of this process, which other processes running meanwhile do not add
+    to, and the big one may take up to GROWTH ** 1.5 times as long, far
+    enough from both for noise not to matter.
+    """
+    GROWTH = 16
+    BOUND = GROWTH ** 1.5
+    MIN_SECONDS = 0.002 # shorter timings are too coarse to compare
+
+    PARSERS = {
+        "loads": loads,
+        "descent": lambda document: loads(document, engine="descent"),
+        "deep descent": lambda document: DescentParser(deep=True).parse(StringStream(document)),
+        "loadb": lambda document: loadb(document.encode("utf-8")),
+        "validate": validate,
+        "load": lambda document: load(io.StringIO(document), chunk_size=64),
+        "iter_load": lambda document: list(iter_load(io.StringIO("so " + document + " many"), chunk_size=64)),
+        "incremental": _feed_in_chunks,
+        "transcode": lambda document: transcode_to_json(io.StringIO(document), io.StringIO(), chunk_size=64),
+    }
+    FLAT = ("loads", "descent", "loadb", "validate", "load", "iter_load", "incremental", "transcode")
+    # engine="descent" rejects documents this deep, which deep=True hands over to the state engine
+    NESTED = ("loads", "deep descent", "loadb", "validate", "load", "iter_load", "incremental", "transcode")
+
+    def seconds(self, parse, document, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.process_time()
+            parse(document)
+            elapsed = time.process_time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def assertLinear(self, family, size, parsers):
+        for name in parsers:
+            with self.subTest(parser=name):
+                parse = self.PARSERS[name]
+                small = self.seconds(parse, family(size), 3)
+                big = self.seconds(parse, family(self.GROWTH * size), 2)
+                self.assertLess(big, self.BOUND * max(small, self.MIN_SECONDS))
+
+    def test_deep_nesting(self):
+        # Deeper than DescentParser recurses even at the small size, so both sizes take the same path
+        depth = DEFAULT_MAX_DEPTH + 100
+        self.assertLinear(lambda n: 'such "a" is ' * n + "1" + " wow" * n, depth, self.NESTED)
+        self.assertLinear(lambda n: "so " * n + "many " * n, depth, self.NESTED)
+        self.assertLinear(lambda n: 'so such "a" is ' * n + "1" + " wow many" * n, depth, self.NESTED)
+
+    def test_long_strings(self):
+        self.assertLinear(lambda n: '"' + "doge " * n + '"', 5000, self.FLAT)
+        self.assertLinear(lambda n: 'such "' + "k" * n + '" is 1 wow', 50000, self.FLAT)
+
+    def test_escapes(self):
+        self.assertLinear(lambda n: '"' + "\\n\\\"" * n + '"', 1000, self.FLAT)
+        self.assertLinear(lambda n: '"' + "\\u000101" * n + '"', 1000, self.FLAT)
+
+    def test_numbers(self):
+        self.assertLinear(lambda n: "1very" + "7" * n, 50000, self.FLAT)
+        self.assertLinear(lambda n: "1very-" + "7" * n, 50000, self.FLAT)
+        self.assertLinear(lambda n: "1." + "7" * n + "very" + "7" * n, 25000, self.FLAT)
+        self.assertLinear(lambda n: "so " + " and ".join(["1.7very-777777"] * n) + " many", 500, self.FLAT)
+
+    def test_long_integers(self):
+        # Decimal JSON would take quadratic time, so transcoding refuses
+        self.assertLinear(lambda n: "-" + "7" * n, 50000, self.FLAT[:-1])
+        self.assertRaises(ManyParseException, transcode_to_json, "7" * 100000, io.StringIO())
+
+    def test_incremental_retries(self):
+        # A string fed in small chunks is only scanned again once a quote
+        # that is not escaped may end it, or it has doubled in length
+        decoder = DSONIncrementalDecoder()
+        with mock.patch.object(decoder._parser, "parse", wraps=decoder._parser.parse) as parse:
+            self.assertEqual([], decoder.feed('so "'))
+            for _ in range(10000):
+                self.assertEqual([], decoder.feed('do\\"ge'))
+            self.assertEqual([], decoder.feed("\\"))
+            self.assertEqual([], decoder.feed('"'))
+            self.assertEqual([['do"ge' * 10000 + '"']], decoder.feed('" many '))
+
+        self.assertLess(parse.call_count, 25)